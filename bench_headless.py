@@ -0,0 +1,73 @@
+# bench_headless.py — 对比默认路径 (渲染系统 + 可视网格 + 每步 update_render) 与 --headless 的仿真步速
+from __future__ import annotations
+import argparse
+import time
+
+import numpy as np
+
+from test_main import TASK_FILE, WarmScene, load_proposals
+from task_registry import load_registry
+
+
+def find_task(task=None, task_id=None):
+    """返回 (task_name, cfg, glb)；未指定时取注册表中第一个文件齐全的任务"""
+    registry = load_registry(TASK_FILE)
+    if task and task_id:
+        return (f"{task}.{task_id}", *registry.get(f"{task}.{task_id}"))
+    for name in registry.select(task):
+        if not registry.missing(name):
+            return (name, *registry.get(name))
+    raise FileNotFoundError("注册表中没有文件齐全的任务")
+
+
+def bench_mode(glb_path, proposal, headless: bool, steps: int, repeats: int):
+    """建场景 repeats 次，每次闭合手爪仿真 steps 步；返回 (平均建场景耗时, 平均步速)"""
+    tcp, quat = proposal
+    setup_times, step_rates = [], []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        warm = WarmScene(glb_path, with_viewer=False, headless=headless)
+        warm.reset(tcp, quat)
+        setup_times.append(time.perf_counter() - t0)
+
+        scene, gripper, actor = warm.scene, warm.gripper, warm.actor
+        t0 = time.perf_counter()
+        for i in range(steps):
+            # 与 run_single_proposal 的抓取阶段相同的每步工作量
+            gripper.control("close", actor if i > 0 else None)
+            scene.step()
+            if not headless:
+                scene.update_render()
+            gripper.update_contacts(actor)
+            gripper.is_grasping(actor)
+        step_rates.append(steps / (time.perf_counter() - t0))
+        del warm
+    return float(np.mean(setup_times)), float(np.median(step_rates))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="默认路径 vs headless 的建场景耗时与仿真步速")
+    parser.add_argument("--task", type=str, help="任务类别 (默认取第一个文件齐全的任务)")
+    parser.add_argument("--id", type=str, help="任务编号")
+    parser.add_argument("--steps", type=int, default=500, help="每次测量的仿真步数")
+    parser.add_argument("--repeats", type=int, default=3, help="重复次数 (步速取中位数)")
+    args = parser.parse_args()
+
+    task_name, cfg, glb = find_task(args.task, args.id)
+    tcp, quat, key, _ = load_proposals(cfg)[0]
+    print(f"[INFO] 任务 {task_name}, proposal {key}, {args.steps} 步 x {args.repeats} 次")
+
+    rows = []
+    for label, headless in (("render", False), ("headless", True)):
+        try:
+            setup_s, rate = bench_mode(glb, (tcp, quat), headless, args.steps, args.repeats)
+        except Exception as e:   # 无显示/无 GPU 的机器上默认路径建不了渲染系统
+            print(f"[WARN] {label} 路径不可用: {e}")
+            continue
+        rows.append((label, setup_s, rate))
+
+    print(f"\n{'mode':<10} {'setup(ms)':>10} {'steps/s':>10}")
+    for label, setup_s, rate in rows:
+        print(f"{label:<10} {setup_s * 1e3:>10.1f} {rate:>10.1f}")
+    if len(rows) == 2:
+        print(f"[INFO] headless 步速为默认路径的 {rows[1][2] / rows[0][2]:.2f} 倍")
@@ -0,0 +1,70 @@
+# bench_pose_math.py — 对比逐个调用 transforms3d 与 pose_math 批量运算的耗时
+from __future__ import annotations
+import argparse
+import time
+
+import numpy as np
+import transforms3d.quaternions as tq
+
+import pose_math as pm
+
+
+def _time(fn, repeats):
+    """返回 repeats 次中最快的一次耗时 (s)"""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _old_world_to_object(p, q_wxyz, point):
+    """重构前 math_utils.world_to_object 的标量实现"""
+    R = tq.quat2mat(q_wxyz)
+    if R[2, 2] < 0:
+        R[:, 2] *= -1
+        R[:, 0] *= -1
+    if R[0, 0] < 0:
+        R[:, 0] *= -1
+        R[:, 1] *= -1
+    return R.T @ (point - p)
+
+
+def make_cases(n, rng):
+    q = rng.normal(size=(n, 4))
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    q2 = rng.normal(size=(n, 4))
+    q2 /= np.linalg.norm(q2, axis=1, keepdims=True)
+    p = rng.normal(size=(n, 3))
+    pts = rng.normal(size=(n, 3))
+    R = pm.quat_to_mat(q)
+    rot90 = tq.axangle2quat([0, 0, 1], np.deg2rad(90))
+    return {
+        # 名称: (逐个调用, 批量)；z90 offset 为 proposal 的 +90° 补偿，w→o 为世界系 → 物体系
+        "z90 offset": (lambda: [tq.qmult(x, rot90) for x in q],
+                       lambda: pm.quat_mul(q, pm.ROT_Z90)),
+        "quat w→o": (lambda: [tq.qmult(tq.qinverse(a), b) for a, b in zip(q, q2)],
+                     lambda: pm.quat_world_to_object(q, q2)),
+        "quat→mat": (lambda: [tq.quat2mat(x) for x in q],
+                     lambda: pm.quat_to_mat(q)),
+        "mat→quat": (lambda: [tq.mat2quat(m) for m in R],
+                     lambda: pm.mat_to_quat(R)),
+        "point w→o": (lambda: [_old_world_to_object(a, b, c) for a, b, c in zip(p, q, pts)],
+                      lambda: pm.world_to_object(p, q, pts)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="transforms3d 逐个调用 vs pose_math 批量运算")
+    parser.add_argument("--n", type=int, nargs="+", default=[100, 10000], help="批大小 (可多个)")
+    parser.add_argument("--repeats", type=int, default=5, help="重复次数 (取最快一次)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'op':<14} {'N':>7} {'loop(ms)':>10} {'batch(ms)':>10} {'speedup':>8}")
+    for n in args.n:
+        for name, (loop_fn, batch_fn) in make_cases(n, rng).items():
+            t_loop = _time(loop_fn, args.repeats)
+            t_batch = _time(batch_fn, args.repeats)
+            print(f"{name:<14} {n:>7} {t_loop * 1e3:>10.2f} {t_batch * 1e3:>10.3f} {t_loop / t_batch:>7.1f}x")
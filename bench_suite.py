@@ -0,0 +1,235 @@
+# bench_suite.py — 自带基准：本地生成基本体 GLB + 合成 isaac_grasp proposal，走真实 run_single_proposal 路径测吞吐
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import subprocess
+import time
+
+import numpy as np
+import yaml
+
+import pose_math as pm
+
+DEFAULT_BENCH_DIR = "grasp/.cache/bench"
+OBJECTS = ("box", "cylinder", "sphere", "highpoly")
+BENCH_VERSION = 1
+
+
+# ------------------- 生成测试物体 -------------------
+def make_mesh(name: str):
+    """基本体 trimesh 网格 (物体系原点在中心，尺寸与 task/ 下的小物体相当，单位 m)"""
+    import trimesh
+
+    if name == "box":
+        return trimesh.creation.box(extents=(0.06, 0.04, 0.10))
+    if name == "cylinder":
+        return trimesh.creation.cylinder(radius=0.025, height=0.10, sections=48)
+    if name == "sphere":
+        return trimesh.creation.icosphere(subdivisions=3, radius=0.035)
+    if name == "highpoly":
+        # 约 8 万面的起伏椭球：碰撞几何的面数对建场景和仿真耗时影响最大
+        mesh = trimesh.creation.icosphere(subdivisions=6, radius=1.0)
+        v = mesh.vertices
+        bumps = 1 + 0.08 * np.sin(7 * v[:, 0]) * np.sin(5 * v[:, 1]) * np.sin(6 * v[:, 2])
+        mesh.vertices = v * bumps[:, None] * np.array([0.035, 0.025, 0.05])
+        return mesh
+    raise ValueError(f"未知的测试物体 {name}，可选 {OBJECTS}")
+
+
+def make_proposals(mesh, n: int, rng, tcp_offset):
+    """
+    合成 n 个 isaac_grasp proposal：接近方向随机 (指向物体中心)，闭合方向与之垂直，
+    TCP 放在中心沿接近方向后退 2~5 cm 处 (手指夹在物体中部)。
+    proposal 朝向为手爪朝向去掉 90° 补偿 (读入时 load_proposals 再乘回去)。
+    """
+    center = mesh.bounding_box.centroid
+    grasps = {}
+    for i in range(n):
+        d = rng.normal(size=3)
+        d /= np.linalg.norm(d)
+        c = np.cross(d, rng.normal(size=3))
+        c /= np.linalg.norm(c)
+        R_hand = np.stack([np.cross(c, d), c, d], axis=1)   # 手爪系：y 为闭合方向，z 为接近方向
+        q = pm.quat_mul(pm.mat_to_quat(R_hand), pm.quat_inverse(pm.ROT_Z90))
+        tcp = center - d * rng.uniform(0.02, 0.05)
+        position = tcp - R_hand @ tcp_offset
+        grasps[f"grasp_{i}"] = {
+            "confidence": float(rng.uniform(0.5, 1.0)),
+            "position": [float(x) for x in position],
+            "orientation": {"w": float(q[0]), "xyz": [float(x) for x in q[1:]]},
+            "tcp_position": [float(x) for x in tcp],
+        }
+    return {"format": "isaac_grasp", "format_version": "1.0", "grasps": grasps, "ranking": list(grasps)}
+
+
+def generate(out_dir: str, names, n: int, seed: int = 0):
+    """生成 (或复用) 测试物体和 proposal 文件，返回 {name: (cfg_path, glb_path, faces)}"""
+    from prefilter import hand_boxes
+    from test_main import URDF_PATH
+
+    tcp_offset = hand_boxes(URDF_PATH)["tcp"]
+    os.makedirs(out_dir, exist_ok=True)
+    assets = {}
+    for k, name in enumerate(names):
+        mesh = make_mesh(name)
+        glb_path = os.path.join(out_dir, f"{name}.glb")
+        cfg_path = os.path.join(out_dir, f"{name}_proposals_{n}_s{seed}.yml")
+        if not os.path.isfile(glb_path):
+            mesh.export(glb_path)
+        if not os.path.isfile(cfg_path):
+            data = make_proposals(mesh, n, np.random.default_rng([seed, k]), tcp_offset)
+            with open(cfg_path, "w", encoding="utf-8") as f:
+                yaml.safe_dump(data, f, sort_keys=False)
+        assets[name] = (cfg_path, glb_path, len(mesh.faces))
+    return assets
+
+
+# ------------------- 测量 -------------------
+def warm_up():
+    """
+    进程里第一次建场景 / 加载 URDF 有一次性的初始化开销 (约 0.7 s)：先建一个只有手爪的场景丢掉，
+    不计入测量；物体不预加载，第一次加载 GLB 的耗时照常计入
+    """
+    import test_main
+
+    scene, _ = test_main.create_world(test_main.TIMESTEP, with_viewer=False, headless=True)
+    test_main.setup_robot(scene, np.zeros(3), [1, 0, 0, 0], headless=True)
+
+
+def bench_object(cfg_path: str, glb_path: str, reuse_scene: bool = False):
+    """
+    在独立进程里跑一个物体的全部 proposal (run_single_proposal，headless)，返回测量结果。
+    建场景耗时：新建场景时为每个 proposal 的 world + object + robot 阶段；复用时为 WarmScene 的构造。
+    """
+    import test_main
+
+    proposals = test_main.load_proposals(cfg_path)
+    warm_up()
+    setup_times, sim_seconds, steps, ok = [], 0.0, 0, 0
+    t_start = time.perf_counter()
+    warm = None
+    if reuse_scene:
+        t0 = time.perf_counter()
+        warm = test_main.WarmScene(glb_path, with_viewer=False, headless=True)
+        setup_times.append(time.perf_counter() - t0)
+
+    for tcp, quat, key, grasp in proposals:
+        stats = {}
+        _, grasp_data = test_main.run_single_proposal(glb_path, (tcp, quat, key), grasp, with_viewer=False,
+                                                      warm=warm, headless=True, stats=stats, profile=True)
+        phases = stats["profile"]["phases"]
+        if warm is None:
+            setup_times.append(sum(phases[p]["seconds"] for p in ("world", "object", "robot")))
+        for name, ph in phases.items():
+            if ph["steps"]:
+                sim_seconds += ph["seconds"]
+                steps += ph["steps"]
+        ok += grasp_data is not None
+    wall = time.perf_counter() - t_start
+
+    return {
+        "proposals": len(proposals),
+        "ok": ok,
+        "wall_s": wall,
+        "proposals_per_s": len(proposals) / wall if wall > 0 else None,
+        "steps": steps,
+        "steps_per_s": steps / sim_seconds if sim_seconds > 0 else None,
+        "setup_ms": float(np.mean(setup_times)) * 1e3 if setup_times else None,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,   # Linux 单位为 KB
+    }
+
+
+def _bench_in_subprocess(args):
+    """每个物体一个新进程：峰值 RSS 互不影响，也不继承上一个物体的 PhysX 状态"""
+    with mp.get_context("spawn").Pool(1) as pool:
+        return pool.apply(bench_object, args)
+
+
+def environment():
+    """记录机器和版本信息，便于跨提交对比时确认条件一致"""
+    import sapien
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sapien": getattr(sapien, "__version__", None),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# ------------------- 对比 -------------------
+METRICS = (("proposals_per_s", True), ("steps_per_s", True), ("setup_ms", False), ("peak_rss_mb", False))
+
+
+def compare(base: dict, new: dict):
+    """打印两次结果的对比 (ratio > 1 表示 new 更好)"""
+    print(f"\n[INFO] 对比 {base['env'].get('commit')} → {new['env'].get('commit')}")
+    if base.get("config") != new.get("config"):
+        print(f"[WARN] 两次的配置不同: {base.get('config')} → {new.get('config')}")
+    print(f"{'object':<10} {'metric':<16} {'base':>10} {'new':>10} {'ratio':>7}")
+    for name, res in new["objects"].items():
+        old = base["objects"].get(name)
+        if old is None:
+            continue
+        if old["proposals"] != res["proposals"] or old["steps"] != res["steps"]:
+            print(f"[WARN] {name}: proposal 数或总步数不同 ({old['steps']} → {res['steps']})，仿真行为可能已改变")
+        for metric, higher_better in METRICS:
+            a, b = old.get(metric), res.get(metric)
+            if not a or not b:
+                continue
+            ratio = b / a if higher_better else a / b
+            print(f"{name:<10} {metric:<16} {a:>10.1f} {b:>10.1f} {ratio:>6.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="用本地生成的基本体测 proposal 吞吐、步速、建场景耗时和峰值内存")
+    parser.add_argument("--objects", nargs="+", choices=OBJECTS, default=list(OBJECTS), help="要测的物体")
+    parser.add_argument("--proposals", type=int, default=8, help="每个物体的合成 proposal 数")
+    parser.add_argument("--seed", type=int, default=0, help="合成 proposal 的随机种子")
+    parser.add_argument("--reuse-scene", action="store_true", help="每个物体只建一次场景 (同 test_main --reuse-scene)")
+    parser.add_argument("--dir", type=str, default=DEFAULT_BENCH_DIR, help="生成的 GLB / proposal 文件目录")
+    parser.add_argument("--out", type=str, help="结果 JSON 路径 (默认 <dir>/bench_<commit>.json)")
+    parser.add_argument("--compare", type=str, metavar="BASE_JSON", help="与之前的结果 JSON 对比")
+    args = parser.parse_args()
+
+    assets = generate(args.dir, args.objects, args.proposals, args.seed)
+    env = environment()
+    print(f"[INFO] {len(assets)} 个物体 x {args.proposals} 个 proposal, commit {env['commit']}")
+
+    objects = {}
+    for name, (cfg_path, glb_path, faces) in assets.items():
+        print(f"[PROGRESS] {name} ({faces} 面)")
+        res = _bench_in_subprocess((cfg_path, glb_path, args.reuse_scene))
+        objects[name] = dict(faces=faces, **res)
+
+    result = {
+        "version": BENCH_VERSION,
+        "env": env,
+        "config": {"proposals": args.proposals, "seed": args.seed, "reuse_scene": args.reuse_scene},
+        "objects": objects,
+    }
+    out = args.out or os.path.join(args.dir, f"bench_{env['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=1)
+
+    print(f"\n{'object':<10} {'faces':>7} {'ok':>5} {'prop/s':>7} {'steps/s':>8} {'setup(ms)':>10} {'rss(MB)':>8}")
+    for name, r in objects.items():
+        print(f"{name:<10} {r['faces']:>7} {r['ok']:>2}/{r['proposals']:<2} {r['proposals_per_s']:>7.2f} "
+              f"{r['steps_per_s']:>8.0f} {r['setup_ms']:>10.1f} {r['peak_rss_mb']:>8.0f}")
+    print(f"[INFO] 结果已写入 {out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), result)
@@ -0,0 +1,256 @@
+# collision_cache.py — 碰撞网格磁盘缓存 (按 GLB 内容哈希 + 缩放 + 凸/非凸/多凸包 + 碰撞 LOD 索引)
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import sapien.core as sapien
+
+from hash_utils import file_sha1
+from collision_lod import DEFAULT_LOD, lod_params, decimate
+from convex_decomp import decompose, method_params, pack_parts
+
+DEFAULT_CACHE_DIR = "grasp/.cache/collision"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+EVICT_GRACE_S = 30.0   # 最近这么多秒内访问过的文件不淘汰：刚交给调用方的路径可能还没被加载
+
+_default_cache = None   # 未指定缓存但需要 LOD 简化时使用的进程内共享缓存
+
+
+def write_ply(path: str, vertices, triangles, comments=None):
+    """
+    写二进制 PLY (float32 顶点 + uint32 三角形索引)，先写临时文件再原子替换。
+    comments: {名字: 值}，写成头部的 comment 行 (见 read_ply_header)
+    """
+    vertices = np.ascontiguousarray(vertices, dtype="<f4").reshape(-1, 3)
+    triangles = np.asarray(triangles, dtype="<u4").reshape(-1, 3)
+    header = (
+        "ply\nformat binary_little_endian 1.0\n"
+        + "".join(f"comment {k} {v}\n" for k, v in (comments or {}).items())
+        + f"element vertex {len(vertices)}\n"
+        "property float x\nproperty float y\nproperty float z\n"
+        f"element face {len(triangles)}\n"
+        "property list uchar uint vertex_indices\nend_header\n"
+    )
+    faces = np.empty(len(triangles), dtype=[("n", "u1"), ("idx", "<u4", (3,))])
+    faces["n"] = 3
+    faces["idx"] = triangles
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(header.encode("ascii"))
+        f.write(vertices.tobytes())
+        f.write(faces.tobytes())
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def read_ply_header(path: str) -> dict:
+    """读 PLY 头部：{"vertices": 顶点数, "faces": 三角形数, "comments": {名字: 字符串值}}"""
+    header = {"vertices": 0, "faces": 0, "comments": {}}
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.decode("ascii", "replace").strip()
+            if line == "end_header":
+                break
+            if line.startswith("comment "):
+                _, name, value = (line.split(" ", 2) + [""])[:3]
+                header["comments"][name] = value
+            elif line.startswith("element vertex "):
+                header["vertices"] = int(line.split()[-1])
+            elif line.startswith("element face "):
+                header["faces"] = int(line.split()[-1])
+    return header
+
+
+def parts_mass(path: str, density: float):
+    """
+    get_parts 缓存文件记录的质量属性 (按三角网格碰撞体算、单位密度)，换算到 density，
+    返回 (mass, cmass_local_pose, inertia)；文件里没有时返回 None
+    """
+    c = read_ply_header(path)["comments"]
+    if "volume" not in c:
+        return None
+    cmass = [float(x) for x in c["cmass"].split()]
+    inertia = [float(x) * density for x in c["inertia"].split()]
+    return float(c["volume"]) * density, sapien.Pose(cmass[:3], cmass[3:]), inertia
+
+
+def get_default_cache() -> "CollisionCache":
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = CollisionCache(DEFAULT_CACHE_DIR)
+    return _default_cache
+
+
+class CollisionCache:
+    """
+    持久化的碰撞几何缓存。
+
+    未命中时用 SAPIEN 自己的加载器处理原始 GLB (与直接加载得到的顶点/三角形完全一致)，
+    把缩放后的几何写成二进制 PLY；之后的运行直接从 PLY 构建碰撞体。
+    超过 max_bytes 时按最近访问时间 (文件 mtime) 做 LRU 淘汰。
+
+    注意：PhysX 的 SDF / 凸包烘焙结果无法通过 SAPIEN 的 Python 接口持久化，
+    这里缓存的是烘焙前的几何；凸包模式缓存的是凸包顶点，收益最大。
+    非凸碰撞体可按 LOD 档位 (见 collision_lod.py) 缓存简化后的网格，简化结果 (面数 / 顶点最大偏差) 记在 PLY 头部。
+    get_parts 缓存多凸包分解 (见 convex_decomp.py)：各凸块是 PLY 里互不相连的连通片。
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, model_path: str, scale, convex: bool, lod: str = DEFAULT_LOD) -> str:
+        scale_str = ",".join(f"{float(s):.6g}" for s in scale)
+        mode = "convex" if convex else "nonconvex"
+        raw = f"{file_sha1(model_path)}|{scale_str}|{mode}"
+        params = None if convex else lod_params(lod)
+        if params is not None:   # full 不写入，已有的缓存文件仍然有效
+            raw += f"|lod:{params['max_faces']},{params['tolerance']:.6g}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, model_path: str, scale=(1.0, 1.0, 1.0), convex: bool = False, lod: str = DEFAULT_LOD) -> str:
+        """
+        返回可直接用于 add_*_collision_from_file 的缓存文件路径 (已包含缩放，加载时 scale=1)。
+        lod: 非凸碰撞体的 LOD 档位，凸包模式忽略
+        """
+        path = os.path.join(self.cache_dir, self.key(model_path, scale, convex, lod) + ".ply")
+        if self._touch(path):
+            self.hits += 1
+            return path
+
+        self.misses += 1
+        vertices, triangles = self._process(model_path, scale, convex)
+        comments = None
+        params = None if convex else lod_params(lod)
+        if params is not None:
+            # 在缩放后的几何上简化，容差为世界尺度 (m)
+            vertices, triangles, info = decimate(vertices, triangles, params["max_faces"], params["tolerance"])
+            comments = {"lod": lod, **info}
+            mark = "" if info["budget_met"] else " (容差内达不到面数预算)"
+            print(f"[INFO] 碰撞 LOD {lod}: {os.path.basename(model_path)} {info['original_faces']} → "
+                  f"{info['faces']} 面，顶点最大偏差 {info['error'] * 1e3:.2f} mm{mark}")
+        write_ply(path, vertices, triangles, comments)
+        self._evict(keep=path)
+        return path
+
+    def get_parts(self, model_path: str, scale=(1.0, 1.0, 1.0), method: str = "auto") -> str:
+        """
+        返回多凸包分解的缓存文件路径 (已包含缩放)，供 add_multiple_convex_collisions_from_file 使用；
+        没有可用凸包时抛 ValueError (见 pack_parts)，失败也缓存：同名的 .failed 标记文件记下原因，之后直接抛出不再重算。
+        同时记下原三角网格碰撞体的质量属性 (见 parts_mass)：凸块有重叠、加厚，按凸块算的质量和惯量会偏
+        """
+        params = method_params(method)   # auto 先解析成实际方法，装没装 coacd 的结果不会混用
+        scale_str = ",".join(f"{float(s):.6g}" for s in scale)
+        raw = f"{file_sha1(model_path)}|{scale_str}|parts|{json.dumps(params, sort_keys=True)}"
+        path = os.path.join(self.cache_dir, hashlib.sha1(raw.encode("utf-8")).hexdigest() + ".ply")
+        failed = path[:-len(".ply")] + ".failed"
+        if self._touch(path):
+            self.hits += 1
+            return path
+        if os.path.isfile(failed):
+            self.hits += 1
+            with open(failed, "r", encoding="utf-8") as f:
+                raise ValueError(f.read().strip())
+
+        self.misses += 1
+        t0 = time.perf_counter()
+        vertices, triangles = self._process(model_path, scale, convex=False)
+        parts, used = decompose(vertices, triangles, params["method"])
+        try:
+            vertices, triangles, n_parts = pack_parts(parts)
+        except ValueError as e:
+            with open(failed, "w", encoding="utf-8") as f:
+                f.write(f"{used}: {e}\n")
+            raise ValueError(f"{used}: {e}") from None
+        volume, cmass, inertia = self._mass_properties(model_path, scale)
+        comments = {"decomp": used, "parts": n_parts, "volume": volume,
+                    "cmass": " ".join(f"{x:.9g}" for x in [*cmass.p, *cmass.q]),
+                    "inertia": " ".join(f"{x:.9g}" for x in inertia)}
+        write_ply(path, vertices, triangles, comments)
+        self._evict(keep=path)
+        skipped = f" (跳过 {len(parts) - n_parts} 个不足 4 点的块)" if n_parts < len(parts) else ""
+        print(f"[INFO] 凸分解 ({used}): {os.path.basename(model_path)} → {n_parts} 个凸块{skipped}，"
+              f"用时 {time.perf_counter() - t0:.2f} s")
+        return path
+
+    @staticmethod
+    def _mass_properties(model_path: str, scale):
+        """与 load_my_object 的三角网格碰撞体 (动态刚体带 SDF) 相同方式算出的单位密度质量、质心位姿和主惯量"""
+        body = sapien.physx.PhysxRigidDynamicComponent()
+        shape = sapien.physx.PhysxCollisionShapeTriangleMesh(model_path, np.asarray(scale, dtype=np.float32),
+                                                              sapien.physx.PhysxMaterial(0.0, 0.0, 0.0), sdf=True)
+        shape.set_density(1.0)
+        body.attach(shape)
+        return float(body.mass), body.cmass_local_pose, [float(x) for x in body.inertia]
+
+    @staticmethod
+    def _process(model_path: str, scale, convex: bool):
+        # 用 SAPIEN 加载一次 (不建 SDF)，取出处理后的几何
+        mat = sapien.physx.PhysxMaterial(0.0, 0.0, 0.0)
+        if convex:
+            shape = sapien.physx.PhysxCollisionShapeConvexMesh(model_path, [1, 1, 1], mat)
+        else:
+            shape = sapien.physx.PhysxCollisionShapeTriangleMesh(model_path, [1, 1, 1], mat, sdf=False)
+        vertices = shape.get_vertices() * np.asarray(scale, dtype=np.float32)
+        return vertices, shape.get_triangles()
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        """刷新访问时间 (供 LRU 使用)，文件不存在 (未生成或刚被其他进程淘汰) 时返回 False"""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".ply"):
+                continue
+            p = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:   # 其他进程刚刚淘汰
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        return entries
+
+    def _evict(self, keep: str | None = None):
+        """按 LRU 删到 max_bytes 以内；跳过 keep 和最近 EVICT_GRACE_S 秒内访问过的文件 (其他进程可能正要加载)"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        recent = time.time() - EVICT_GRACE_S
+        for mtime, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            if p == keep or mtime > recent:
+                continue
+            try:
+                os.remove(p)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+    def report(self):
+        s = self.stats()
+        print(f"[INFO] 碰撞缓存: 命中 {s['hits']} / 未命中 {s['misses']}, "
+              f"{s['entries']} 个文件 {s['bytes'] / 1e6:.1f} MB ({self.cache_dir})")
@@ -0,0 +1,107 @@
+# compare_fidelity.py — 同一批 proposal 在两个精度档位下各跑一遍，报告加速比和判定不一致的 proposal
+from __future__ import annotations
+import argparse
+import json
+import os
+import time
+
+from fidelity import FIDELITY_PROFILES
+from scheduler import task_inputs_exist
+from task_registry import load_registry
+
+
+def select_tasks(task_file: str, task=None, task_id=None):
+    """返回 [(task_name, cfg, glb), ...]；未指定 task 时为注册表中全部文件齐全的任务"""
+    registry = load_registry(task_file)
+    names = registry.select(f"{task}.{task_id}" if task and task_id else task)
+    return [(name, *registry.get(name)) for name in names if task_inputs_exist(name, *registry.get(name))]
+
+
+def run_profile(glb_path, proposals, fidelity: str, workers=1, reuse_scene=False):
+    """在给定档位下仿真全部 proposal，返回 ({key: 是否成功}, 耗时 s)"""
+    from test_main import SimParams, WarmScene, run_single_proposal
+    from parallel_utils import run_proposals_parallel
+
+    sim_kwargs = dict(headless=True, sim=SimParams(fidelity=fidelity))
+    t0 = time.perf_counter()
+    if workers > 1 and len(proposals) > 1:
+        results = run_proposals_parallel(glb_path, proposals, workers, reuse_scene=reuse_scene, sim_kwargs=sim_kwargs)
+    else:
+        warm = WarmScene(glb_path, with_viewer=False, **sim_kwargs) if reuse_scene and proposals else None
+        results = [run_single_proposal(glb_path, (tcp, quat, key), grasp, with_viewer=False, warm=warm, **sim_kwargs)
+                   for tcp, quat, key, grasp in proposals]
+    return {key: grasp_data is not None for key, grasp_data in results}, time.perf_counter() - t0
+
+
+def compare_task(glb_path, proposals, base: str, candidate: str, workers=1, reuse_scene=False):
+    base_ok, base_s = run_profile(glb_path, proposals, base, workers, reuse_scene)
+    cand_ok, cand_s = run_profile(glb_path, proposals, candidate, workers, reuse_scene)
+    diffs = {key: (base_ok[key], cand_ok[key]) for key in base_ok if base_ok[key] != cand_ok[key]}
+    return {
+        "proposals": len(proposals),
+        "base_seconds": base_s,
+        "candidate_seconds": cand_s,
+        "speedup": base_s / cand_s if cand_s > 0 else None,
+        "base_ok": sum(base_ok.values()),
+        "candidate_ok": sum(cand_ok.values()),
+        "diffs": {key: {"base": b, "candidate": c} for key, (b, c) in diffs.items()},
+    }
+
+
+if __name__ == "__main__":
+    from test_main import TASK_FILE, load_proposals
+
+    profiles = tuple(FIDELITY_PROFILES)
+    parser = argparse.ArgumentParser(description="对比两个精度档位的耗时和判定结果")
+    parser.add_argument("--base", choices=profiles, default="accurate", help="作为参照的档位")
+    parser.add_argument("--candidate", choices=profiles, default="default", help="要评估的 (通常更快的) 档位")
+    parser.add_argument("--task", type=str, help="任务类别 (默认全部文件齐全的任务)")
+    parser.add_argument("--id", type=str, help="任务编号")
+    parser.add_argument("--proposal", type=str, nargs="+", help="只测这些 proposal")
+    parser.add_argument("--limit", type=int, default=0, help="每个任务最多测前 N 个 proposal (0 为全部)")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数")
+    parser.add_argument("--reuse-scene", action="store_true", help="每个任务只建一次场景")
+    parser.add_argument("--out", type=str, help="把结果写成 JSON")
+    args = parser.parse_args()
+    if args.base == args.candidate:
+        parser.error("--base 与 --candidate 相同")
+
+    if args.workers <= 1:
+        from bench_suite import warm_up
+        warm_up()   # 一次性的初始化开销不算在先跑的档位上
+
+    jobs = select_tasks(TASK_FILE, args.task, args.id)
+    report = {}
+    for idx, (name, cfg, glb) in enumerate(jobs, 1):
+        proposals = load_proposals(cfg, args.proposal)
+        if args.limit:
+            proposals = proposals[:args.limit]
+        print(f"\n[PROGRESS] [{idx}/{len(jobs)}] {name} ({len(proposals)} 个 proposal)")
+        report[name] = compare_task(glb, proposals, args.base, args.candidate, args.workers, args.reuse_scene)
+
+    print(f"\n[INFO] 📊 {args.base} (参照) vs {args.candidate}")
+    print(f"{'task':<16} {'props':>6} {'base(s)':>8} {'cand(s)':>8} {'speedup':>8} {'ok':>9} {'diff':>5}")
+    for name, r in report.items():
+        speedup = f"{r['speedup']:.2f}x" if r["speedup"] else "-"
+        ok = f"{r['base_ok']}→{r['candidate_ok']}"
+        print(f"{name:<16} {r['proposals']:>6} {r['base_seconds']:>8.2f} {r['candidate_seconds']:>8.2f} "
+              f"{speedup:>8} {ok:>9} {len(r['diffs']):>5}")
+    n = sum(r["proposals"] for r in report.values())
+    base_s = sum(r["base_seconds"] for r in report.values())
+    cand_s = sum(r["candidate_seconds"] for r in report.values())
+    n_diff = sum(len(r["diffs"]) for r in report.values())
+    if n:
+        print(f"[INFO] 共 {n} 个 proposal：{args.candidate} 比 {args.base} 快 {base_s / max(cand_s, 1e-9):.2f} 倍，"
+              f"判定不一致 {n_diff} 个 ({n_diff / n:.1%})")
+    for name, r in report.items():
+        for key, d in r["diffs"].items():
+            mark = lambda ok: "✅" if ok else "❌"
+            print(f"[WARN] {name} {key}: {args.base} {mark(d['base'])} / {args.candidate} {mark(d['candidate'])}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"base": args.base, "candidate": args.candidate,
+                       "profiles": {p: FIDELITY_PROFILES[p] for p in (args.base, args.candidate)},
+                       "tasks": report}, f, ensure_ascii=False, indent=1)
+        print(f"[INFO] 结果已写入 {args.out}")
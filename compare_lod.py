@@ -0,0 +1,136 @@
+# compare_lod.py — 同一批 proposal 在各碰撞 LOD 档位下各跑一遍，报告面数 / 顶点最大偏差、每步耗时和与 full 判定的一致率
+from __future__ import annotations
+import argparse
+import json
+import os
+import time
+
+from collision_lod import DEFAULT_LOD, LOD_LEVELS
+
+MIN_AGREEMENT = 0.95   # 判定一致率低于此值时在汇总里提示：该档位的结果不能代替参照档
+
+
+def mesh_info(glb_path, lod: str, collision_cache):
+    """该档位下物体碰撞网格的面数和顶点最大偏差 (full 为原始网格)"""
+    from collision_cache import read_ply_header
+    from test_main import SCALE_OBJ
+
+    header = read_ply_header(collision_cache.get(glb_path, scale=(SCALE_OBJ,) * 3, lod=lod))
+    comments = header["comments"]
+    return {"faces": header["faces"], "error": float(comments.get("error", 0.0)),
+            "budget_met": comments.get("budget_met", "True") == "True"}
+
+
+def run_level(glb_path, proposals, lod: str, collision_cache, workers=1, reuse_scene=False):
+    """在给定档位下仿真全部 proposal，返回 ({key: 是否成功}, 耗时 s, scene.step() 总耗时 s, 总步数)"""
+    from test_main import SimParams, WarmScene, run_single_proposal
+    from parallel_utils import run_proposals_parallel
+
+    sim_kwargs = dict(headless=True, collision_cache=collision_cache, sim=SimParams(collision_lod=lod))
+    stats = []
+    t0 = time.perf_counter()
+    if workers > 1 and len(proposals) > 1:
+        results = run_proposals_parallel(glb_path, proposals, workers, reuse_scene=reuse_scene, sim_kwargs=sim_kwargs,
+                                         episode_kwargs=dict(profile=True), stats=stats)
+    else:
+        warm = WarmScene(glb_path, with_viewer=False, **sim_kwargs) if reuse_scene and proposals else None
+        results = []
+        for tcp, quat, key, grasp in proposals:
+            stats.append({})
+            results.append(run_single_proposal(glb_path, (tcp, quat, key), grasp, with_viewer=False, warm=warm,
+                                               **sim_kwargs, profile=True, stats=stats[-1]))
+    seconds = time.perf_counter() - t0
+    step_s = sum(s["profile"]["timers"].get("physx_step", 0.0) for s in stats)
+    steps = sum(s["grasp_steps"] + s["motion_steps"] for s in stats)
+    return {key: grasp_data is not None for key, grasp_data in results}, seconds, step_s, steps
+
+
+def compare_task(glb_path, proposals, levels, collision_cache, workers=1, reuse_scene=False):
+    """依次跑各档位 (第一个为参照)，返回 {档位: {faces, error, seconds, step_ms, ok, diffs, agreement}}"""
+    report, base_ok = {}, None
+    for lod in levels:
+        info = mesh_info(glb_path, lod, collision_cache)   # 简化在这里完成，不计入仿真耗时
+        ok, seconds, step_s, steps = run_level(glb_path, proposals, lod, collision_cache, workers, reuse_scene)
+        if base_ok is None:
+            base_ok = ok
+        diffs = sorted(key for key in ok if ok[key] != base_ok[key])
+        report[lod] = dict(info, proposals=len(proposals), seconds=seconds, step_seconds=step_s, steps=steps,
+                           step_ms=step_s / steps * 1e3 if steps else None, ok=sum(ok.values()), diffs=diffs,
+                           agreement=1 - len(diffs) / len(ok) if ok else None)
+    return report
+
+
+if __name__ == "__main__":
+    from collision_cache import CollisionCache, DEFAULT_CACHE_DIR
+    from compare_fidelity import select_tasks
+    from test_main import TASK_FILE, load_proposals
+
+    parser = argparse.ArgumentParser(description="对比各碰撞 LOD 档位的每步耗时和判定结果 (以第一个档位为参照)")
+    parser.add_argument("--levels", nargs="+", choices=tuple(LOD_LEVELS), default=list(LOD_LEVELS),
+                        help="要对比的档位，第一个为参照 (默认全部，full 在前)")
+    parser.add_argument("--task", type=str, help="任务类别 (默认全部文件齐全的任务)")
+    parser.add_argument("--id", type=str, help="任务编号")
+    parser.add_argument("--proposal", type=str, nargs="+", help="只测这些 proposal")
+    parser.add_argument("--limit", type=int, default=0, help="每个任务最多测前 N 个 proposal (0 为全部)")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数")
+    parser.add_argument("--reuse-scene", action="store_true", help="每个任务只建一次场景")
+    parser.add_argument("--collision-cache", type=str, default=DEFAULT_CACHE_DIR, help="简化网格的缓存目录")
+    parser.add_argument("--out", type=str, help="把结果写成 JSON")
+    args = parser.parse_args()
+    levels = list(dict.fromkeys(args.levels))
+    if DEFAULT_LOD not in levels:
+        print(f"[WARN] 参照档位为 {levels[0]} (未包含 {DEFAULT_LOD})")
+
+    if args.workers <= 1:
+        from bench_suite import warm_up
+        warm_up()   # 一次性的初始化开销不算在先跑的档位上
+
+    cache = CollisionCache(args.collision_cache)
+    jobs = select_tasks(TASK_FILE, args.task, args.id)
+    report = {}
+    for idx, (name, cfg, glb) in enumerate(jobs, 1):
+        proposals = load_proposals(cfg, args.proposal)
+        if args.limit:
+            proposals = proposals[:args.limit]
+        print(f"\n[PROGRESS] [{idx}/{len(jobs)}] {name} ({len(proposals)} 个 proposal)")
+        report[name] = compare_task(glb, proposals, levels, cache, args.workers, args.reuse_scene)
+
+    print(f"\n[INFO] 📊 碰撞 LOD 对比 (参照 {levels[0]})")
+    print(f"{'task':<16} {'lod':<7} {'faces':>6} {'dev(mm)':>8} {'total(s)':>9} {'step(ms)':>9} {'speedup':>8} "
+          f"{'ok':>4} {'agree':>7}")
+    for name, r in report.items():
+        base_step = r[levels[0]]["step_ms"]
+        for lod, x in r.items():
+            err = f"{x['error'] * 1e3:.2f}" + ("" if x["budget_met"] else "*")
+            step = f"{x['step_ms']:.3f}" if x["step_ms"] else "-"
+            speedup = f"{base_step / x['step_ms']:.2f}x" if base_step and x["step_ms"] else "-"
+            agree = f"{x['agreement']:.1%}" if x["agreement"] is not None else "-"
+            print(f"{name:<16} {lod:<7} {x['faces']:>6} {err:>8} {x['seconds']:>9.2f} {step:>9} {speedup:>8} "
+                  f"{x['ok']:>4} {agree:>7}")
+    print("[INFO] dev 为原网格顶点到简化后表面的最大偏差 (* 表示容差内达不到面数预算)；step 为 scene.step() 的平均耗时")
+
+    n = sum(r[levels[0]]["proposals"] for r in report.values())
+    base_ok = sum(r[levels[0]]["ok"] for r in report.values())
+    for lod in levels[1:]:
+        n_diff = sum(len(r[lod]["diffs"]) for r in report.values())
+        n_ok = sum(r[lod]["ok"] for r in report.values())
+        step_s = sum(r[lod]["step_seconds"] for r in report.values())
+        base_s = sum(r[levels[0]]["step_seconds"] for r in report.values())
+        if n:
+            print(f"[INFO] {lod}: scene.step() 总耗时 {base_s:.2f} s → {step_s:.2f} s "
+                  f"({base_s / max(step_s, 1e-9):.2f} 倍)，成功 {base_ok}/{n} → {n_ok}/{n}，"
+                  f"判定不一致 {n_diff}/{n} ({n_diff / n:.1%})")
+            if 1 - n_diff / n < MIN_AGREEMENT:
+                print(f"[WARN] ⚠️ {lod} 改变了 {n_diff}/{n} 个判定 (一致率低于 {MIN_AGREEMENT:.0%})，"
+                      f"不能代替 {levels[0]} 的结果，只适合粗筛")
+    for name, r in report.items():
+        for lod in levels[1:]:
+            for key in r[lod]["diffs"]:
+                print(f"[WARN] {name} {key}: {lod} 的判定与 {levels[0]} 不同")
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"levels": {lod: LOD_LEVELS[lod] for lod in levels}, "tasks": report}, f,
+                      ensure_ascii=False, indent=1)
+        print(f"[INFO] 结果已写入 {args.out}")
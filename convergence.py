@@ -0,0 +1,63 @@
+# convergence.py — 抓取阶段的收敛检测：手指和物体都已停住却一直没抓稳时，提前判定失败
+
+from __future__ import annotations
+import numpy as np
+
+CONVERGE_WINDOW = 200   # 观察窗口 (步)
+QPOS_EPS = 1e-3         # 窗口内每个手指关节位置的变化范围上限 (m)
+OBJ_EPS = 2e-3          # 窗口内物体位置的变化范围上限 (m)
+CHECK_EVERY = 10        # 每隔多少步检查一次 (窗口统计有开销)
+
+
+class ConvergenceMonitor:
+    """
+    旧的计数判据 (连续 10 帧抓住 / 连续 30 帧空夹) 保持不变，这里只处理两者都等不到、
+    要跑满 max_steps 的情况：最近 window 步内两个手指的 qpos 和物体位置的变化范围都低于阈值，
+    且这段时间并非一直处于抓住状态 → 手指已经合不动、接触只是在抖动，判定为收敛 (失败)。
+
+    close 时驱动目标恒为 0，手指贴着物体来回弹，关节速度和驱动误差在这种状态下并不收敛，
+    所以看窗口内的位置范围而不是瞬时速度。
+    """
+
+    def __init__(self, window: int = CONVERGE_WINDOW, qpos_eps: float = QPOS_EPS, obj_eps: float = OBJ_EPS):
+        self.window = window
+        self.qpos_eps = qpos_eps
+        self.obj_eps = obj_eps
+        self.history = np.zeros((window, 5))          # [finger1, finger2, obj_x, obj_y, obj_z]
+        self.grasping = np.zeros(window, dtype=bool)
+        self.count = 0
+
+    def update(self, qpos, obj_p, grasping: bool) -> bool:
+        """记录一步状态，已收敛时返回 True"""
+        i = self.count % self.window
+        self.history[i, :2] = qpos[:2]
+        self.history[i, 2:] = obj_p
+        self.grasping[i] = grasping
+        self.count += 1
+
+        if self.count < self.window or self.count % CHECK_EVERY:
+            return False
+        if self.grasping.all():
+            return False
+        span = self.history.max(axis=0) - self.history.min(axis=0)
+        return bool(span[:2].max() < self.qpos_eps and span[2:].max() < self.obj_eps)
+
+
+def report_early_exit(stats, audit=False):
+    """
+    stats: 每个 proposal 的统计 [{key, ok, grasp_steps, converged_step, steps_saved}, ...]
+    audit=True 时 proposal 按旧判据跑完，steps_saved 是精确值，并检查收敛判定与最终结果是否一致
+    """
+    fired = [s for s in stats if s.get("converged_step") is not None]
+    saved = sum(s["steps_saved"] for s in fired)
+    total = sum(s["grasp_steps"] for s in stats)
+    # 审计模式下是相对旧判据的精确值；否则按跑满 max_steps 计，是上限
+    verb = "可节省" if audit else "最多节省"
+    print(f"[INFO] ⏩ 收敛提前结束 {len(fired)}/{len(stats)} 个 proposal，抓取阶段{verb} {saved} 步 "
+          f"(实际仿真 {total} 步)")
+    if audit:
+        disagree = [s["key"] for s in fired if s["ok"]]
+        if disagree:
+            print(f"[WARN] 收敛判定与旧判据不一致: {disagree}")
+        else:
+            print(f"[INFO] 收敛判定与旧判据全部一致 ({len(fired)} 个)")
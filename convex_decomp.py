@@ -0,0 +1,149 @@
+# convex_decomp.py — 凹物体的多凸包分解：有 coacd 时用 coacd，否则按网格切块取凸包，保留碗口 / 把手等凹特征
+
+from __future__ import annotations
+
+import numpy as np
+
+DEFAULT_DECOMP = "none"
+# none 即原来的三角网格碰撞体；auto 有 coacd 时用 coacd，否则用 grid
+DECOMP_METHODS = ("none", "auto", "coacd", "grid")
+
+# coacd：凹度阈值越小分得越细；max_hulls=-1 不限个数
+COACD_PARAMS = {"threshold": 0.05, "max_hulls": -1, "seed": 0}
+# grid：最长边切成 resolution 格，每格里表面的每个连通片各取一个凸包；
+# 表面片沿法向往物体内侧加厚 thickness (m)，避免平坦的片退化成无体积的凸包
+GRID_PARAMS = {"resolution": 8, "thickness": 0.003}
+
+
+def coacd_available() -> bool:
+    try:
+        import coacd  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_method(method: str) -> str:
+    """auto → 实际使用的方法 (coacd / grid)；其他原样返回"""
+    if method not in DECOMP_METHODS:
+        raise ValueError(f"未知的凸分解方法 {method}，可选 {DECOMP_METHODS}")
+    if method == "auto":
+        return "coacd" if coacd_available() else "grid"
+    return method
+
+
+def method_params(method: str) -> dict:
+    """影响分解结果的参数 (缓存键的一部分)"""
+    method = resolve_method(method)
+    if method == "coacd":
+        return {"method": "coacd", **COACD_PARAMS}
+    if method == "grid":
+        return {"method": "grid", **GRID_PARAMS}
+    return {"method": "none"}
+
+
+# ------------------- coacd -------------------
+def coacd_decompose(vertices, triangles, threshold=0.05, max_hulls=-1, seed=0):
+    """返回各凸块的顶点 [(k,3), ...]"""
+    import coacd
+
+    coacd.set_log_level("error")
+    mesh = coacd.Mesh(np.asarray(vertices, dtype=np.float64), np.asarray(triangles, dtype=np.int64))
+    parts = coacd.run_coacd(mesh, threshold=threshold, max_convex_hull=max_hulls, seed=seed)
+    return [np.asarray(v, dtype=np.float64) for v, _ in parts]
+
+
+# ------------------- 网格切块 -------------------
+def weld(vertices, triangles, tol: float = 1e-7):
+    """合并位置相同的顶点 (GLB 在 UV 接缝处会拆开顶点)，返回 (vertices, triangles)"""
+    q = np.round(np.asarray(vertices, dtype=np.float64) / tol).astype(np.int64)
+    _, first, inverse = np.unique(q, axis=0, return_index=True, return_inverse=True)
+    return np.asarray(vertices, dtype=np.float64)[first], inverse.ravel()[np.asarray(triangles)]
+
+
+def _vertex_normals(vertices, triangles):
+    """按面积加权的顶点法向；网格整体朝内 (有向体积为负) 时翻转，使法向朝外"""
+    v0, v1, v2 = (vertices[triangles[:, k]] for k in range(3))
+    face_n = np.cross(v1 - v0, v2 - v0)
+    if np.einsum("ij,ij->", v0, np.cross(v1, v2)) < 0:
+        face_n = -face_n
+    n = np.zeros_like(vertices)
+    for k in range(3):
+        np.add.at(n, triangles[:, k], face_n)
+    norm = np.linalg.norm(n, axis=1, keepdims=True)
+    return np.divide(n, norm, out=np.zeros_like(n), where=norm > 0)
+
+
+def _components(triangles, n_vertices):
+    """三角形按共享顶点分连通片，返回每个三角形的片编号 (0..k-1)"""
+    label = np.arange(n_vertices)
+    while True:
+        tri_min = label[triangles].min(axis=1)
+        new = label.copy()
+        for k in range(3):
+            np.minimum.at(new, triangles[:, k], tri_min)
+        new = new[new]   # 指针跳跃，加快收敛
+        if np.array_equal(new, label):
+            break
+        label = new
+    _, comp = np.unique(label[triangles[:, 0]], return_inverse=True)
+    return comp.ravel()
+
+
+def grid_decompose(vertices, triangles, resolution=8, thickness=0.003):
+    """
+    最长边切成 resolution 格，三角形按重心分格；每格内按共享顶点分连通片 (两层壁 / 把手两侧各自成块，
+    不会被一个凸包填平)，每片取其顶点及沿法向向内平移 thickness 的副本作为一个凸块。
+    返回各凸块的顶点 [(k,3), ...]
+    """
+    vertices, triangles = weld(vertices, triangles)
+    normals = _vertex_normals(vertices, triangles)
+    lo = vertices.min(axis=0)
+    cell = float(np.ptp(vertices, axis=0).max()) / resolution
+    centroids = vertices[triangles].mean(axis=1)
+    _, cell_of = np.unique(np.floor((centroids - lo) / cell).astype(np.int64), axis=0, return_inverse=True)
+    cell_of = cell_of.ravel()
+
+    # 格子之间不共享顶点：(格子, 顶点) 对重新编号后再分连通片
+    pairs = np.stack([np.repeat(cell_of, 3), triangles.ravel()], axis=1)
+    _, local = np.unique(pairs, axis=0, return_inverse=True)
+    comp = _components(local.reshape(-1, 3), int(local.max()) + 1)
+
+    parts = []
+    order = np.argsort(comp, kind="stable")
+    bounds = np.searchsorted(comp[order], np.arange(comp.max() + 2))
+    for i in range(len(bounds) - 1):
+        idx = np.unique(triangles[order[bounds[i]:bounds[i + 1]]])
+        pts = vertices[idx]
+        parts.append(np.concatenate([pts, pts - normals[idx] * thickness]))
+    return parts
+
+
+def decompose(vertices, triangles, method: str = "auto"):
+    """返回 (凸块顶点列表, 实际使用的方法)"""
+    method = resolve_method(method)
+    if method == "coacd":
+        return coacd_decompose(vertices, triangles, **COACD_PARAMS), method
+    if method == "grid":
+        return grid_decompose(vertices, triangles, **GRID_PARAMS), method
+    raise ValueError("method=none 不做分解")
+
+
+def pack_parts(parts):
+    """
+    把各凸块拼成一个网格：每块的顶点用扇形三角形连成一个连通片，块与块之间不相连。
+    PhysxCollisionShapeConvexMesh.load_multiple 按连通片分别取凸包 (三角形只用来表示连通关系)。
+    不足 4 个点的块构不成凸包，跳过。返回 (vertices, triangles, 保留的块数)；一块都不剩时抛 ValueError
+    """
+    vertices, triangles, offset = [], [], 0
+    for pts in parts:
+        k = len(pts)
+        if k < 4:
+            continue
+        i = np.arange(1, k - 1)
+        triangles.append(np.stack([np.full(k - 2, offset), offset + i, offset + i + 1], axis=1))
+        vertices.append(pts)
+        offset += k
+    if not vertices:
+        raise ValueError(f"{len(parts)} 个凸块都不足 4 个点，没有可用的凸包")
+    return np.concatenate(vertices), np.concatenate(triangles), len(vertices)
@@ -0,0 +1,75 @@
+# fidelity.py — 仿真精度档位 (fast / default / accurate)：时间步长、求解器迭代次数、接触与休眠参数
+
+from __future__ import annotations
+
+REFERENCE_TIMESTEP = 1 / 100.0   # 判定逻辑里的步数 (连续帧数、动作检测步数、最大步数) 按这个步长标定
+DEFAULT_FIDELITY = "default"
+
+# default 即 SAPIEN 的默认值，与引入档位之前的行为完全一致
+FIDELITY_PROFILES = {
+    # 步长加倍时手指驱动需要更多位置迭代才能合拢 (4 次时几乎全部夹不住)
+    "fast": {
+        "timestep": 1 / 50.0,
+        "solver_position_iterations": 20,
+        "solver_velocity_iterations": 1,
+        "contact_offset": 0.01,
+        "rest_offset": 0.0,
+        "sleep_threshold": 0.005,
+    },
+    "default": {
+        "timestep": 1 / 100.0,
+        "solver_position_iterations": 10,
+        "solver_velocity_iterations": 1,
+        "contact_offset": 0.01,
+        "rest_offset": 0.0,
+        "sleep_threshold": 0.005,
+    },
+    "accurate": {
+        "timestep": 1 / 200.0,
+        "solver_position_iterations": 20,
+        "solver_velocity_iterations": 4,
+        "contact_offset": 0.005,
+        "rest_offset": 0.0,
+        "sleep_threshold": 0.001,
+    },
+}
+
+
+def fidelity_params(name: str = DEFAULT_FIDELITY) -> dict:
+    try:
+        return FIDELITY_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"未知的精度档位 {name}，可选 {tuple(FIDELITY_PROFILES)}") from None
+
+
+def apply_fidelity(name: str = DEFAULT_FIDELITY) -> dict:
+    """
+    设置 PhysX 的全局刚体 / 碰撞形状默认参数 (对之后新建的刚体和形状生效)，返回档位参数。
+    时间步长由调用方传给 create_world；关节体的求解器参数见 configure_articulation。
+    """
+    import sapien
+
+    params = fidelity_params(name)
+    body = sapien.physx.PhysxBodyConfig()
+    body.solver_position_iterations = params["solver_position_iterations"]
+    body.solver_velocity_iterations = params["solver_velocity_iterations"]
+    body.sleep_threshold = params["sleep_threshold"]
+    sapien.physx.set_body_config(body)
+
+    shape = sapien.physx.PhysxShapeConfig()
+    shape.contact_offset = params["contact_offset"]
+    shape.rest_offset = params["rest_offset"]
+    sapien.physx.set_shape_config(shape)
+    return params
+
+
+def configure_articulation(robot, params: dict):
+    """关节体 (Panda 手爪) 的求解器迭代次数和休眠阈值"""
+    robot.set_solver_position_iterations(params["solver_position_iterations"])
+    robot.set_solver_velocity_iterations(params["solver_velocity_iterations"])
+    robot.set_sleep_threshold(params["sleep_threshold"])
+
+
+def scaled_steps(steps: int, timestep: float) -> int:
+    """按 REFERENCE_TIMESTEP 标定的步数换算到当前步长 (保持相同的仿真时长)"""
+    return max(1, round(steps * REFERENCE_TIMESTEP / timestep))
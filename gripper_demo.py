@@ -1,24 +1,44 @@
+import math
 import sapien.core as sapien
 from sapien.core import Pose
 import numpy as np
 from collections import deque
 
 class Gripper:
-    def __init__(self, robot, scene):
+    def __init__(self, robot, scene, finger_links=None):
         self.robot = robot
         self.scene = scene
         self.joints = robot.get_active_joints()
         if len(self.joints) < 1:
             raise RuntimeError("Gripper has no active joints!")
 
-        # 找手指 link
-        links = robot.get_links()
-        self.finger1_link = links[1]  # 左指
-        self.finger2_link = links[2]  # 右指
+        # 找手指 link (finger_links 为已查好的 (左指, 右指)，见 robot_asset.RobotAsset)
+        if finger_links is None:
+            links = robot.get_links()
+            finger_links = (links[1], links[2])
+        self.finger1_link, self.finger2_link = finger_links  # 左指, 右指
 
         # 速度模式（刚度/阻尼参数）
         for j in self.joints:
             j.set_drive_property(stiffness=500, damping=500, force_limit=5)
+
+        self.closing_speed = -0.01
+        self.opening_speed = 0.01
+        self.hold_speed = 0.0
+
+        # === 最近20帧的力缓存 ===
+        self.l_force_history = deque(maxlen=20)
+        self.r_force_history = deque(maxlen=20)
+
+        # === 接触评估缓存 (update_contacts 写入) ===
+        self._contacts = None
+        self._obj_body = (None, None)   # (物体, 其刚体组件)，按对象身份匹配接触
+
+        self.reset()
+
+    def reset(self):
+        """恢复到初始张开状态 (关节位置/速度、驱动目标、力缓存)，用于复用同一手爪"""
+        for j in self.joints:
             j.set_drive_target(0.1)   # 初始张开
             j.set_drive_velocity_target(0.0)
 
@@ -26,14 +46,88 @@ class Gripper:
         qpos = self.robot.get_qpos()
         qpos[:] = 0.1
         self.robot.set_qpos(qpos)
+        self.robot.set_qvel(np.zeros_like(qpos))
 
-        self.closing_speed = -0.01
-        self.opening_speed = 0.01
-        self.hold_speed = 0.0
+        self.l_force_history.clear()
+        self.r_force_history.clear()
+        self.invalidate_contacts()
 
-        # === 最近20帧的力缓存 ===
-        self.l_force_history = deque(maxlen=20)
-        self.r_force_history = deque(maxlen=20)
+    # ------------------- 接触评估 -------------------
+    def invalidate_contacts(self):
+        """丢弃 update_contacts 缓存的接触评估 (位姿被直接改写后，缓存不再对应当前状态)"""
+        self._contacts = None
+
+    def _body_of(self, obj):
+        """物体对应的刚体组件 (缓存)，接触里的 bodies 就是这些组件对象"""
+        if self._obj_body[0] is not obj:
+            body = obj.find_component_by_type(sapien.physx.PhysxRigidBaseComponent)
+            self._obj_body = (obj, body)
+        return self._obj_body[1]
+
+    def _evaluate_contacts(self, obj, contacts=None):
+        """
+        单次遍历接触列表 (默认 scene.get_contacts())，按组件对象身份 (而非名字) 匹配，同时得到：
+        左/右指与物体是否接触、两指是否互碰、每个手指与物体的最大接触力 (N)
+        """
+        obj_body = self._body_of(obj)
+        f1, f2 = self.finger1_link, self.finger2_link
+        dt = max(self.scene.get_timestep(), 1e-6)
+        l_contact = r_contact = finger_contact = False
+        l_force = r_force = 0.0
+
+        if contacts is None:
+            contacts = self.scene.get_contacts()
+        for c in contacts:
+            b0, b1 = c.bodies
+            if b0 is obj_body:
+                other = b1
+            elif b1 is obj_body:
+                other = b0
+            else:
+                # 只关心 finger1 和 finger2 直接接触
+                if not ((b0 is f1 and b1 is f2) or (b0 is f2 and b1 is f1)):
+                    continue
+                if not finger_contact:
+                    finger_contact = any(p.separation <= 0 for p in c.points)
+                continue
+
+            if other is not f1 and other is not f2:
+                continue
+            touching, force = False, 0.0
+            for p in c.points:
+                if p.separation <= 0:
+                    touching = True
+                    force = max(force, math.hypot(*p.impulse) / dt)   # 用冲量模长近似力
+            if other is f1:
+                l_contact = l_contact or touching
+                l_force = max(l_force, force)
+            else:
+                r_contact = r_contact or touching
+                r_force = max(r_force, force)
+
+        return {
+            "obj": obj,
+            "l_contact": l_contact,
+            "r_contact": r_contact,
+            "finger_contact": finger_contact,
+            "l_force": l_force,
+            "r_force": r_force,
+        }
+
+    def update_contacts(self, obj, contacts=None):
+        """
+        每次 scene.step() 之后调用一次：评估本步接触并缓存，
+        之后的 control("close", obj) / is_grasping / get_finger_forces 直接读缓存，不再重复遍历。
+        contacts: 已按本手爪筛好的接触 (多组共用一个场景时)，None → scene.get_contacts()
+        """
+        self._contacts = self._evaluate_contacts(obj, contacts)
+        return self._contacts
+
+    def _contact_state(self, obj):
+        if self._contacts is not None and self._contacts["obj"] is obj:
+            return self._contacts
+        # 调用方没有使用 update_contacts：现算一次，不缓存 (避免跨步读到旧结果)
+        return self._evaluate_contacts(obj)
 
     def is_grasping(self, obj, finger_thresh=1e-3):
         """
@@ -43,26 +137,10 @@ class Gripper:
             False -> 左右两个手指互相接触 (空夹)
             None  -> 其他情况 (不判定)
         """
-        contacts = self.scene.get_contacts()
-        l_contact, r_contact = False, False
-        finger_contact = False
-
-        for c in contacts:
-            bodies = [b.get_name() for b in c.bodies]
-            for p in c.points:
-                if p.separation <= 0:
-                    if self.finger1_link.get_name() in bodies and obj.get_name() in bodies:
-                        l_contact = True
-                    if self.finger2_link.get_name() in bodies and obj.get_name() in bodies:
-                        r_contact = True
-                    # 检查 finger1 和 finger2 直接接触
-                    if (self.finger1_link.get_name() in bodies 
-                        and self.finger2_link.get_name() in bodies):
-                        finger_contact = True
-
-        if l_contact and r_contact:
+        state = self._contact_state(obj)
+        if state["l_contact"] and state["r_contact"]:
             return True   # 抓住物体
-        if finger_contact:
+        if state["finger_contact"]:
             return False  # 夹爪互相碰到，没夹住
         return None        # 其他情况（不判定）
 
@@ -96,26 +174,11 @@ class Gripper:
         返回 (finger1_force, finger2_force)，单位 N
         使用最近20帧的最大值，避免瞬时为0
         """
-        dt = self.scene.get_timestep()
-        contacts = self.scene.get_contacts()
-        l_force, r_force = 0.0, 0.0
-
-        for c in contacts:
-            bodies = [b.get_name() for b in c.bodies]
-            for p in c.points:
-                if p.separation <= 0:
-                    # 用冲量模长近似力
-                    force_mag = np.linalg.norm(p.impulse) / max(dt, 1e-6)
-
-                    if self.finger1_link.get_name() in bodies and obj.get_name() in bodies:
-                        l_force = max(l_force, force_mag)
-
-                    if self.finger2_link.get_name() in bodies and obj.get_name() in bodies:
-                        r_force = max(r_force, force_mag)
+        state = self._contact_state(obj)
 
         # 推入缓存
-        self.l_force_history.append(l_force)
-        self.r_force_history.append(r_force)
+        self.l_force_history.append(state["l_force"])
+        self.r_force_history.append(state["r_force"])
 
         # 返回最近20帧的最大值
         l_max = max(self.l_force_history) if self.l_force_history else 0.0
@@ -0,0 +1,23 @@
+# hash_utils.py
+
+from __future__ import annotations
+import hashlib
+import os
+
+# 进程内缓存：(路径, mtime, size) → 摘要，避免同一文件反复读盘计算
+_digest_cache = {}
+
+
+def file_sha1(path: str, chunk_size: int = 1 << 20) -> str:
+    """按文件内容计算 sha1 (十六进制)，文件未变化时直接返回缓存值"""
+    st = os.stat(path)
+    cache_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    digest = _digest_cache.get(cache_key)
+    if digest is None:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _digest_cache[cache_key] = digest
+    return digest
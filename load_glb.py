@@ -3,6 +3,9 @@
 import numpy as np
 import sapien.core as sapien
 
+from collision_lod import DEFAULT_LOD
+from convex_decomp import DEFAULT_DECOMP
+
 
 def load_my_object(
     scene: "sapien.Scene",
@@ -16,7 +19,11 @@ def load_my_object(
     build_dynamic: bool = True,   # True → 动态刚体；False → 静态刚体
     use_convex: bool = False,      # 动态刚体推荐用凸包
     friction: float = 1,         # 摩擦系数 (静/动一致)，np.inf → 1e6
-    restitution: float = 0       # 弹性系数（反弹系数）
+    restitution: float = 0,      # 弹性系数（反弹系数）
+    collision_cache=None,        # CollisionCache，None → 每次从 GLB 加载碰撞体
+    add_visual: bool = True,     # False → 只建碰撞体 (无渲染系统的场景)
+    collision_lod: str = DEFAULT_LOD,  # 非凸碰撞体的简化档位 (见 collision_lod.py)，可视网格不受影响
+    decomposition: str = DEFAULT_DECOMP   # 动态刚体的多凸包分解方法 (见 convex_decomp.py)，none → 不分解
 ):
     """
     从 glb/gltf 文件加载模型 (SAPIEN 3.x)
@@ -45,6 +52,17 @@ def load_my_object(
         摩擦系数（np.inf 会映射为 1e6）
     restitution : float
         弹性系数（0 = 完全无反弹）
+    collision_cache : CollisionCache, optional
+        碰撞几何磁盘缓存；命中时直接从缓存文件构建碰撞体
+    add_visual : bool
+        是否添加可视外观；headless 场景没有渲染系统，必须为 False
+    collision_lod : str
+        非凸碰撞体的 LOD 档位；非 full 时从碰撞缓存读取简化后的网格
+        (未传入 collision_cache 时使用默认目录的缓存)
+    decomposition : str
+        动态刚体用多个凸包作碰撞体 (auto / coacd / grid)，分解结果按文件哈希缓存；
+        优先于 use_convex 和 collision_lod，质量属性与三角网格碰撞体保持一致；
+        分解不出可用凸包时抛 ValueError (批量运行时由 test_main.prepare_collision_meshes 事先改用三角网格)
 
     返回
     ----
@@ -57,7 +75,8 @@ def load_my_object(
     builder = scene.create_actor_builder()
 
     # ===== 可视外观 =====
-    builder.add_visual_from_file(model_path, scale=scale_np)
+    if add_visual:
+        builder.add_visual_from_file(model_path, scale=scale_np)
 
     # ===== 碰撞体 =====
     if add_collision:
@@ -68,18 +87,36 @@ def load_my_object(
             restitution=float(restitution),
         )
 
-        if build_dynamic:
-            if use_convex:
-                builder.add_convex_collision_from_file(
-                    model_path, scale=scale_np, density=density, material=phys_mat
-                )
-            else:
-                builder.add_nonconvex_collision_from_file(
-                    model_path, scale=scale_np, density=density, material=phys_mat
-                )
+        parts = build_dynamic and decomposition != DEFAULT_DECOMP
+        convex = build_dynamic and use_convex and not parts
+        collision_path, collision_scale = model_path, scale_np
+        if collision_cache is None and (parts or (not convex and collision_lod != DEFAULT_LOD)):
+            from collision_cache import get_default_cache
+            collision_cache = get_default_cache()
+        if parts:
+            collision_path = collision_cache.get_parts(model_path, scale=scale_np, method=decomposition)
+            collision_scale = np.ones(3, dtype=np.float32)
+        elif collision_cache is not None:
+            # 缓存文件已包含缩放
+            collision_path = collision_cache.get(model_path, scale=scale_np, convex=convex, lod=collision_lod)
+            collision_scale = np.ones(3, dtype=np.float32)
+
+        if parts:
+            from collision_cache import parts_mass
+            builder.add_multiple_convex_collisions_from_file(
+                collision_path, scale=collision_scale, density=density, material=phys_mat
+            )
+            # 凸块有重叠 / 加厚，质量属性沿用三角网格碰撞体的
+            mass = parts_mass(collision_path, density)
+            if mass is not None:
+                builder.set_mass_and_inertia(*mass)
+        elif convex:
+            builder.add_convex_collision_from_file(
+                collision_path, scale=collision_scale, density=density, material=phys_mat
+            )
         else:
             builder.add_nonconvex_collision_from_file(
-                model_path, scale=scale_np, density=density, material=phys_mat
+                collision_path, scale=collision_scale, density=density, material=phys_mat
             )
 
     # ===== 构建 Actor =====
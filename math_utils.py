@@ -4,7 +4,8 @@ from __future__ import annotations
 import math
 import numpy as np
 import sapien.core as sapien
-import transforms3d.quaternions as tq
+
+import pose_math as pm
 
 def rpy_to_R(r, p, y):
     """roll/pitch/yaw (rad) -> Rz(yaw) @ Ry(pitch) @ Rx(roll)"""
@@ -18,39 +19,12 @@ def rpy_to_R(r, p, y):
 
 def mat_to_pose(M: np.ndarray) -> sapien.Pose:
     R, p = M[:3,:3], M[:3,3]
-    tr = float(np.trace(R))
-    if tr > 0:
-        S = math.sqrt(tr + 1.0) * 2
-        w = 0.25 * S; x = (R[2,1]-R[1,2]) / S; y = (R[0,2]-R[2,0]) / S; z = (R[1,0]-R[0,1]) / S
-    else:
-        if R[0,0] > R[1,1] and R[0,0] > R[2,2]:
-            S = math.sqrt(1.0 + R[0,0] - R[1,1] - R[2,2]) * 2
-            w = (R[2,1]-R[1,2])/S; x = 0.25*S; y = (R[0,1]+R[1,0])/S; z = (R[0,2]+R[2,0])/S
-        elif R[1,1] > R[2,2]:
-            S = math.sqrt(1.0 + R[1,1] - R[0,0] - R[2,2]) * 2
-            w = (R[0,2]-R[2,0])/S; x = (R[0,1]+R[1,0])/S; y = 0.25*S; z = (R[1,2]+R[2,1])/S
-        else:
-            S = math.sqrt(1.0 + R[2,2] - R[0,0] - R[1,1]) * 2
-            w = (R[1,0]-R[0,1])/S; x = (R[0,2]+R[2,0])/S; y = (R[1,2]+R[2,1])/S; z = 0.25*S
-    return sapien.Pose(p, np.array([w, x, y, z], dtype=np.float32))
+    return sapien.Pose(p, pm.mat_to_quat(np.asarray(R, dtype=np.float64)).astype(np.float32))
 
 def world_to_object(obj_pose: sapien.Pose, point_world: np.ndarray, align_axis=True):
     """Convert a world-space point to object(local)-space given the object's pose.
        如果 align_axis=True，则强制局部坐标系和世界坐标方向一致，避免符号翻转。
+       (批量版本见 pose_math.world_to_object)
     """
     # SAPIEN uses xyzw; convert to wxyz
-    q_wxyz = [obj_pose.q[3], obj_pose.q[0], obj_pose.q[1], obj_pose.q[2]]
-    R = tq.quat2mat(q_wxyz)
-    t = obj_pose.p
-
-    if align_axis:
-        # 保证物体系的 z 轴和世界 z 同向
-        if R[2, 2] < 0:
-            R[:, 2] *= -1
-            R[:, 0] *= -1  # 保持右手系
-        # 保证物体系的 x 轴和世界 x 同向
-        if R[0, 0] < 0:
-            R[:, 0] *= -1
-            R[:, 1] *= -1  # 保持右手系
-
-    return R.T @ (point_world - t)
+    return pm.world_to_object(obj_pose.p, pm.xyzw_to_wxyz(obj_pose.q), point_world, align_axis)
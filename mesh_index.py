@@ -0,0 +1,144 @@
+# mesh_index.py — 任务目录下所有 GLB 的网格元数据索引 (只在文件变化时重新解析)
+
+from __future__ import annotations
+import argparse
+import glob
+import os
+
+import yaml
+
+from hash_utils import file_sha1
+
+TASK_FILE = "grasp/task/task.yml"
+INDEX_NAME = "mesh_index.yml"
+DEFAULT_DENSITY = 100.0   # 与 load_my_object 的默认密度一致
+
+
+def default_index_path(task_file: str = TASK_FILE) -> str:
+    """索引文件与 task.yml 放在同一目录"""
+    return os.path.join(os.path.dirname(task_file), INDEX_NAME)
+
+
+def compute_mesh_meta(glb_path: str, density: float = DEFAULT_DENSITY) -> dict:
+    """解析一次 GLB，返回包围盒、尺寸、面/顶点数、体积、估计质量"""
+    import trimesh
+
+    mesh = trimesh.load(glb_path, force="mesh")
+    bounds = mesh.bounds.astype(float)
+    volume = abs(float(mesh.volume))
+    return {
+        "faces": int(len(mesh.faces)),
+        "vertices": int(len(mesh.vertices)),
+        "bounds": bounds.tolist(),
+        "extents": (bounds[1] - bounds[0]).tolist(),
+        "volume": volume,
+        "watertight": bool(mesh.is_watertight),   # 非水密网格的体积/质量只是估计
+        "mass": volume * density,
+    }
+
+
+class MeshIndex:
+    """
+    GLB 网格元数据索引，持久化为 task.yml 旁边的 mesh_index.yml。
+    条目以模型路径为键；mtime/size 不变时直接复用，变化时再比较内容哈希，
+    只有哈希也变了才重新解析网格。
+    """
+
+    def __init__(self, index_path: str | None = None, density: float = DEFAULT_DENSITY):
+        self.index_path = index_path or default_index_path()
+        self.density = float(density)
+        self.entries = {}
+        self.dirty = False
+        if os.path.isfile(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+            if float(data.get("density", self.density)) == self.density:
+                self.entries = data.get("meshes", {}) or {}
+
+    def get(self, glb_path: str):
+        """返回 glb_path 的元数据 (必要时刷新)；文件不存在返回 None"""
+        if not os.path.isfile(glb_path):
+            return None
+        st = os.stat(glb_path)
+        entry = self.entries.get(glb_path)
+        if entry and entry.get("mtime") == st.st_mtime_ns and entry.get("size") == st.st_size:
+            return entry
+
+        digest = file_sha1(glb_path)
+        if entry is None or entry.get("sha1") != digest:
+            try:
+                entry = compute_mesh_meta(glb_path, self.density)
+            except Exception as e:   # 损坏的 GLB 也记下来，避免每次重试
+                print(f"[WARN] 解析 {glb_path} 失败: {e}")
+                entry = {"error": str(e)}
+        entry.update(sha1=digest, mtime=st.st_mtime_ns, size=st.st_size)
+        self.entries[glb_path] = entry
+        self.dirty = True
+        return entry
+
+    def face_count(self, glb_path: str):
+        entry = self.get(glb_path)
+        if entry is None or "error" in entry:
+            return None
+        return entry["faces"]
+
+    def refresh(self, glb_paths):
+        """刷新一组文件，并删除已不存在的条目"""
+        glb_paths = list(glb_paths)
+        for p in glb_paths:
+            self.get(p)
+        for p in list(self.entries):
+            if not os.path.isfile(p):
+                del self.entries[p]
+                self.dirty = True
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return
+        data = {"density": self.density, "meshes": dict(sorted(self.entries.items()))}
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True, default_flow_style=None)
+        os.replace(tmp, self.index_path)
+        self.dirty = False
+
+
+def task_model_paths(task_file: str = TASK_FILE):
+    """注册表中全部任务的模型 + 任务目录下所有 .glb (去重，保持顺序)"""
+    from task_registry import load_registry
+
+    registry = load_registry(task_file)
+    paths = [registry.get(name)[1] for name in registry.names()]
+    task_dir = os.path.dirname(task_file)
+    paths.extend(sorted(glob.glob(os.path.join(task_dir, "**", "*.glb"), recursive=True)))
+    return list(dict.fromkeys(paths))
+
+
+def load_mesh_index(task_file: str = TASK_FILE) -> MeshIndex:
+    """加载索引并按当前任务目录刷新、保存"""
+    index = MeshIndex(default_index_path(task_file))
+    index.refresh(task_model_paths(task_file))
+    index.save()
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="构建/刷新 GLB 网格元数据索引")
+    parser.add_argument("--task-file", type=str, default=TASK_FILE, help="task.yml 路径")
+    parser.add_argument("--rebuild", action="store_true", help="忽略已有索引，全部重新解析")
+    args = parser.parse_args()
+
+    index_path = default_index_path(args.task_file)
+    if args.rebuild and os.path.isfile(index_path):
+        os.remove(index_path)
+    index = load_mesh_index(args.task_file)
+
+    print(f"{'model':<50} {'faces':>8} {'verts':>8} {'mass(kg)':>9}  extents")
+    for path, e in index.entries.items():
+        if "error" in e:
+            print(f"{path:<50} [损坏] {e['error']}")
+            continue
+        ext = ", ".join(f"{x:.3f}" for x in e["extents"])
+        print(f"{path:<50} {e['faces']:>8} {e['vertices']:>8} {e['mass']:>9.3f}  [{ext}]")
+    print(f"[INFO] 索引已保存到 {index_path}")
@@ -5,16 +5,10 @@ import math
 import numpy as np
 import sapien.core as sapien
 
+import pose_math as pm
+
 def quat_wxyz_to_R(qwxyz):
-    w, x, y, z = qwxyz
-    xx, yy, zz = x*x, y*y, z*z
-    xy, xz, yz = x*y, x*z, y*z
-    wx, wy, wz = w*x, w*y, w*z
-    return np.array([
-        [1-2*(yy+zz), 2*(xy-wz),   2*(xz+wy)],
-        [2*(xy+wz),   1-2*(xx+zz), 2*(yz-wx)],
-        [2*(xz-wy),   2*(yz+wx),   1-2*(xx+yy)]
-    ], dtype=np.float32)
+    return pm.quat_to_mat(np.asarray(qwxyz, dtype=np.float64)).astype(np.float32)
 
 
 def rpy_to_R(r, p, y):
@@ -29,18 +23,4 @@ def rpy_to_R(r, p, y):
 
 def mat_to_pose(M: np.ndarray) -> sapien.Pose:
     R, p = M[:3,:3], M[:3,3]
-    tr = float(np.trace(R))
-    if tr > 0:
-        S = math.sqrt(tr + 1.0) * 2
-        w = 0.25 * S; x = (R[2,1]-R[1,2]) / S; y = (R[0,2]-R[2,0]) / S; z = (R[1,0]-R[0,1]) / S
-    else:
-        if R[0,0] > R[1,1] and R[0,0] > R[2,2]:
-            S = math.sqrt(1.0 + R[0,0] - R[1,1] - R[2,2]) * 2
-            w = (R[2,1]-R[1,2])/S; x = 0.25*S; y = (R[0,1]+R[1,0])/S; z = (R[0,2]+R[2,0])/S
-        elif R[1,1] > R[2,2]:
-            S = math.sqrt(1.0 + R[1,1] - R[0,0] - R[2,2]) * 2
-            w = (R[0,2]-R[2,0])/S; x = (R[0,1]+R[1,0])/S; y = 0.25*S; z = (R[1,2]+R[2,1])/S
-        else:
-            S = math.sqrt(1.0 + R[2,2] - R[0,0] - R[1,1]) * 2
-            w = (R[1,0]-R[0,1])/S; x = (R[0,2]+R[2,0])/S; y = (R[1,2]+R[2,1])/S; z = 0.25*S
-    return sapien.Pose(p, np.array([w, x, y, z], dtype=np.float32))
+    return sapien.Pose(p, pm.mat_to_quat(np.asarray(R, dtype=np.float64)).astype(np.float32))
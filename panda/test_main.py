@@ -3,7 +3,6 @@ from __future__ import annotations
 import argparse
 import numpy as np
 import sapien.core as sapien
-import trimesh
 import yaml
 import time
 import os
@@ -43,11 +42,8 @@ TASK_FILE           = "grasp/task/task.yml"
 
 # ------------------- 工具函数 -------------------
 def load_task(task_name: str, task_file=TASK_FILE):
-    with open(task_file, "r", encoding="utf-8") as f:
-        tasks = yaml.safe_load(f)["tasks"]
-    if task_name not in tasks:
-        raise ValueError(f"Task {task_name} not found in {task_file}")
-    return tasks[task_name]["config"], tasks[task_name]["model"]
+    from task_registry import load_registry
+    return load_registry(task_file).get(task_name)
 
 
 def world_to_object(obj_pose: sapien.Pose, point_world: np.ndarray):
@@ -58,12 +54,7 @@ def world_to_object(obj_pose: sapien.Pose, point_world: np.ndarray):
 
 
 def save_result_yaml(task_name: str, tcp_in_obj, quat_in_obj, task_file=TASK_FILE):
-    with open(task_file, "r", encoding="utf-8") as f:
-        tasks = yaml.safe_load(f)["tasks"]
-    if task_name not in tasks:
-        raise ValueError(f"Task {task_name} not found in {task_file}")
-
-    cfg_path = tasks[task_name]["config"]
+    cfg_path, _ = load_task(task_name, task_file)
     task_dir = os.path.dirname(cfg_path)
     out_path = os.path.join(task_dir, f"cor_res_{task_name}.yml")
 
@@ -89,7 +80,6 @@ def main(cfg_path: str, glb_path: str, task_name: str | None):
 
     # === 2) 加载物体 ===
     model_path = glb_path
-    trimesh.load(model_path, force="mesh")
 
     scale = float(SCALE_OBJ)
     shift = np.array([0.0, 0.0, OFFSET], dtype=float)
@@ -207,6 +197,7 @@ def main(cfg_path: str, glb_path: str, task_name: str | None):
             last_print_time = now
 
         scene.step()
+        gripper.update_contacts(actor)
         scene.update_render()
         viewer.render()
 
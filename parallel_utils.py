@@ -0,0 +1,123 @@
+# parallel_utils.py — 多进程并行测试 proposal (每个 worker 进程持有自己的 SAPIEN 场景)
+
+from __future__ import annotations
+import multiprocessing as mp
+
+from topk import Cancelled
+
+# 每个 worker 最多同时保留的 WarmScene 数 (跨任务调度时不同物体交替出现)
+MAX_WARM_SCENES = 4
+
+# worker 进程内的状态：是否复用场景、场景构建参数、proposal 判定参数、按 glb 缓存的 WarmScene
+_worker_reuse_scene = False
+_worker_sim_kwargs = {}
+_worker_episode_kwargs = {}
+_worker_warm = {}
+_worker_cutoffs = None   # 共享内存：每组 (任务) 仍需要的最大优先级位置，见 new_cutoffs
+
+NO_CUTOFF = 2 ** 62
+
+
+def new_cutoffs(num_groups: int):
+    """
+    主进程与 worker 共享的取消表 (每组一个整数)：位置大于 cutoffs[组] 的 job 不再需要，
+    还没开始的直接跳过，正在仿真的在下一次检查时放弃。
+    """
+    return mp.get_context("spawn").RawArray("q", [NO_CUTOFF] * num_groups)
+
+
+def _init_worker(reuse_scene: bool, sim_kwargs: dict, episode_kwargs: dict, cutoffs=None):
+    global _worker_reuse_scene, _worker_sim_kwargs, _worker_episode_kwargs, _worker_cutoffs
+    _worker_reuse_scene = reuse_scene
+    _worker_sim_kwargs = sim_kwargs
+    _worker_episode_kwargs = episode_kwargs
+    _worker_cutoffs = cutoffs
+
+
+def _get_warm(glb_path):
+    import test_main  # 延迟导入，避免与 test_main 循环引用
+
+    warm = _worker_warm.pop(glb_path, None)
+    if warm is None:
+        if len(_worker_warm) >= MAX_WARM_SCENES:
+            _worker_warm.pop(next(iter(_worker_warm)))  # 丢弃最久未用的
+        warm = test_main.WarmScene(glb_path, with_viewer=False, **_worker_sim_kwargs)
+    _worker_warm[glb_path] = warm
+    return warm
+
+
+def _run_one(job):
+    """
+    worker 入口：测试一个 proposal，返回 (tag, key, grasp_data, stats)
+    job 可带第 7 项 slot=(组号, 优先级位置)，配合取消表使用；被取消时 stats["cancelled"] 为 True
+    """
+    import test_main
+
+    tag, glb_path, tcp, quat, key, grasp, *slot = job
+    should_stop = None
+    if slot and slot[0] is not None and _worker_cutoffs is not None:
+        group, pos = slot[0]
+        should_stop = lambda: pos > _worker_cutoffs[group]
+        if should_stop():
+            return tag, key, None, {"key": key, "cancelled": True}
+
+    warm = _get_warm(glb_path) if _worker_reuse_scene else None
+    stats = {}
+    try:
+        key, grasp_data = test_main.run_single_proposal(
+            glb_path, (tcp, quat, key), grasp, with_viewer=False, warm=warm, **_worker_sim_kwargs,
+            **_worker_episode_kwargs, stats=stats, should_stop=should_stop
+        )
+    except Cancelled:
+        return tag, key, None, {"key": key, "cancelled": True}
+    return tag, key, grasp_data, stats
+
+
+def iter_parallel(jobs, workers: int, reuse_scene=False, sim_kwargs=None, episode_kwargs=None, cutoffs=None):
+    """
+    jobs: [(tag, glb_path, tcp, quat, key, grasp[, slot]), ...]
+    按列表顺序分发给 workers 个进程，每完成一个就产出 (tag, key, grasp_data, stats)。
+    sim_kwargs 原样传给 WarmScene / run_single_proposal (如 collision_cache、sim)，
+    episode_kwargs 只传给 run_single_proposal (如 audit_early_exit)。
+    cutoffs: new_cutoffs 建的取消表 (job 需带 slot)；调用方提前停止迭代时进程池被终止，在途 job 随之结束。
+    """
+    # spawn：子进程不继承父进程的 PhysX / 渲染状态
+    ctx = mp.get_context("spawn")
+    initargs = (reuse_scene, sim_kwargs or {}, episode_kwargs or {}, cutoffs)
+    with ctx.Pool(processes=workers, initializer=_init_worker, initargs=initargs) as pool:
+        yield from pool.imap_unordered(_run_one, jobs)
+
+
+def run_proposals_parallel(glb_path, proposals, workers: int, reuse_scene=False, sim_kwargs=None,
+                           episode_kwargs=None, stats=None, quota=None, on_result=None):
+    """
+    把 proposals (tcp, quat, key, grasp) 分发到 workers 个进程上测试。
+    返回与 proposals 顺序一致的 [(key, grasp_data), ...]，结果与 worker 数无关。
+    stats: 传入 list 时按同样顺序追加每个 proposal 的统计
+    quota: TopKQuota，配额满后取消其后的 proposal；此时只返回实际评估完的 proposal (顺序不变)
+    on_result: 每评估完一个 proposal 立即回调 on_result(key, grasp_data) (完成顺序，用于流式写结果日志)
+    """
+    cutoffs = new_cutoffs(1) if quota is not None else None
+    jobs = [(idx, glb_path, tcp, quat, key, grasp, (0, quota.pos[key]) if quota is not None else None)
+            for idx, (tcp, quat, key, grasp) in enumerate(proposals)]
+    results = [None] * len(jobs)
+    job_stats = [None] * len(jobs)
+
+    jobs_iter = iter_parallel(jobs, workers, reuse_scene, sim_kwargs, episode_kwargs, cutoffs)
+    for done, (idx, key, grasp_data, one_stats) in enumerate(jobs_iter, 1):
+        if one_stats.get("cancelled"):
+            continue
+        results[idx] = (key, grasp_data)
+        job_stats[idx] = one_stats
+        print(f"[INFO] Proposal {key} 完成 ({done}/{len(jobs)})")
+        if on_result is not None:
+            on_result(key, grasp_data)
+        if quota is not None:
+            quota.record(key, grasp_data is not None)
+            cutoffs[0] = quota.cutoff
+            if quota.finished():
+                break   # 退出时进程池被终止，在途的 proposal 随之取消
+
+    if stats is not None:
+        stats.extend(s for s in job_stats if s is not None)
+    return [r for r in results if r is not None]
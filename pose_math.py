@@ -0,0 +1,149 @@
+# pose_math.py — 批量位姿运算：四元数 (wxyz) / 旋转矩阵 / 世界系 ↔ 物体系，输入为 (..., 4)、(..., 3)、(..., 3, 3) 数组
+
+from __future__ import annotations
+import numpy as np
+
+# 计算时保持输入的浮点精度 (SAPIEN 的位姿是 float32)，整数输入按 float64 处理
+_EPS = np.finfo(np.float64).eps
+
+
+def _float(a):
+    a = np.asarray(a)
+    return a if a.dtype.kind == "f" else a.astype(np.float64)
+
+
+# ------------------- 四元数 -------------------
+def xyzw_to_wxyz(q):
+    """SAPIEN (xyzw) → transforms3d (wxyz)"""
+    return _float(q)[..., [3, 0, 1, 2]]
+
+
+def wxyz_to_xyzw(q):
+    return _float(q)[..., [1, 2, 3, 0]]
+
+
+def quat_mul(q1, q2):
+    """Hamilton 积 q1 ⊗ q2 (与 transforms3d.qmult 相同)，支持广播"""
+    q1, q2 = _float(q1), _float(q2)
+    w1, x1, y1, z1 = np.moveaxis(q1, -1, 0)
+    w2, x2, y2, z2 = np.moveaxis(q2, -1, 0)
+    return np.stack([
+        w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+        w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+        w1 * y2 + y1 * w2 + z1 * x2 - x1 * z2,
+        w1 * z2 + z1 * w2 + x1 * y2 - y1 * x2,
+    ], axis=-1)
+
+
+def quat_conjugate(q):
+    q = _float(q)
+    return q * np.array([1, -1, -1, -1], dtype=q.dtype)
+
+
+def quat_inverse(q):
+    """共轭 / 模长平方 (单位四元数即为共轭)"""
+    q = _float(q)
+    return quat_conjugate(q) / np.sum(q * q, axis=-1, keepdims=True)
+
+
+def axangle_to_quat(axis, angle):
+    """绕 axis 旋转 angle (rad) 的四元数；axis (..., 3) 不要求归一化"""
+    axis = _float(axis)
+    axis = axis / np.linalg.norm(axis, axis=-1, keepdims=True)
+    half = np.asarray(angle, dtype=axis.dtype) / 2
+    return np.concatenate([np.cos(half)[..., None], axis * np.sin(half)[..., None]], axis=-1)
+
+
+# 输入 proposal 的 +90° (绕局部 z) 补偿
+ROT_Z90 = axangle_to_quat([0.0, 0.0, 1.0], np.deg2rad(90))
+
+
+# ------------------- 四元数 ↔ 旋转矩阵 -------------------
+def quat_to_mat(q):
+    """(..., 4) wxyz → (..., 3, 3)，允许未归一化的四元数 (与 transforms3d.quat2mat 相同的算法)"""
+    q = _float(q)
+    w, x, y, z = np.moveaxis(q, -1, 0)
+    nq = w * w + x * x + y * y + z * z
+    small = nq < _EPS
+    s = 2 / np.where(small, 1, nq)
+    X, Y, Z = x * s, y * s, z * s
+    wX, wY, wZ = w * X, w * Y, w * Z
+    xX, xY, xZ = x * X, x * Y, x * Z
+    yY, yZ, zZ = y * Y, y * Z, z * Z
+    R = np.stack([
+        np.stack([1 - (yY + zZ), xY - wZ, xZ + wY], axis=-1),
+        np.stack([xY + wZ, 1 - (xX + zZ), yZ - wX], axis=-1),
+        np.stack([xZ - wY, yZ + wX, 1 - (xX + yY)], axis=-1),
+    ], axis=-2)
+    if np.any(small):
+        R[small] = np.eye(3, dtype=R.dtype)
+    return R
+
+
+def mat_to_quat(R):
+    """(..., 3, 3) → (..., 4) wxyz (Shepperd 方法，按迹/最大对角元分四种情况)"""
+    R = _float(R)
+    r00, r01, r02 = R[..., 0, 0], R[..., 0, 1], R[..., 0, 2]
+    r10, r11, r12 = R[..., 1, 0], R[..., 1, 1], R[..., 1, 2]
+    r20, r21, r22 = R[..., 2, 0], R[..., 2, 1], R[..., 2, 2]
+    tr = r00 + r11 + r22
+
+    case_w = tr > 0
+    case_x = ~case_w & (r00 > r11) & (r00 > r22)
+    case_y = ~case_w & ~case_x & (r11 > r22)
+    case_z = ~(case_w | case_x | case_y)
+
+    q = np.empty(R.shape[:-2] + (4,), dtype=R.dtype)
+    with np.errstate(invalid="ignore", divide="ignore"):   # 各分支只取自己的元素
+        S = np.sqrt(np.maximum(tr + 1, 0)) * 2
+        q[case_w] = np.stack([0.25 * S, (r21 - r12) / S, (r02 - r20) / S, (r10 - r01) / S], axis=-1)[case_w]
+        S = np.sqrt(np.maximum(1 + r00 - r11 - r22, 0)) * 2
+        q[case_x] = np.stack([(r21 - r12) / S, 0.25 * S, (r01 + r10) / S, (r02 + r20) / S], axis=-1)[case_x]
+        S = np.sqrt(np.maximum(1 + r11 - r00 - r22, 0)) * 2
+        q[case_y] = np.stack([(r02 - r20) / S, (r01 + r10) / S, 0.25 * S, (r12 + r21) / S], axis=-1)[case_y]
+        S = np.sqrt(np.maximum(1 + r22 - r00 - r11, 0)) * 2
+        q[case_z] = np.stack([(r10 - r01) / S, (r02 + r20) / S, (r12 + r21) / S, 0.25 * S], axis=-1)[case_z]
+    return q
+
+
+# ------------------- 世界系 ↔ 物体系 -------------------
+def align_axes(R):
+    """
+    物体系方向修正 (返回新数组)：
+    z 轴与世界 z 反向时翻转 z、x 轴；之后 x 轴与世界 x 反向时翻转 x、y 轴 (两次都保持右手系)
+    """
+    R = np.array(R, copy=True)
+    flip = R[..., 2, 2] < 0
+    R[flip, :, 2] *= -1
+    R[flip, :, 0] *= -1
+    flip = R[..., 0, 0] < 0
+    R[flip, :, 0] *= -1
+    R[flip, :, 1] *= -1
+    return R
+
+
+def _object_frame(obj_q_wxyz, align_axis):
+    R = quat_to_mat(obj_q_wxyz)
+    return align_axes(R) if align_axis else R
+
+
+def world_to_object(obj_p, obj_q_wxyz, points_world, align_axis=True):
+    """世界系下的点 → 物体系 (R^T (p - t))；align_axis 见 align_axes"""
+    R = _object_frame(obj_q_wxyz, align_axis)
+    d = _float(points_world) - _float(obj_p)
+    return np.matmul(np.swapaxes(R, -1, -2), d[..., None])[..., 0]
+
+
+def object_to_world(obj_p, obj_q_wxyz, points_obj, align_axis=True):
+    """world_to_object 的逆变换 (R p + t)"""
+    R = _object_frame(obj_q_wxyz, align_axis)
+    return np.matmul(R, _float(points_obj)[..., None])[..., 0] + _float(obj_p)
+
+
+def quat_world_to_object(obj_q_wxyz, q_wxyz):
+    """世界系下的朝向 → 物体系 (obj⁻¹ ⊗ q)"""
+    return quat_mul(quat_inverse(obj_q_wxyz), q_wxyz)
+
+
+def quat_object_to_world(obj_q_wxyz, q_wxyz):
+    return quat_mul(obj_q_wxyz, q_wxyz)
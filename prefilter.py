@@ -0,0 +1,176 @@
+# prefilter.py — 物理仿真前的几何预筛：手指初始穿入物体 / 闭合区域内没有物体的 proposal 直接判定失败
+
+from __future__ import annotations
+import functools
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+import pose_math as pm
+
+OPEN_QPOS = 0.1            # 手指初始张开位置，与 Gripper.reset 一致
+PENETRATION_DEPTH = 0.003  # 手指盒每个面向内收缩的距离 (m)：收缩后仍与物体表面相交才算穿入
+CLOSING_MARGIN = 0.002     # 闭合区域每个面向外扩张的距离 (m)
+
+REASON_PENETRATION = "手指初始穿入物体"
+REASON_EMPTY = "闭合区域内没有物体"
+
+
+# ------------------- 手爪几何 (来自 URDF) -------------------
+def _rpy_to_mat(rpy):
+    r, p, y = rpy
+    cr, sr, cp, sp, cy, sy = np.cos(r), np.sin(r), np.cos(p), np.sin(p), np.cos(y), np.sin(y)
+    return np.array([
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+        [-sp, cp * sr, cp * cr],
+    ])
+
+
+def _origin(elem):
+    o = elem.find("origin") if elem is not None else None
+    if o is None:
+        return np.zeros(3), np.eye(3)
+    xyz = np.array([float(v) for v in o.get("xyz", "0 0 0").split()])
+    rpy = [float(v) for v in o.get("rpy", "0 0 0").split()]
+    return xyz, _rpy_to_mat(rpy)
+
+
+@functools.lru_cache(maxsize=None)
+def hand_boxes(urdf_path: str, open_qpos: float = OPEN_QPOS):
+    """
+    返回手爪根 (panda_hand) 坐标系下的几何：
+    {"tcp": TCP 偏移, "fingers": [(lo, hi), (lo, hi)], "closing": (lo, hi)}
+    手指盒是碰撞网格 (STL) 的包围盒，按 collision origin 和关节位置 (open_qpos) 摆到手爪系；
+    闭合区域是两指内侧面之间、覆盖手指 x/z 范围的盒子。
+    """
+    import trimesh
+
+    root = ET.parse(urdf_path).getroot()
+    links = {l.get("name"): l for l in root.findall("link")}
+    joints = {j.get("name"): j for j in root.findall("joint")}
+    hand = root.find("link").get("name")
+
+    tcp = np.zeros(3)
+    fingers = []
+    for joint in joints.values():
+        if joint.find("parent").get("link") != hand:
+            continue
+        j_xyz, j_R = _origin(joint)
+        if joint.get("type") == "fixed":
+            tcp = j_xyz
+            continue
+        if joint.get("type") != "prismatic":
+            continue
+        axis = np.array([float(v) for v in joint.find("axis").get("xyz").split()])
+        link = links[joint.find("child").get("link")]
+        col = link.find("collision")
+        c_xyz, c_R = _origin(col)
+        mesh_file = col.find("geometry/mesh").get("filename")
+        if not os.path.isfile(mesh_file):
+            mesh_file = os.path.join(os.path.dirname(urdf_path), mesh_file)
+        bounds = trimesh.load(mesh_file, force="mesh").bounds
+        corners = np.array([[x, y, z] for x in bounds[:, 0] for y in bounds[:, 1] for z in bounds[:, 2]])
+        # 碰撞网格 → link 系 → 手爪系 (关节平移 axis * q)
+        corners = (corners @ c_R.T + c_xyz) @ j_R.T + j_xyz + j_R @ axis * open_qpos
+        fingers.append((corners.min(axis=0), corners.max(axis=0)))
+
+    if len(fingers) != 2:
+        raise ValueError(f"{urdf_path} 中应有两个手指 (prismatic) 关节，找到 {len(fingers)} 个")
+    fingers.sort(key=lambda b: b[0][1] + b[1][1])   # 按 y 排序：先右 (y<0) 后左
+    (r_lo, r_hi), (l_lo, l_hi) = fingers
+    closing_lo = np.array([min(r_lo[0], l_lo[0]), r_hi[1], min(r_lo[2], l_lo[2])])
+    closing_hi = np.array([max(r_hi[0], l_hi[0]), l_lo[1], max(r_hi[2], l_hi[2])])
+    return {"tcp": tcp, "fingers": fingers, "closing": (closing_lo, closing_hi)}
+
+
+# ------------------- 三角形 / 有向包围盒 相交 -------------------
+def _box_hits_triangles(center, axes, half, tris, tri_c, tri_r) -> bool:
+    """盒子 (中心, 列为局部轴的 3x3, 半边长) 是否与任一三角形相交 (分离轴定理，13 个轴)"""
+    # 包围球粗筛
+    near = np.linalg.norm(tri_c - center, axis=1) <= tri_r + np.linalg.norm(half)
+    if not near.any():
+        return False
+    v = (tris[near] - center) @ axes   # (t,3,3) 盒子局部坐标
+    # 1) 盒子的 3 个面法向 (即局部 AABB 重叠)；有顶点落在盒内即相交
+    if (np.abs(v) <= half).all(axis=2).any():
+        return True
+    v = v[(v.min(axis=1) <= half).all(axis=1) & (v.max(axis=1) >= -half).all(axis=1)]
+    if not len(v):
+        return False
+    # 2) 三角形法向
+    e0, e1, e2 = v[:, 1] - v[:, 0], v[:, 2] - v[:, 1], v[:, 0] - v[:, 2]
+    n = np.cross(e0, e1)
+    keep = np.abs(np.einsum("ij,ij->i", n, v[:, 0])) <= np.abs(n) @ half
+    # 3) 9 个边叉积轴 (盒轴 × 三角形边)
+    for e in (e0, e1, e2):
+        for k in range(3):
+            a = np.zeros_like(e)
+            a[:, (k + 1) % 3] = -e[:, (k + 2) % 3]
+            a[:, (k + 2) % 3] = e[:, (k + 1) % 3]
+            p = np.einsum("tvj,tj->tv", v, a)
+            r = np.abs(a) @ half
+            keep &= (p.min(axis=1) <= r) & (p.max(axis=1) >= -r)
+    return bool(keep.any())
+
+
+# ------------------- 批量筛选 -------------------
+def load_triangles(glb_path: str, scale: float = 1.0):
+    """物体三角形 (T,3,3)，物体系；用 SAPIEN 的加载器，与仿真里的碰撞网格一致"""
+    import sapien.core as sapien
+
+    shape = sapien.physx.PhysxCollisionShapeTriangleMesh(glb_path, [1, 1, 1], sapien.physx.PhysxMaterial(0, 0, 0),
+                                                         sdf=False)
+    vertices = np.asarray(shape.get_vertices(), dtype=np.float64) * scale
+    return vertices[np.asarray(shape.get_triangles())]
+
+
+def screen(tris, tcps, quats, urdf_path: str, open_qpos: float = OPEN_QPOS,
+           penetration_depth: float = PENETRATION_DEPTH, closing_margin: float = CLOSING_MARGIN):
+    """
+    tris: 物体三角形 (T,3,3)；tcps (N,3)、quats (N,4 wxyz，已含 90° 补偿) 为物体系下的 proposal
+    返回长度 N 的列表：None → 通过，否则为拒绝原因
+    """
+    geo = hand_boxes(urdf_path, open_qpos)
+    R = pm.quat_to_mat(np.asarray(quats, dtype=np.float64))                   # (N,3,3)
+    root = np.asarray(tcps, dtype=np.float64) - R @ geo["tcp"]                # 手爪根在物体系的位置
+
+    # 手指盒 (收缩) + 闭合区域 (扩张)，先在手爪系下算好，再批量变换到每个 proposal
+    boxes = [(lo + penetration_depth, hi - penetration_depth) for lo, hi in geo["fingers"]]
+    boxes.append((geo["closing"][0] - closing_margin, geo["closing"][1] + closing_margin))
+    lo, hi = np.array([b[0] for b in boxes]), np.array([b[1] for b in boxes])
+    centers = root[:, None] + np.einsum("nij,bj->nbi", R, (lo + hi) / 2)       # (N,3,3)
+    halves = (hi - lo) / 2
+
+    tri_c = tris.mean(axis=1)
+    tri_r = np.linalg.norm(tris - tri_c[:, None], axis=2).max(axis=1)
+    reasons = []
+    for i in range(len(R)):
+        hit = lambda b: _box_hits_triangles(centers[i, b], R[i], halves[b], tris, tri_c, tri_r)
+        if hit(0) or hit(1):
+            reasons.append(REASON_PENETRATION)
+        elif not hit(2):
+            reasons.append(REASON_EMPTY)
+        else:
+            reasons.append(None)
+    return reasons
+
+
+def report_prefilter(rejected: dict, results=None, audit=False):
+    """
+    rejected: {key: 拒绝原因}
+    audit=True 时被拒的 proposal 也已仿真，results 为全部 [(key, grasp_data), ...]，核对它们是否确实失败
+    """
+    counts = {}
+    for reason in rejected.values():
+        counts[reason] = counts.get(reason, 0) + 1
+    detail = ", ".join(f"{r} {n}" for r, n in counts.items()) or "无"
+    verb = "会拒绝" if audit else "拒绝"
+    print(f"[INFO] 🔍 几何预筛{verb} {len(rejected)} 个 proposal ({detail})")
+    if audit:
+        wrong = [key for key, grasp_data in results if key in rejected and grasp_data is not None]
+        if wrong:
+            print(f"[WARN] 预筛拒绝但仿真成功: {wrong}")
+        else:
+            print(f"[INFO] 预筛拒绝的 proposal 仿真全部失败 ({len(rejected)} 个)")
@@ -0,0 +1,164 @@
+# profiler.py — --profile：按阶段统计每个 proposal / 任务的耗时、步数和 steps/s，写 JSON 报告并打印汇总表
+
+from __future__ import annotations
+import json
+import os
+import time
+
+DEFAULT_PROFILE_PATH = "grasp/.cache/profile.json"
+
+# proposal 的阶段 (按先后顺序，互不重叠)：
+#   world / object / robot  新建场景时：建世界、加载 GLB 并烘焙碰撞体、加载 URDF 和 Gripper
+#   reset                   复用场景时：恢复物体/手爪状态
+#   closing                 抓取阶段；motion_1..3 三次 200 步的动作稳定性检测
+# 计时器 (嵌套在阶段内、可重叠)：physx_step 为 scene.step() 本身，contacts 为接触查询与评估
+PHASES = ("world", "object", "robot", "reset", "closing", "motion_1", "motion_2", "motion_3")
+TIMERS = ("physx_step", "contacts")
+
+
+class PhaseProfile:
+    """
+    一个 proposal (或一个任务) 的阶段计时。enter(name) 结束当前阶段并开始新阶段，
+    step() 给当前阶段计一步，add(timer, seconds) 累加嵌套计时；finish() 返回可 JSON 化的字典。
+    每步只有一次整数加法和几次 perf_counter，开销远小于 scene.step()。
+    """
+
+    def __init__(self):
+        self.phases = {}        # 阶段名 → [秒, 步数]
+        self.timers = {}        # 计时器名 → 秒
+        self._current = None
+        self._start = self._t0 = time.perf_counter()
+
+    def enter(self, name: str):
+        now = time.perf_counter()
+        if self._current is not None:
+            self._current[0] += now - self._t0
+        self._current = self.phases.setdefault(name, [0.0, 0])
+        self._t0 = now
+
+    def step(self):
+        self._current[1] += 1
+
+    def add(self, name: str, seconds: float):
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    def finish(self) -> dict:
+        now = time.perf_counter()
+        if self._current is not None:
+            self._current[0] += now - self._t0
+            self._current = None
+        return {
+            "seconds": now - self._start,
+            "phases": {name: {"seconds": s, "steps": n} for name, (s, n) in self.phases.items()},
+            "timers": dict(self.timers),
+        }
+
+
+def _sort_phases(names):
+    order = {name: i for i, name in enumerate(PHASES)}
+    return sorted(names, key=lambda n: (order.get(n, len(order)), n))
+
+
+class ProfileReport:
+    """
+    汇总整个运行的 profile：add_task 收集每个任务的 proposal 统计 (stats[i]["profile"])，
+    report() 写 JSON 并打印阶段 / 任务两张汇总表。
+    cprofile_top > 0 时另外保留最慢的 N 个 proposal 的 cProfile 数据，写到 <JSON 名>_cprofile/ 下。
+    """
+
+    def __init__(self, path: str = DEFAULT_PROFILE_PATH, cprofile_top: int = 0):
+        self.path = path
+        self.cprofile_top = int(cprofile_top)
+        self.tasks = {}          # 任务名 → {"seconds", "phases"}
+        self.proposals = []
+        self._slowest = []       # [(秒, 任务, key, cProfile 数据)]，只保留最慢的 cprofile_top 个
+        self._start = time.perf_counter()
+
+    def add_task(self, task: str, stats, task_profile: dict | None = None):
+        """stats: 该任务每个 proposal 的统计 (见 test_main.proposal_episode)；task_profile: 任务级 PhaseProfile.finish()"""
+        for s in stats:
+            prof = s.get("profile")
+            if prof is None:
+                continue
+            self.proposals.append(dict(task=task, key=s["key"], ok=s.get("ok"), **prof))
+            blob = s.pop("cprofile", None)
+            if blob is not None and self.cprofile_top > 0:
+                self._slowest.append((prof["seconds"], task, s["key"], blob))
+                self._slowest.sort(key=lambda x: -x[0])
+                del self._slowest[self.cprofile_top:]
+        entry = self.tasks.setdefault(task, {"seconds": None, "phases": {}})
+        if task_profile is not None:
+            entry["seconds"] = task_profile["seconds"]
+            entry["phases"] = task_profile["phases"]
+
+    def summary(self) -> dict:
+        """按阶段 / 计时器 / 任务聚合 proposal 统计"""
+        phases, timers, tasks = {}, {}, {}
+        for p in self.proposals:
+            for name, ph in p["phases"].items():
+                agg = phases.setdefault(name, {"count": 0, "seconds": 0.0, "steps": 0})
+                agg["count"] += 1
+                agg["seconds"] += ph["seconds"]
+                agg["steps"] += ph["steps"]
+            for name, s in p["timers"].items():
+                timers[name] = timers.get(name, 0.0) + s
+            t = tasks.setdefault(p["task"], {"proposals": 0, "sim_seconds": 0.0, "steps": 0, "slowest": None})
+            t["proposals"] += 1
+            t["sim_seconds"] += p["seconds"]
+            t["steps"] += sum(ph["steps"] for ph in p["phases"].values())
+            if t["slowest"] is None or p["seconds"] > t["slowest"][1]:
+                t["slowest"] = (p["key"], p["seconds"])
+        for agg in phases.values():
+            agg["steps_per_sec"] = agg["steps"] / agg["seconds"] if agg["steps"] and agg["seconds"] > 0 else None
+        for name, t in tasks.items():
+            t["steps_per_sec"] = t["steps"] / t["sim_seconds"] if t["steps"] and t["sim_seconds"] > 0 else None
+            t["wall_seconds"] = self.tasks.get(name, {}).get("seconds")
+        return {"phases": phases, "timers": timers, "tasks": tasks}
+
+    def _write_cprofile(self):
+        out_dir = os.path.splitext(self.path)[0] + "_cprofile"
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
+        for seconds, task, key, blob in self._slowest:
+            path = os.path.join(out_dir, f"{task}.{key}.prof".replace(os.sep, "_"))
+            with open(path, "wb") as f:   # 与 pstats.Stats.dump_stats 的格式相同
+                f.write(blob)
+            paths.append({"task": task, "key": key, "seconds": seconds, "path": path})
+        return paths
+
+    def report(self):
+        summary = self.summary()
+        data = {
+            "wall_seconds": time.perf_counter() - self._start,
+            "summary": summary,
+            "tasks": self.tasks,
+            "proposals": self.proposals,
+        }
+        if self._slowest:
+            data["cprofile"] = self._write_cprofile()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+        phases, timers = summary["phases"], summary["timers"]
+        total = sum(p["seconds"] for p in self.proposals) or 1.0
+        print(f"\n[INFO] ⏱️ 阶段耗时 ({len(self.proposals)} 个 proposal，合计 {total:.1f} s)")
+        print(f"{'phase':<12} {'count':>6} {'total(s)':>9} {'mean(ms)':>9} {'share':>6} {'steps':>8} {'steps/s':>8}")
+        for name in _sort_phases(phases):
+            p = phases[name]
+            rate = f"{p['steps_per_sec']:.0f}" if p["steps_per_sec"] else "-"
+            print(f"{name:<12} {p['count']:>6} {p['seconds']:>9.2f} {p['seconds'] / p['count'] * 1e3:>9.1f} "
+                  f"{p['seconds'] / total:>6.1%} {p['steps']:>8} {rate:>8}")
+        for name in TIMERS:
+            if name in timers:
+                print(f"{name:<12} {'':>6} {timers[name]:>9.2f} {'':>9} {timers[name] / total:>6.1%}")
+
+        print()
+        print(f"{'task':<16} {'props':>6} {'wall(s)':>8} {'sim(s)':>8} {'steps':>8} {'steps/s':>8}  slowest")
+        for name, t in summary["tasks"].items():
+            wall = f"{t['wall_seconds']:.2f}" if t["wall_seconds"] is not None else "-"
+            rate = f"{t['steps_per_sec']:.0f}" if t["steps_per_sec"] else "-"
+            key, secs = t["slowest"]
+            print(f"{name:<16} {t['proposals']:>6} {wall:>8} {t['sim_seconds']:>8.2f} {t['steps']:>8} {rate:>8}"
+                  f"  {key} ({secs:.2f} s)")
+        print(f"[INFO] profile 已写入 {self.path}" + (f" (cProfile: 最慢 {len(self._slowest)} 个)" if self._slowest else ""))
@@ -0,0 +1,196 @@
+# proposal_arrays.py — isaac_grasp proposal 文件 → 连续 NumPy 数组 (流式解析 + 二进制 sidecar 缓存)
+
+from __future__ import annotations
+import os
+import tempfile
+from array import array
+
+import numpy as np
+import yaml
+
+from hash_utils import file_sha1
+
+SIDECAR_SUFFIX = ".proposals.npz"
+CACHE_VERSION = 1
+
+# 有 libyaml 时用 C 解析器产生事件，否则退回纯 Python 解析器
+_EventLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# 只借用 SafeLoader 的标量类型解析/构造 (与 yaml.safe_load 的结果一致)
+_scalars = yaml.SafeLoader("")
+
+
+class ProposalArrays:
+    """
+    一个 proposal 文件的全部 grasp，按文件中的顺序存成连续数组：
+    keys (N,)            grasp 名字
+    position (N, 3)      float64
+    tcp_position (N, 3)  float64
+    quat (N, 4)          原始朝向 wxyz (未做 90° 补偿)
+    confidence (N,)      float64
+    score (N,)           float64，文件中没有 score 的为 NaN
+    rank (N,)            在 ranking 中的位置，不在 ranking 中的为 -1
+    """
+
+    FIELDS = ("keys", "position", "tcp_position", "quat", "confidence", "score", "rank")
+
+    def __init__(self, keys, position, tcp_position, quat, confidence, score, rank):
+        self.keys = np.asarray(keys, dtype=str)
+        self.position = np.asarray(position, dtype=np.float64).reshape(-1, 3)
+        self.tcp_position = np.asarray(tcp_position, dtype=np.float64).reshape(-1, 3)
+        self.quat = np.asarray(quat, dtype=np.float64).reshape(-1, 4)
+        self.confidence = np.asarray(confidence, dtype=np.float64)
+        self.score = np.asarray(score, dtype=np.float64)
+        self.rank = np.asarray(rank, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def ranked(self, proposal_keys=None):
+        """按 ranking 顺序返回 grasp 下标；proposal_keys 非空时只保留其中的 key"""
+        idx = np.flatnonzero(self.rank >= 0)
+        idx = idx[np.argsort(self.rank[idx], kind="stable")]
+        if proposal_keys:
+            idx = idx[np.isin(self.keys[idx], list(proposal_keys))]
+        return idx
+
+    def grasp(self, i) -> dict:
+        """还原第 i 个 grasp 的原始字典 (与 yaml.safe_load 读出的内容相同)"""
+        q = self.quat[i]
+        grasp = {
+            "confidence": float(self.confidence[i]),
+            "position": [float(x) for x in self.position[i]],
+            "orientation": {"w": float(q[0]), "xyz": [float(q[1]), float(q[2]), float(q[3])]},
+            "tcp_position": [float(x) for x in self.tcp_position[i]],
+        }
+        if not np.isnan(self.score[i]):
+            grasp["score"] = float(self.score[i])
+        return grasp
+
+    def save(self, path: str, source_meta: dict):
+        """写 npz (先写临时文件再原子替换)；source_meta 记录源 YAML 的 size/mtime/sha1"""
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, version=CACHE_VERSION, src_size=source_meta["size"], src_mtime=source_meta["mtime_ns"],
+                     src_sha1=source_meta["sha1"], **{k: getattr(self, k) for k in self.FIELDS})
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+
+    @classmethod
+    def from_npz(cls, data):
+        return cls(**{k: data[k] for k in cls.FIELDS})
+
+
+# ------------------- 流式解析 -------------------
+def _scalar_value(event):
+    tag = event.tag
+    if tag is None or tag == "!":
+        tag = _scalars.resolve(yaml.ScalarNode, event.value, event.implicit)
+    node = yaml.ScalarNode(tag, event.value, style=event.style)
+    constructor = _scalars.yaml_constructors.get(tag, _scalars.yaml_constructors[None])
+    return constructor(_scalars, node)
+
+
+def _build(event, events):
+    """从一个起始事件开始，消费事件流构造出对应的 Python 对象"""
+    if isinstance(event, yaml.ScalarEvent):
+        return _scalar_value(event)
+    if isinstance(event, yaml.SequenceStartEvent):
+        out = []
+        for ev in events:
+            if isinstance(ev, yaml.SequenceEndEvent):
+                return out
+            out.append(_build(ev, events))
+    if isinstance(event, yaml.MappingStartEvent):
+        out = {}
+        for ev in events:
+            if isinstance(ev, yaml.MappingEndEvent):
+                return out
+            key = _build(ev, events)
+            out[key] = _build(next(events), events)
+    raise ValueError(f"proposal 文件中不支持的 YAML 结构: {event}")
+
+
+def parse_isaac_grasp(cfg_path: str) -> ProposalArrays:
+    """
+    流式解析 isaac_grasp 文件：grasps 下的条目逐个构造、写入数组后即丢弃，
+    内存占用与 grasp 数量成正比 (每个 grasp 十几个 float)，而不是整棵 YAML 对象树。
+    """
+    keys, confidence, score = [], array("d"), array("d")
+    position, tcp_position, quat = array("d"), array("d"), array("d")
+    header = {}
+
+    with open(cfg_path, "r", encoding="utf-8") as f:
+        events = yaml.parse(f, Loader=_EventLoader)
+        for ev in events:
+            if isinstance(ev, yaml.MappingStartEvent):
+                break
+            if isinstance(ev, yaml.StreamEndEvent):   # 空文件
+                raise ValueError("目前只支持 isaac_grasp 格式")
+
+        for ev in events:
+            if isinstance(ev, yaml.MappingEndEvent):
+                break
+            name = _build(ev, events)
+            ev = next(events)
+            if name != "grasps" or not isinstance(ev, yaml.MappingStartEvent):
+                header[name] = _build(ev, events)
+                continue
+            for ev in events:
+                if isinstance(ev, yaml.MappingEndEvent):
+                    break
+                keys.append(str(_build(ev, events)))
+                grasp = _build(next(events), events)
+                orient = grasp["orientation"]
+                position.extend(grasp["position"])
+                tcp_position.extend(grasp["tcp_position"])
+                quat.extend([orient["w"], *orient["xyz"]])
+                confidence.append(grasp.get("confidence", 1.0))
+                score.append(grasp.get("score", np.nan))
+
+    if header.get("format") != "isaac_grasp":
+        raise ValueError("目前只支持 isaac_grasp 格式")
+
+    index = {k: i for i, k in enumerate(keys)}
+    rank = np.full(len(keys), -1, dtype=np.int64)
+    for r, k in enumerate(header.get("ranking") or []):
+        rank[index[k]] = r   # ranking 中的 key 必须在 grasps 里
+    return ProposalArrays(keys, position, tcp_position, quat, confidence, score, rank)
+
+
+# ------------------- sidecar 缓存 -------------------
+def sidecar_path(cfg_path: str) -> str:
+    """graspgen_proposals_topk.yml → graspgen_proposals_topk.proposals.npz (同目录)"""
+    return os.path.splitext(cfg_path)[0] + SIDECAR_SUFFIX
+
+
+def _read_sidecar(path: str, cfg_path: str, st):
+    """sidecar 与 YAML 对应时返回 ProposalArrays，否则返回 None"""
+    try:
+        with np.load(path) as data:
+            if int(data["version"]) != CACHE_VERSION:
+                return None
+            same_stat = int(data["src_size"]) == st.st_size and int(data["src_mtime"]) == st.st_mtime_ns
+            # mtime 变了 (如重新 checkout) 再比较内容哈希
+            if not same_stat and str(data["src_sha1"]) != file_sha1(cfg_path):
+                return None
+            return ProposalArrays.from_npz(data)
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def load_proposal_arrays(cfg_path: str, use_cache: bool = True) -> ProposalArrays:
+    """读取 proposal 文件的数组形式；sidecar 存在且 YAML 未变化时直接读 sidecar，否则重新解析并写入"""
+    st = os.stat(cfg_path)
+    path = sidecar_path(cfg_path)
+    if use_cache and os.path.isfile(path):
+        arrays = _read_sidecar(path, cfg_path, st)
+        if arrays is not None:
+            return arrays
+
+    arrays = parse_isaac_grasp(cfg_path)
+    if use_cache:
+        try:
+            arrays.save(path, {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": file_sha1(cfg_path)})
+        except OSError as e:   # 任务目录只读时只是不缓存
+            print(f"[WARN] 无法写入 proposal 缓存 {path}: {e}")
+    return arrays
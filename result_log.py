@@ -0,0 +1,90 @@
+# result_log.py — 批量运行的流式结果日志：每个 proposal 一出结果就追加一行，任务结束后压缩成 batch_res YAML
+
+from __future__ import annotations
+import json
+import os
+import tempfile
+
+import yaml
+
+LOG_SUFFIX = ".log.jsonl"
+LOG_VERSION = 1
+
+
+def log_path(out_path: str) -> str:
+    """batch_res_bowl.002.yml → batch_res_bowl.002.log.jsonl (同目录)"""
+    return os.path.splitext(out_path)[0] + LOG_SUFFIX
+
+
+def atomic_write_yaml(path: str, data):
+    """先写同目录的临时文件再 os.replace，进程中途被杀也不会留下写了一半的 YAML"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            yaml.dump(data, f, sort_keys=False, allow_unicode=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def read_log(path: str):
+    """返回 (头, {key: grasp_data/None})；不完整或损坏的行 (被杀时正在写的末行) 忽略"""
+    header, entries = None, {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if header is None:
+                header = rec
+            elif isinstance(rec, dict) and "key" in rec:
+                entries[rec["key"]] = rec.get("result")
+    return header, entries
+
+
+class ResultLog:
+    """
+    追加写的 JSON Lines：首行为头 (任务、输入文件哈希、仿真参数)，之后每行 {"key", "result"} (失败为 null)。
+    每行写完即 flush + fsync，进程被杀最多丢掉正在写的那一行。
+    resume=True 且已有日志的头与本次一致时，日志里的结果作为已知结果 (resumed)，不再重新仿真；
+    否则从头开始 (旧日志被覆盖)。
+    """
+
+    def __init__(self, path: str, header: dict, resume: bool = False):
+        self.path = path
+        self.resumed = {}
+        header = dict(header, version=LOG_VERSION)
+        if os.path.isfile(path):
+            old_header, entries = read_log(path)
+            if not resume:
+                print(f"[WARN] 发现上次未完成的结果日志 {path} ({len(entries)} 个结果)，"
+                      f"本次重新开始；加 --resume 可从中断处继续")
+            elif old_header != header:
+                print(f"[WARN] 结果日志 {path} 的输入或仿真参数与本次不同，不能续跑，重新开始")
+            else:
+                self.resumed = entries
+                print(f"[INFO] ⏯️ 从结果日志续跑：已有 {len(entries)} 个结果")
+
+        # 重写一份干净的日志 (去掉不完整的末行)，之后只追加
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, sort_keys=True) + "\n")
+            for key, grasp_data in self.resumed.items():
+                f.write(json.dumps({"key": key, "result": grasp_data}) + "\n")
+        os.replace(tmp, path)
+        self.f = open(path, "a", encoding="utf-8")
+
+    def append(self, key: str, grasp_data):
+        self.f.write(json.dumps({"key": key, "result": grasp_data}) + "\n")
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def finish(self):
+        """最终 YAML 已原子写入后调用：关闭并删除日志"""
+        self.f.close()
+        os.remove(self.path)
@@ -0,0 +1,106 @@
+# result_store.py — proposal 判定结果的本地 SQLite 缓存 (按 proposal 内容 + 模型/手爪哈希 + 仿真参数索引)
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+from hash_utils import file_sha1
+
+DEFAULT_DB_PATH = "grasp/.cache/results.sqlite"
+# 判定逻辑 (test_main / gripper_demo) 的改动会影响结果时递增，旧结果随之全部失效
+SIM_VERSION = 1
+_QUERY_CHUNK = 500   # SQLite 单条语句的参数个数有上限
+
+
+def urdf_digest(urdf_path: str) -> str:
+    """URDF 文本及其引用的所有网格文件的组合哈希"""
+    with open(urdf_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    parts = [file_sha1(urdf_path)]
+    for name in sorted(set(re.findall(r'filename="([^"]+)"', text))):
+        path = name if os.path.isfile(name) else os.path.join(os.path.dirname(urdf_path), name)
+        parts.append(f"{name}:{file_sha1(path) if os.path.isfile(path) else 'missing'}")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def proposal_key(grasp: dict, glb_digest: str, urdf_hash: str, params: dict) -> str:
+    """proposal 原始内容 (不含名字) + GLB/URDF 哈希 + 仿真参数 → 缓存键"""
+    raw = json.dumps(
+        {"grasp": grasp, "glb": glb_digest, "urdf": urdf_hash, "params": params, "version": SIM_VERSION},
+        sort_keys=True, default=float,
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    """
+    每行一个 proposal 的判定结果：成功存 grasp_data (JSON)，失败存 NULL。
+    键只由影响仿真的内容决定，proposal 改名或换任务不会导致重算。
+    只在主进程读写 (worker 不访问)。
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, task TEXT, proposal TEXT,"
+            " ok INTEGER NOT NULL, result TEXT, updated REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_results_task ON results(task)")
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def keys_for(self, glb_path: str, proposals, params: dict, urdf_path: str):
+        """proposals: [(tcp, quat, key, grasp), ...] → 与之对齐的缓存键列表"""
+        glb = file_sha1(glb_path)
+        urdf = urdf_digest(urdf_path)
+        return [proposal_key(grasp, glb, urdf, params) for _, _, _, grasp in proposals]
+
+    def lookup(self, keys) -> dict:
+        """返回 {key: grasp_data 或 None(失败)}，只包含已存的键"""
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        for i in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[i:i + _QUERY_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT key, ok, result FROM results WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for key, ok, result in rows:
+                found[key] = json.loads(result) if ok else None
+        return found
+
+    def put_many(self, task: str | None, rows):
+        """rows: [(key, proposal_name, grasp_data 或 None), ...]，已存在的键覆盖"""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO results (key, task, proposal, ok, result, updated) VALUES (?, ?, ?, ?, ?, ?)",
+            [(key, task, name, int(data is not None), None if data is None else json.dumps(data), now)
+             for key, name, data in rows],
+        )
+        self.conn.commit()
+
+    def invalidate(self, tasks=None) -> int:
+        """删除指定任务 (None → 全部) 的结果，返回删除的行数"""
+        if tasks is None:
+            cur = self.conn.execute("DELETE FROM results")
+        else:
+            tasks = list(tasks)
+            cur = self.conn.execute(
+                f"DELETE FROM results WHERE task IN ({','.join('?' * len(tasks))})", tasks
+            )
+        self.conn.commit()
+        return cur.rowcount
+
+    def report(self):
+        n = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        print(f"[INFO] 结果缓存: 命中 {self.hits} / 未命中 {self.misses}, 共 {n} 条 ({self.db_path})")
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,217 @@
+# result_table.py — 全数据集的列式结果表：每个 (任务, proposal) 一行，每列一个 .npy，可内存映射；附汇总命令
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+DEFAULT_TABLE_DIR = "grasp/.cache/results_table"
+TABLE_VERSION = 1
+META_FILE = "meta.json"
+
+# 列名 → 缺省值 (该行没有这一项时填入；向量列按 shape 填满)
+#   status  1 通过 / 0 失败 / -1 未评估 (top-k 凑够后跳过)
+#   source  sim 本次仿真 / cache 结果缓存 / resumed 续跑日志 / prefilter 几何预筛拒绝 / skipped 未评估
+#   reason  失败原因：no_grip / converged / max_steps / slip_motion_N，或预筛的拒绝原因；通过或未知为空
+#   tcp_position / quat  修正后的 TCP 位置和朝向 (物体系)，失败为 NaN
+#   grasp_steps / motion_steps / seconds / motion_delta  只有本次仿真的行才有 (否则 -1 / NaN)
+COLUMNS = {
+    "task": "", "category": "", "task_id": "", "key": "", "rank": -1,
+    "input_position": (np.nan,) * 3, "input_tcp": (np.nan,) * 3, "input_quat": (np.nan,) * 4,
+    "confidence": np.nan, "score": np.nan,
+    "status": -1, "source": "", "reason": "",
+    "tcp_position": (np.nan,) * 3, "quat": (np.nan,) * 4,
+    "grasp_steps": -1, "motion_steps": -1, "seconds": np.nan, "motion_delta": (np.nan,) * 3,
+    "fidelity": "", "updated": np.nan,
+}
+INT_COLUMNS = ("rank", "status", "grasp_steps", "motion_steps")
+
+
+# ------------------- 读取 -------------------
+def load_table(table_dir: str = DEFAULT_TABLE_DIR, mmap=True):
+    """返回 {列名: 数组}；mmap=True 时各列为只读内存映射，整表读取只需打开文件；表不存在时返回 None"""
+    meta_path = os.path.join(table_dir, META_FILE)
+    if not os.path.isfile(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != TABLE_VERSION:
+        print(f"[WARN] 结果表 {table_dir} 版本不同 ({meta.get('version')})，忽略")
+        return None
+    gen_dir = os.path.join(table_dir, meta["generation"])
+    return {name: np.load(os.path.join(gen_dir, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in meta["columns"]}
+
+
+def _write_table(table_dir: str, columns: dict):
+    """
+    写到新的一代子目录，再原子替换 meta.json 指向它，最后删掉旧的子目录：
+    写入中途被杀时 meta.json 仍指向完整的旧表
+    """
+    os.makedirs(table_dir, exist_ok=True)
+    gen_dir = tempfile.mkdtemp(dir=table_dir, prefix="gen_")
+    for name, arr in columns.items():
+        np.save(os.path.join(gen_dir, f"{name}.npy"), np.ascontiguousarray(arr))
+    os.chmod(gen_dir, 0o755)
+
+    meta = {"version": TABLE_VERSION, "generation": os.path.basename(gen_dir), "columns": list(columns),
+            "rows": len(columns["task"])}
+    fd, tmp = tempfile.mkstemp(dir=table_dir, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, os.path.join(table_dir, META_FILE))
+
+    for name in os.listdir(table_dir):
+        if name.startswith("gen_") and name != meta["generation"]:
+            shutil.rmtree(os.path.join(table_dir, name), ignore_errors=True)
+
+
+# ------------------- 写入 -------------------
+class ResultTable:
+    """
+    收集本次运行各任务的逐 proposal 结果，report() 时与已有的表合并：
+    本次跑过的任务整体替换旧行，其他任务保持不变，按 (任务, rank) 排序后写回。
+    """
+
+    def __init__(self, table_dir: str = DEFAULT_TABLE_DIR):
+        self.table_dir = table_dir
+        self.rows = {name: [] for name in COLUMNS}
+        self.tasks = set()
+
+    def add_task(self, task: str, plan: dict, results, stats, fidelity: str):
+        """
+        plan: test_main.prepare_task 的返回值；results: 本次实际仿真的 [(key, grasp_data), ...]；
+        stats: 这些 proposal 的统计 (见 test_main.proposal_episode)
+        """
+        simulated = dict(results)
+        stats_of = {s["key"]: s for s in stats}
+        category, _, task_id = task.partition(".")
+        now = time.time()
+        self.tasks.add(task)
+
+        for tcp, quat, key, grasp in plan["proposals"]:
+            row = dict(COLUMNS, task=task, category=category, task_id=task_id, key=key, rank=plan["rank"][key],
+                       input_position=grasp["position"], input_tcp=grasp["tcp_position"],
+                       input_quat=[grasp["orientation"]["w"], *grasp["orientation"]["xyz"]],
+                       confidence=grasp.get("confidence", np.nan), score=grasp.get("score", np.nan),
+                       fidelity=fidelity, updated=now)
+            if key in simulated:
+                data, row["source"] = simulated[key], "sim"
+                s = stats_of.get(key, {})
+                deltas = s.get("motion_deltas", [])
+                row.update(reason=s.get("reason") or "", grasp_steps=s.get("grasp_steps", -1),
+                           motion_steps=s.get("motion_steps", -1), seconds=s.get("seconds", np.nan),
+                           motion_delta=list(deltas) + [np.nan] * (3 - len(deltas)))
+            elif key in plan["resumed"]:
+                data, row["source"] = plan["resumed"][key], "resumed"
+            elif plan["prefilter"] and key in plan["rejected"]:
+                data, row["source"], row["reason"] = None, "prefilter", plan["rejected"][key]
+            elif key in plan["known"]:
+                data, row["source"] = plan["known"][key], "cache"
+            else:
+                self._append(dict(row, source="skipped"))
+                continue
+
+            row["status"] = int(data is not None)
+            if data is not None:
+                row.update(tcp_position=data["tcp_position"],
+                           quat=[data["orientation"]["w"], *data["orientation"]["xyz"]])
+            self._append(row)
+
+    def _append(self, row: dict):
+        for name, value in row.items():
+            self.rows[name].append(value)
+
+    def _new_columns(self):
+        cols = {}
+        for name, values in self.rows.items():
+            dtype = np.int32 if name in INT_COLUMNS else (str if isinstance(COLUMNS[name], str) else np.float64)
+            cols[name] = np.asarray(values, dtype=dtype)
+        return cols
+
+    def report(self):
+        if not self.tasks:
+            return
+        new = self._new_columns()
+        old = load_table(self.table_dir, mmap=False)
+        if old is not None and set(old) == set(COLUMNS):
+            keep = ~np.isin(old["task"], list(self.tasks))
+            merged = {name: np.concatenate([old[name][keep], new[name]]) for name in COLUMNS}
+        else:
+            merged = new
+        order = np.lexsort((merged["rank"], merged["task"]))
+        _write_table(self.table_dir, {name: arr[order] for name, arr in merged.items()})
+        print(f"[INFO] 📦 结果表已更新: 本次 {len(self.tasks)} 个任务 {len(new['task'])} 行，"
+              f"共 {len(merged['task'])} 行 ({self.table_dir})")
+
+
+# ------------------- 汇总 -------------------
+def summarize(table, by: str = "category"):
+    """按 category 或 task 分组统计通过率和吞吐 (吞吐只按本次仿真的行，seconds 为每个进程内的耗时)"""
+    groups = {}
+    for name in np.unique(table[by]):
+        m = table[by] == name
+        status, source = table["status"][m], table["source"][m]
+        sim = source == "sim"
+        seconds = float(np.nansum(table["seconds"][m][sim]))
+        steps = int(table["grasp_steps"][m][sim].sum() + table["motion_steps"][m][sim].sum())
+        evaluated = int((status >= 0).sum())
+        ok = int((status == 1).sum())
+        groups[str(name)] = {
+            "tasks": len(np.unique(table["task"][m])),
+            "proposals": int(m.sum()),
+            "evaluated": evaluated,
+            "ok": ok,
+            "success_rate": ok / evaluated if evaluated else None,
+            "prefiltered": int((source == "prefilter").sum()),
+            "simulated": int(sim.sum()),
+            "sim_seconds": seconds,
+            "proposals_per_sec": sim.sum() / seconds if seconds > 0 else None,
+            "steps_per_sec": steps / seconds if seconds > 0 else None,
+        }
+    return groups
+
+
+def failure_reasons(table):
+    m = (table["status"] == 0) & (table["reason"] != "")
+    names, counts = np.unique(table["reason"][m], return_counts=True)
+    return dict(sorted(zip(names.tolist(), counts.tolist()), key=lambda x: -x[1]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="汇总列式结果表：各类别 / 任务的通过率和吞吐")
+    parser.add_argument("--dir", type=str, default=DEFAULT_TABLE_DIR, help="结果表目录")
+    parser.add_argument("--by", choices=("category", "task"), default="category", help="分组方式")
+    parser.add_argument("--json", type=str, help="把汇总写成 JSON")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    table = load_table(args.dir)
+    if table is None:
+        raise SystemExit(f"[WARN] 结果表 {args.dir} 不存在，先用 test_main.py 跑一遍任务")
+    print(f"[INFO] 读取 {len(table['task'])} 行 x {len(table)} 列，用时 {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+    groups = summarize(table, args.by)
+    print(f"\n{args.by:<16} {'tasks':>5} {'props':>6} {'eval':>5} {'ok':>5} {'rate':>6} {'pre':>4} {'sim':>5} "
+          f"{'sim(s)':>8} {'prop/s':>7} {'steps/s':>8}")
+    for name, g in groups.items():
+        rate = f"{g['success_rate']:.1%}" if g["success_rate"] is not None else "-"
+        pps = f"{g['proposals_per_sec']:.2f}" if g["proposals_per_sec"] else "-"
+        sps = f"{g['steps_per_sec']:.0f}" if g["steps_per_sec"] else "-"
+        print(f"{name:<16} {g['tasks']:>5} {g['proposals']:>6} {g['evaluated']:>5} {g['ok']:>5} {rate:>6} "
+              f"{g['prefiltered']:>4} {g['simulated']:>5} {g['sim_seconds']:>8.2f} {pps:>7} {sps:>8}")
+
+    reasons = failure_reasons(table)
+    if reasons:
+        print("\n[INFO] 失败原因: " + ", ".join(f"{r} {n}" for r, n in reasons.items()))
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"by": args.by, "groups": groups, "failure_reasons": reasons}, f, ensure_ascii=False, indent=1)
+        print(f"[INFO] 汇总已写入 {args.json}")
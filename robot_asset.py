@@ -0,0 +1,58 @@
+# robot_asset.py — Panda 手爪资源：每个进程只解析一次 URDF，之后由缓存的 builder 直接在各场景里建出关节体
+
+from __future__ import annotations
+
+import sapien
+
+TCP_LINK = "tcp"
+FINGER_LINKS = ("panda_leftfinger", "panda_rightfinger")
+
+_assets = {}   # (urdf_path, headless, 默认材质) → RobotAsset
+
+
+class RobotAsset:
+    """
+    解析好的 URDF (ArticulationBuilder)。解析 URDF 文本、解析网格路径、建 link/joint 记录只做一次；
+    build(scene) 只剩在场景里创建实体 (碰撞网格由 PhysX 按文件名缓存，不会重复读取)。
+    headless=True 时去掉全部可视记录，只建碰撞体。
+    link 下标 (tcp / 两个手指) 也在解析时按名字查好，建出的关节体 get_links() 顺序与 builder 一致。
+    """
+
+    def __init__(self, urdf_path: str, scene, headless: bool = False):
+        self.urdf_path = urdf_path
+        self.headless = headless
+        loader = scene.create_urdf_loader()
+        loader.fix_root_link = False
+        self.builder = loader.load_file_as_articulation_builder(urdf_path)
+        if headless:
+            for link_builder in self.builder.link_builders:
+                link_builder.visual_records = []
+
+        index = {b.name: b.index for b in self.builder.link_builders}
+        self.tcp_index = index[TCP_LINK]
+        self.finger_indices = tuple(index[name] for name in FINGER_LINKS)
+
+    def build(self, scene):
+        self.builder.set_scene(scene)
+        for link_builder in self.builder.link_builders:
+            link_builder.set_scene(scene)
+        return self.builder.build()
+
+    def tcp_link(self, robot):
+        return robot.get_links()[self.tcp_index]
+
+    def finger_links(self, robot):
+        links = robot.get_links()
+        return tuple(links[i] for i in self.finger_indices)
+
+
+def get_robot_asset(urdf_path: str, scene, headless: bool = False) -> RobotAsset:
+    """
+    同一进程内复用 RobotAsset。URDF 加载器在解析时记下当前的默认物理材质，
+    所以材质参数也作为缓存键的一部分 (默认材质变了就重新解析)
+    """
+    m = sapien.physx.get_default_material()
+    key = (urdf_path, headless, (m.static_friction, m.dynamic_friction, m.restitution))
+    if key not in _assets:
+        _assets[key] = RobotAsset(urdf_path, scene, headless)
+    return _assets[key]
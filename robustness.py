@@ -0,0 +1,163 @@
+# robustness.py — 蒙特卡洛鲁棒性：每个 proposal 在 TCP 位置 / 朝向噪声下采样 M 次，估计抓取成功概率
+from __future__ import annotations
+import argparse
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+
+import pose_math as pm
+from fidelity import DEFAULT_FIDELITY, FIDELITY_PROFILES
+
+DEFAULT_SAMPLES = 16
+POS_NOISE = 0.005     # TCP 位置噪声，每轴标准差 (m)
+ROT_NOISE = 5.0       # 朝向噪声，绕随机轴旋转角的标准差 (度)，以 TCP 为中心
+SAMPLE_SEP = "~"      # 样本名：<proposal 名>~<序号>
+
+
+# ------------------- 采样 -------------------
+def perturb(tcp, quat, m: int, pos_sigma: float, rot_sigma_deg: float, rng):
+    """围绕 (tcp, quat) 采样 m 个位姿，返回 (m,3) tcp 和 (m,4) quat (wxyz)"""
+    tcps = np.asarray(tcp) + rng.normal(scale=pos_sigma, size=(m, 3)).astype(np.asarray(tcp).dtype)
+    axes = rng.normal(size=(m, 3))
+    angles = rng.normal(scale=np.deg2rad(rot_sigma_deg), size=m)
+    quats = pm.quat_mul(pm.axangle_to_quat(axes, angles), np.asarray(quat, dtype=np.float64))
+    return tcps, quats
+
+
+def make_samples(proposals, m: int, pos_sigma=POS_NOISE, rot_sigma_deg=ROT_NOISE, seed=0):
+    """
+    proposals: [(tcp, quat, key, grasp), ...] (见 test_main.load_proposals) → 每个 proposal m 个扰动样本，
+    格式相同、名字为 key~i。随机数按 (seed, proposal 名) 取种，与选了哪些 proposal、顺序无关
+    """
+    samples = []
+    for tcp, quat, key, grasp in proposals:
+        rng = np.random.default_rng([seed, zlib.crc32(key.encode("utf-8"))])
+        tcps, quats = perturb(tcp, quat, m, pos_sigma, rot_sigma_deg, rng)
+        samples.extend((t, q, f"{key}{SAMPLE_SEP}{i}", grasp) for i, (t, q) in enumerate(zip(tcps, quats)))
+    return samples
+
+
+def wilson_interval(k: int, n: int, z: float = 1.96):
+    """二项比例的 Wilson 置信区间 (n 小、p 接近 0/1 时比正态近似可靠)"""
+    if n == 0:
+        return 0.0, 1.0
+    p = k / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return float(max(0.0, center - half)), float(min(1.0, center + half))
+
+
+# ------------------- 仿真 -------------------
+def run_samples(glb_path, samples, workers=1, tiles=1, sim_kwargs=None, episode_kwargs=None, prefilter=True):
+    """
+    仿真全部样本，返回 {样本名: 是否成功}。物体和手爪只加载一次并在样本之间复用：
+    workers > 1 时每个进程一个 WarmScene；tiles > 1 时同一场景里平铺 K 组；否则单个 WarmScene 依次跑。
+    prefilter=True 时先做几何预筛，初始就穿入物体 / 两指间没有物体的样本直接记为失败。
+    """
+    from test_main import WarmScene, run_single_proposal, prefilter_proposals
+    from parallel_utils import run_proposals_parallel
+    from tiled_scene import run_proposals_tiled
+
+    sim_kwargs = dict(sim_kwargs or {}, headless=True)
+    episode_kwargs = episode_kwargs or {}
+    todo, rejected = prefilter_proposals(glb_path, samples, enabled=prefilter)
+    if workers > 1 and len(todo) > 1:
+        results = run_proposals_parallel(glb_path, todo, workers, reuse_scene=True, sim_kwargs=sim_kwargs,
+                                         episode_kwargs=episode_kwargs)
+    elif tiles > 1 and len(todo) > 1:
+        results = run_proposals_tiled(glb_path, todo, tiles, **sim_kwargs, episode_kwargs=episode_kwargs)
+    else:
+        warm = WarmScene(glb_path, with_viewer=False, **sim_kwargs) if todo else None
+        results = [run_single_proposal(glb_path, (tcp, quat, key), grasp, with_viewer=False, warm=warm,
+                                       **sim_kwargs, **episode_kwargs)
+                   for tcp, quat, key, grasp in todo]
+    ok = {key: grasp_data is not None for key, grasp_data in results}
+    if prefilter:
+        ok.update(dict.fromkeys(rejected, False))
+    return ok
+
+
+def score_proposals(proposals, samples_ok: dict, m: int):
+    """按 proposal 汇总样本结果：{key: {samples, success, p, ci95}} (与 proposals 顺序相同)"""
+    scores = {}
+    for _, _, key, _ in proposals:
+        k = sum(samples_ok[f"{key}{SAMPLE_SEP}{i}"] for i in range(m))
+        scores[key] = {"samples": m, "success": k, "p": k / m, "ci95": list(wilson_interval(k, m))}
+    return scores
+
+
+def robustness_path(task_name: str) -> str:
+    """与 batch_res 同目录的 robust_{task_name}.yml"""
+    from test_main import batch_result_path
+
+    return os.path.join(os.path.dirname(batch_result_path(task_name)), f"robust_{task_name}.yml")
+
+
+if __name__ == "__main__":
+    from compare_fidelity import select_tasks
+    from result_log import atomic_write_yaml
+    from test_main import TASK_FILE, SimParams, load_proposals
+
+    parser = argparse.ArgumentParser(description="在位姿噪声下多次采样每个 proposal，估计抓取成功概率")
+    parser.add_argument("--task", type=str, help="任务类别 (默认全部文件齐全的任务)")
+    parser.add_argument("--id", type=str, help="任务编号")
+    parser.add_argument("--proposal", type=str, nargs="+", help="只评估这些 proposal")
+    parser.add_argument("--limit", type=int, default=0, help="每个任务最多评估前 N 个 proposal (0 为全部)")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="每个 proposal 的扰动样本数 M")
+    parser.add_argument("--pos-noise", type=float, default=POS_NOISE, help="TCP 位置噪声的每轴标准差 (m)")
+    parser.add_argument("--rot-noise", type=float, default=ROT_NOISE, help="朝向噪声的旋转角标准差 (度)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="并行进程数 (默认 CPU 核数)")
+    parser.add_argument("--tiles", type=int, default=1, help="单进程时同一场景平铺的组数 (见 test_main --tiles)")
+    parser.add_argument("--fidelity", choices=tuple(FIDELITY_PROFILES), default=DEFAULT_FIDELITY, help="仿真精度档位")
+    parser.add_argument("--early-exit", action="store_true", help="抓取阶段收敛时提前判定失败 (见 test_main --early-exit)")
+    parser.add_argument("--no-prefilter", action="store_true", help="关闭几何预筛，全部样本都仿真")
+    parser.add_argument("--out", type=str, help="另外把全部任务的结果写成一个 JSON")
+    args = parser.parse_args()
+    if args.samples < 1:
+        parser.error("--samples 至少为 1")
+
+    jobs = select_tasks(TASK_FILE, args.task, args.id)
+    config = {"samples": args.samples, "pos_noise": args.pos_noise, "rot_noise_deg": args.rot_noise,
+              "seed": args.seed, "fidelity": args.fidelity, "early_exit": args.early_exit}
+    report = {}
+    t_start = time.perf_counter()
+    for idx, (name, cfg, glb) in enumerate(jobs, 1):
+        proposals = load_proposals(cfg, args.proposal)
+        if args.limit:
+            proposals = proposals[:args.limit]
+        samples = make_samples(proposals, args.samples, args.pos_noise, args.rot_noise, args.seed)
+        print(f"\n[PROGRESS] [{idx}/{len(jobs)}] {name} ({len(proposals)} 个 proposal x {args.samples} 个样本)")
+        t0 = time.perf_counter()
+        sim = SimParams(early_exit=args.early_exit, fidelity=args.fidelity)
+        samples_ok = run_samples(glb, samples, args.workers, args.tiles, dict(sim=sim),
+                                 prefilter=not args.no_prefilter)
+        scores = score_proposals(proposals, samples_ok, args.samples)
+        seconds = time.perf_counter() - t0
+        report[name] = {"seconds": seconds, "proposals": scores}
+
+        out_path = robustness_path(name)
+        atomic_write_yaml(out_path, dict(config, proposals=scores))
+        print(f"[INFO] 🎲 {name}: {len(samples)} 个样本用时 {seconds:.1f} s ({len(samples) / max(seconds, 1e-9):.1f} 个/s)，"
+              f"已保存到 {out_path}")
+
+    print(f"\n[INFO] 📊 位姿噪声 σ_pos={args.pos_noise * 1e3:.1f} mm, σ_rot={args.rot_noise:.1f}°, "
+          f"每个 proposal {args.samples} 个样本")
+    print(f"{'task':<16} {'proposal':<14} {'ok':>7} {'p':>6} {'95% CI':>15}")
+    for name, r in report.items():
+        for key, s in sorted(r["proposals"].items(), key=lambda x: -x[1]["p"]):
+            lo, hi = s["ci95"]
+            print(f"{name:<16} {key:<14} {s['success']:>3}/{s['samples']:<3} {s['p']:>6.2f} {f'[{lo:.2f}, {hi:.2f}]':>15}")
+    total = sum(len(r["proposals"]) for r in report.values()) * args.samples
+    if total:
+        print(f"[INFO] 共 {total} 个样本，用时 {time.perf_counter() - t_start:.1f} s")
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(dict(config, tasks=report), f, ensure_ascii=False, indent=1)
+        print(f"[INFO] 结果已写入 {args.out}")
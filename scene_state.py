@@ -0,0 +1,63 @@
+# scene_state.py — 一组 物体 + 手爪 的物理状态快照：位姿、速度、关节位置/速度、驱动目标和 Gripper 力缓存
+
+from __future__ import annotations
+import numpy as np
+import sapien.core as sapien
+
+
+def _pose(pose, origin=None):
+    p = pose.p if origin is None else pose.p - origin
+    return [float(x) for x in p], [float(x) for x in pose.q]
+
+
+def _as_pose(pq, origin=None):
+    p = np.asarray(pq[0]) if origin is None else np.asarray(pq[0]) + origin
+    return sapien.Pose(p, pq[1])
+
+
+def capture_state(actor, robot, gripper, origin=None) -> dict:
+    """
+    记下恢复这一组所需的全部状态，返回普通字典 (可 pickle / JSON 化，能跨进程传递或存盘)。
+    只涉及这一组的实体 (平铺模式下不影响其他组)，所以不用 physx_system.pack() 的整场景快照。
+    origin: 这一组在场景中的平移 (见 WarmScene)，位置按减去 origin 记录，可恢复到任意一组
+    """
+    rigid = actor.find_component_by_type(sapien.physx.PhysxRigidDynamicComponent)
+    joints = robot.get_active_joints()
+    return {
+        "actor_pose": _pose(actor.get_pose(), origin),
+        "actor_velocity": ([float(x) for x in rigid.get_linear_velocity()],
+                           [float(x) for x in rigid.get_angular_velocity()]) if rigid is not None else None,
+        "root_pose": _pose(robot.get_root_pose(), origin),
+        "root_velocity": ([float(x) for x in robot.get_root_linear_velocity()],
+                          [float(x) for x in robot.get_root_angular_velocity()]),
+        "qpos": [float(x) for x in robot.get_qpos()],
+        "qvel": [float(x) for x in robot.get_qvel()],
+        "drive_target": [float(np.ravel(j.get_drive_target())[0]) for j in joints],
+        "drive_velocity_target": [float(np.ravel(j.get_drive_velocity_target())[0]) for j in joints],
+        "force_history": (list(gripper.l_force_history), list(gripper.r_force_history)),
+    }
+
+
+def restore_state(state: dict, actor, robot, gripper, origin=None):
+    """把 capture_state 记下的状态写回 (可以是另一个场景里、或平铺的另一组里同样搭建的一组)"""
+    actor.set_pose(_as_pose(state["actor_pose"], origin))
+    rigid = actor.find_component_by_type(sapien.physx.PhysxRigidDynamicComponent)
+    if rigid is not None and state["actor_velocity"] is not None:
+        rigid.set_linear_velocity(state["actor_velocity"][0])
+        rigid.set_angular_velocity(state["actor_velocity"][1])
+        rigid.wake_up()
+
+    robot.set_root_pose(_as_pose(state["root_pose"], origin))
+    robot.set_root_linear_velocity(state["root_velocity"][0])
+    robot.set_root_angular_velocity(state["root_velocity"][1])
+    robot.set_qpos(np.asarray(state["qpos"], dtype=np.float32))
+    robot.set_qvel(np.asarray(state["qvel"], dtype=np.float32))
+    for j, target, vel in zip(robot.get_active_joints(), state["drive_target"], state["drive_velocity_target"]):
+        j.set_drive_target(target)
+        j.set_drive_velocity_target(vel)
+
+    gripper.l_force_history.clear()
+    gripper.l_force_history.extend(state["force_history"][0])
+    gripper.r_force_history.clear()
+    gripper.r_force_history.extend(state["force_history"][1])
+    gripper.invalidate_contacts()
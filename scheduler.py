@@ -0,0 +1,157 @@
+# scheduler.py — --all 跨任务调度：把所有 (task, id, proposal) 摊平成一个队列，按估计耗时从大到小分发
+
+from __future__ import annotations
+import json
+import os
+import struct
+
+from parallel_utils import iter_parallel, new_cutoffs
+
+# 代价模型的权重 (单位：相对值，只用于排序)
+FACES_PER_UNIT = 1000.0   # 每 1000 个三角面约等于一个基准 proposal 的耗时
+SETUP_WEIGHT = 0.5        # 建场景 (加载/烘焙网格) 相对一次 proposal 仿真的耗时
+
+
+def glb_face_count(glb_path: str):
+    """
+    只读取 GLB 的 JSON 头统计三角面数 (不解码网格数据)。
+    文件缺失/损坏/非 GLB 时返回 None。
+    """
+    try:
+        with open(glb_path, "rb") as f:
+            magic, _, _ = struct.unpack("<4sII", f.read(12))
+            chunk_len, chunk_type = struct.unpack("<I4s", f.read(8))
+            if magic != b"glTF" or chunk_type != b"JSON":
+                return None
+            gltf = json.loads(f.read(chunk_len))
+    except (OSError, struct.error, ValueError):
+        return None
+
+    accessors = gltf.get("accessors", [])
+    meshes = gltf.get("meshes", [])
+
+    def mesh_faces(mesh_idx):
+        n = 0
+        for prim in meshes[mesh_idx].get("primitives", []):
+            if prim.get("mode", 4) != 4:   # 只统计 TRIANGLES
+                continue
+            if "indices" in prim:
+                n += accessors[prim["indices"]]["count"] // 3
+            else:
+                n += accessors[prim["attributes"]["POSITION"]]["count"] // 3
+        return n
+
+    try:
+        nodes = [n for n in gltf.get("nodes", []) if "mesh" in n]
+        if nodes:
+            return sum(mesh_faces(n["mesh"]) for n in nodes)
+        return sum(mesh_faces(i) for i in range(len(meshes)))
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def estimate_unit_cost(face_count, num_proposals: int, reuse_scene=False):
+    """
+    估计单个 proposal 的相对耗时：
+    仿真部分随三角面数增长；建场景部分复用场景时由该任务的所有 proposal 分摊。
+    """
+    complexity = 1.0 + (face_count or 0) / FACES_PER_UNIT
+    setup = SETUP_WEIGHT * complexity
+    if reuse_scene:
+        setup /= max(num_proposals, 1)
+    return complexity + setup
+
+
+def plan_units(task_proposals: dict, reuse_scene=False, face_counts=None):
+    """
+    task_proposals: {task_name: (glb_path, [(tcp, quat, key, grasp), ...])}
+    返回按估计代价从大到小排序的 [(cost, task_name, idx, glb_path, tcp, quat, key, grasp), ...]
+    (同一任务的 proposal 相邻，便于 worker 复用场景)
+    """
+    face_counts = face_counts or {}
+    units = []
+    for task_name, (glb_path, proposals) in task_proposals.items():
+        faces = face_counts.get(glb_path)
+        if faces is None:
+            faces = glb_face_count(glb_path)
+        cost = estimate_unit_cost(faces, len(proposals), reuse_scene)
+        for idx, (tcp, quat, key, grasp) in enumerate(proposals):
+            units.append((cost, task_name, idx, glb_path, tcp, quat, key, grasp))
+    units.sort(key=lambda u: (-u[0], u[1], u[2]))
+    return units
+
+
+def run_scheduled(task_proposals: dict, workers: int, reuse_scene=False, on_task_done=None, sim_kwargs=None,
+                  face_counts=None, episode_kwargs=None, stats=None, quotas=None, on_result=None):
+    """
+    把所有任务的 proposal 放进同一个进程池，最长优先 (LPT) 分发。
+    每完成一个 proposal 打印一次进度；某任务的 proposal 全部完成时
+    按原 ranking 顺序回调 on_task_done(task_name, [(key, grasp_data), ...])。
+    face_counts: {glb_path: 三角面数} (如来自 MeshIndex)，缺失的从 GLB 头读取。
+    stats: 传入 list 时按完成顺序追加每个 proposal 的统计 (见 test_main.proposal_episode)。
+    quotas: {task_name: TopKQuota}，某任务配额满时立即回调 (只含已评估的 proposal)，
+            并通过共享取消表跳过/放弃该任务剩余的 proposal；所有任务都完成后提前结束。
+    on_result: 每评估完一个 proposal 立即回调 on_result(task_name, key, grasp_data) (完成顺序)。
+    """
+    quotas = quotas or {}
+    units = plan_units(task_proposals, reuse_scene, face_counts)
+    total_cost = sum(u[0] for u in units) or 1.0
+    cost_of = {(u[1], u[2]): u[0] for u in units}
+
+    pending = {name: len(props) for name, (_, props) in task_proposals.items()}
+    results = {name: [None] * len(props) for name, (_, props) in task_proposals.items()}
+    finished = set()
+
+    def finish(name):
+        finished.add(name)
+        if on_task_done is not None:
+            on_task_done(name, [r for r in results[name] if r is not None])
+
+    # 没有 proposal (或配额已由缓存结果凑满) 的任务直接完成
+    for name, n in pending.items():
+        if n == 0 or (name in quotas and quotas[name].finished()):
+            finish(name)
+    if not units:
+        return results   # 全部命中缓存 / 续跑日志：不必启动进程池
+
+    group_of = {name: i for i, name in enumerate(task_proposals)}
+    cutoffs = new_cutoffs(len(group_of)) if quotas else None
+    jobs = [((task_name, idx), glb_path, tcp, quat, key, grasp,
+             (group_of[task_name], quotas[task_name].pos[key]) if task_name in quotas else None)
+            for _, task_name, idx, glb_path, tcp, quat, key, grasp in units]
+
+    done_cost = 0.0
+    jobs_iter = iter_parallel(jobs, workers, reuse_scene, sim_kwargs, episode_kwargs, cutoffs)
+    for done, ((task_name, idx), key, grasp_data, one_stats) in enumerate(jobs_iter, 1):
+        done_cost += cost_of[(task_name, idx)]
+        pending[task_name] -= 1
+        if one_stats.get("cancelled") or task_name in finished:
+            print(f"[PROGRESS] [{done}/{len(jobs)}] {done_cost / total_cost:6.1%} {task_name} {key} ⏹️")
+            continue
+
+        results[task_name][idx] = (key, grasp_data)
+        if stats is not None:
+            stats.append(dict(one_stats, task=task_name))
+        mark = "✅" if grasp_data is not None else "❌"
+        print(f"[PROGRESS] [{done}/{len(jobs)}] {done_cost / total_cost:6.1%} {task_name} {key} {mark}")
+        if on_result is not None:
+            on_result(task_name, key, grasp_data)
+
+        quota = quotas.get(task_name)
+        if quota is not None:
+            quota.record(key, grasp_data is not None)
+            cutoffs[group_of[task_name]] = quota.cutoff
+        if pending[task_name] == 0 or (quota is not None and quota.finished()):
+            finish(task_name)
+            if len(finished) == len(task_proposals):
+                break   # 退出时进程池被终止，其余任务的在途 proposal 随之取消
+
+    return results
+
+
+def task_inputs_exist(task_name: str, cfg_path: str, glb_path: str) -> bool:
+    """检查任务的 proposal 与模型文件是否存在，缺失时打印警告"""
+    missing = [p for p in (cfg_path, glb_path) if not os.path.isfile(p)]
+    for p in missing:
+        print(f"[WARN] 任务 {task_name} 缺少文件 {p}，跳过")
+    return not missing
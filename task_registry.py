@@ -0,0 +1,246 @@
+# task_registry.py — 任务注册表：task.yml + 自动发现的任务目录，带 mtime 校验的索引缓存，按名字 / 通配符选任务
+
+from __future__ import annotations
+import argparse
+import fnmatch
+import glob
+import json
+import os
+
+import yaml
+
+TASK_FILE = "grasp/task/task.yml"
+INDEX_NAME = "task_index.json"
+INDEX_VERSION = 3
+# 自动发现：task/<类别>/<编号>/ (或 task/<类别>/) 下同时有 proposal 文件和 *_scaled.glb 的目录
+CONFIG_NAME = "graspgen_proposals_topk.yml"
+MODEL_GLOB = "*_scaled.glb"
+
+_registries = {}   # (task_file, discover) → TaskRegistry，同一进程内只加载一次
+
+
+def default_index_path(task_file: str = TASK_FILE) -> str:
+    """
+    grasp/task/task.yml → grasp/.cache/task_index.json。不放在任务目录里：写索引会改变被校验的目录 mtime；
+    用 JSON 是因为读索引必须比解析 task.yml 快
+    """
+    return os.path.join(os.path.dirname(os.path.dirname(task_file)) or ".", ".cache", INDEX_NAME)
+
+
+def _mtime(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _subdirs(path: str):
+    return sorted(p for p in glob.glob(os.path.join(path, "*")) if os.path.isdir(p))
+
+
+def discover_dir(d: str):
+    """d 下同时有 proposal 文件和 *_scaled.glb 时返回 {"config", "model"}，否则 None (没有 proposal 文件时不列目录)"""
+    cfg = os.path.join(d, CONFIG_NAME)
+    if not os.path.isfile(cfg):
+        return None
+    models = sorted(glob.glob(os.path.join(d, MODEL_GLOB)))
+    return {"config": cfg, "model": models[0]} if models else None
+
+
+def parse_task_file(task_file: str):
+    """task.yml → {任务名: {"config", "model"}}，两层的任务名为 类别.编号"""
+    with open(task_file, "r", encoding="utf-8") as f:
+        tasks = (yaml.safe_load(f) or {}).get("tasks", {}) or {}
+    entries = {}
+    for tname, tval in tasks.items():
+        if "config" in tval and "model" in tval:
+            entries[str(tname)] = {"config": tval["config"], "model": tval["model"]}
+        else:
+            for sub, sub_cfg in tval.items():
+                entries[f"{tname}.{sub}"] = {"config": sub_cfg["config"], "model": sub_cfg["model"]}
+    return entries
+
+
+def discover_tasks(task_dir: str):
+    """
+    扫描 task_dir 下的类别 / 编号目录，返回 ({任务名: {"config", "model"}}, 校验签名)。签名包括：
+      dirs     task_dir、各类别目录和各编号目录的 mtime
+      subdirs  task_dir 和各类别目录的子目录列表
+      names    类别 / 编号目录 → 对应的任务名
+    """
+    entries = {}
+    sig = {"dirs": {task_dir: _mtime(task_dir)}, "subdirs": {}, "names": {}}
+    sig["subdirs"][task_dir] = _subdirs(task_dir)
+    for cat_dir in sig["subdirs"][task_dir]:
+        sig["subdirs"][cat_dir] = _subdirs(cat_dir)
+        candidates = [(os.path.basename(cat_dir), cat_dir)]
+        candidates += [(f"{os.path.basename(cat_dir)}.{os.path.basename(d)}", d) for d in sig["subdirs"][cat_dir]]
+        for name, d in candidates:
+            sig["dirs"][d] = _mtime(d)
+            sig["names"][d] = name
+            entry = discover_dir(d)
+            if entry is not None:
+                entries[name] = entry
+    return entries, sig
+
+
+def refresh_discovery(sig: dict, found: dict):
+    """
+    按 discover_tasks 的签名校验上次的发现结果 found：每个目录只 stat 一次，mtime 变了的目录才重新检查
+    (运行结果 batch_res / .log.jsonl / .proposals.npz 写在编号目录里，会改变其 mtime)。
+    返回 None → 子目录或任务有增删改，需要重新扫描；否则返回是否有目录只是 mtime 变了 (签名已就地更新)
+    """
+    touched = False
+    for d, old in sig.get("dirs", {}).items():
+        now = _mtime(d)
+        if now == old:
+            continue
+        if now is None:
+            return None
+        if d in sig["subdirs"] and _subdirs(d) != sig["subdirs"][d]:
+            return None
+        name = sig["names"].get(d)
+        if name is not None and discover_dir(d) != found.get(name):
+            return None
+        sig["dirs"][d] = now
+        touched = True
+    return touched
+
+
+class TaskRegistry:
+    """
+    全部任务的 {名字: (config, model)}：task.yml 中登记的在前 (顺序不变)，自动发现但未登记的按名字排在后面。
+    解析结果缓存为 grasp/.cache/task_index.json：task.yml 的 mtime/size 没变、任务目录树的各目录 mtime 也没变
+    (每个目录 stat 一次) 时直接读缓存，不解析 YAML、不列目录；mtime 变了的目录只重新检查这一个
+    (见 refresh_discovery)。之后按名字查找是字典查询，不做文件 I/O。
+    """
+
+    def __init__(self, task_file: str = TASK_FILE, discover: bool = True, index_path: str | None = None):
+        self.task_file = task_file
+        self.discover = discover
+        self.index_path = index_path or default_index_path(task_file)
+        self.tasks = self._load_index()
+        if self.tasks is None:
+            self.tasks = self._build()
+
+    # ---- 索引缓存 ----
+    def _signature(self):
+        st = os.stat(self.task_file)
+        return {"mtime": st.st_mtime_ns, "size": st.st_size}
+
+    def _load_index(self):
+        if not os.path.isfile(self.index_path):
+            return None
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except ValueError:
+            return None
+        if (data.get("version") != INDEX_VERSION or data.get("discover") != self.discover
+                or data.get("task_file") != self._signature()):
+            return None
+        if self.discover:
+            touched = refresh_discovery(data.get("discovery") or {}, data.get("found") or {})
+            if touched is None:
+                return None
+            if touched:   # 只是运行结果改了编号目录的 mtime：记下新的 mtime，下次不再检查
+                self._write_index(data)
+        return data.get("tasks") or {}
+
+    def _build(self):
+        tasks = parse_task_file(self.task_file)
+        found, discovery = {}, {}
+        if self.discover:
+            found, discovery = discover_tasks(os.path.dirname(self.task_file))
+            for name in sorted(found):
+                tasks.setdefault(name, found[name])
+        self._write_index({"version": INDEX_VERSION, "discover": self.discover, "task_file": self._signature(),
+                           "discovery": discovery, "found": found, "tasks": tasks})
+        return tasks
+
+    def _write_index(self, data: dict):
+        tmp = self.index_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.index_path)
+        except OSError as e:   # 只读目录等：索引只是加速，不影响结果
+            print(f"[WARN] 任务索引写入失败: {e}")
+
+    # ---- 查询 ----
+    def names(self):
+        return list(self.tasks)
+
+    def categories(self):
+        return list(dict.fromkeys(name.split(".")[0] for name in self.tasks))
+
+    def get(self, name: str):
+        """返回 (config, model)"""
+        try:
+            entry = self.tasks[name]
+        except KeyError:
+            raise ValueError(f"任务 {name} 不存在 ({self.task_file} 中未登记，任务目录下也未发现)") from None
+        return entry["config"], entry["model"]
+
+    def select(self, pattern: str | None = None):
+        """
+        按 pattern 选任务，返回任务名列表 (注册表顺序)：
+        None → 全部；完整任务名 (bowl.002) → 该任务；类别名 (bowl) → 该类全部任务；
+        其他按通配符匹配任务名 (bowl.00*、*.002)
+        """
+        if pattern is None:
+            return self.names()
+        if pattern in self.tasks:
+            return [pattern]
+        names = [n for n in self.tasks if n.split(".")[0] == pattern]
+        if not names:
+            names = fnmatch.filter(self.tasks, pattern)
+        if not names:
+            raise ValueError(f"没有匹配 {pattern} 的任务")
+        return names
+
+    def missing(self, name: str):
+        """任务缺少的输入文件 (proposal / 模型)"""
+        return [p for p in self.get(name) if not os.path.isfile(p)]
+
+    def validate(self, names=None):
+        """返回 {任务名: [缺少的文件]}，只含不完整的任务"""
+        return {n: m for n in (self.names() if names is None else names) if (m := self.missing(n))}
+
+
+def load_registry(task_file: str = TASK_FILE, discover: bool = True) -> TaskRegistry:
+    """同一进程内复用已加载的注册表"""
+    key = (task_file, discover)
+    if key not in _registries:
+        _registries[key] = TaskRegistry(task_file, discover)
+    return _registries[key]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="列出 / 校验注册的任务")
+    parser.add_argument("pattern", nargs="?", help="任务名、类别名或通配符 (如 bowl.00*、*.002)，默认全部")
+    parser.add_argument("--task-file", type=str, default=TASK_FILE, help="task.yml 路径")
+    parser.add_argument("--no-discover", action="store_true", help="只用 task.yml，不扫描任务目录")
+    parser.add_argument("--rebuild", action="store_true", help="忽略已有索引，重新解析和扫描")
+    args = parser.parse_args()
+
+    index_path = default_index_path(args.task_file)
+    if args.rebuild and os.path.isfile(index_path):
+        os.remove(index_path)
+    registry = load_registry(args.task_file, discover=not args.no_discover)
+    try:
+        names = registry.select(args.pattern)
+    except ValueError as e:
+        parser.error(str(e))
+    invalid = registry.validate(names)
+    registered = parse_task_file(args.task_file) if not args.no_discover else registry.tasks
+
+    for name in names:
+        config, model = registry.get(name)
+        mark = "❌" if name in invalid else "✅"
+        origin = "" if name in registered else "  (自动发现)"
+        print(f"{mark} {name:<24} {config}  {model}{origin}")
+    print(f"[INFO] {len(names)} 个任务，{len(names) - len(invalid)} 个文件齐全")
+    for name, files in invalid.items():
+        print(f"[WARN] 任务 {name} 缺少文件 {', '.join(files)}")
@@ -1,22 +1,42 @@
-# test_main.py — 使用 Gripper + 力反馈 (每个 proposal 重建场景)
+# test_main.py — 使用 Gripper + 力反馈 (默认每个 proposal 重建场景，--reuse-scene 时复用)
 from __future__ import annotations
 import argparse
+import cProfile
+import marshal
+import time
 import numpy as np
 import sapien.core as sapien
-import trimesh
-import yaml
 import os
 
 # === 自定义模块 ===
 from load_glb import load_my_object
 from math_utils import world_to_object
+import pose_math as pm
 from float_utils import make_float
 from world import create_world
 from physx_utils import setup_physx_defaults, set_damping_if_dynamic
 from gripper_demo import Gripper
-
-# transforms3d
-from transforms3d.quaternions import axangle2quat, qmult, qinverse
+from parallel_utils import run_proposals_parallel
+from tiled_scene import run_proposals_tiled
+from scheduler import run_scheduled, task_inputs_exist
+from collision_cache import CollisionCache, DEFAULT_CACHE_DIR, get_default_cache
+from collision_lod import DEFAULT_LOD, LOD_LEVELS, lod_params
+from convex_decomp import DEFAULT_DECOMP, DECOMP_METHODS, method_params
+from mesh_index import load_mesh_index
+from convergence import ConvergenceMonitor, report_early_exit, CONVERGE_WINDOW
+from result_store import ResultStore, DEFAULT_DB_PATH
+from proposal_arrays import load_proposal_arrays
+from prefilter import load_triangles, screen, report_prefilter
+from topk import TopKQuota, Cancelled, priority_order, CANCEL_CHECK_EVERY, PRIORITIES
+from profiler import PhaseProfile, ProfileReport, DEFAULT_PROFILE_PATH
+from result_log import ResultLog, log_path, atomic_write_yaml
+from result_table import ResultTable, DEFAULT_TABLE_DIR
+from hash_utils import file_sha1
+from task_registry import load_registry
+from robot_asset import get_robot_asset
+from scene_state import capture_state, restore_state
+from fidelity import (DEFAULT_FIDELITY, FIDELITY_PROFILES, fidelity_params, apply_fidelity, configure_articulation,
+                      scaled_steps)
 
 # === 参数 ===
 OFFSET = 0.5
@@ -24,7 +44,73 @@ MOVE_SPEED = 0.25
 ROT_SPEED = 1.0
 SCALE_OBJ = 1
 TASK_FILE = "grasp/task/task.yml"
+URDF_PATH = "grasp/panda/panda_hand.urdf"
 threshold = 0.01
+MAX_GRASP_STEPS = 2000   # 没有 viewer 时抓取阶段的最大步数 (按 1/100 s 步长，其他精度档位按时长换算)
+TIMESTEP = fidelity_params(DEFAULT_FIDELITY)["timestep"]
+OBJ_FRICTION = 10
+OBJ_RESTITUTION = 0.3
+MOTIONS = ((0, 0, 0.1), (0.1, 0, 0), (0, 0.1, 0))   # 动作稳定性检测：依次沿 +z / +x / +y 以 0.1 m/s 移动手爪
+
+
+class SimParams:
+    """
+    影响判定结果的仿真选项，由命令行建一次后整体往下传 (WarmScene / run_single_proposal / prepare_task ...)，
+    不再逐个参数穿过每一层。可 pickle，多进程时原样传给 worker
+    """
+
+    def __init__(self, early_exit=False, fidelity=DEFAULT_FIDELITY, branch_motions=False, collision_lod=DEFAULT_LOD,
+                 collision_decomp=DEFAULT_DECOMP, triangle_fallback=()):
+        self.early_exit = bool(early_exit)          # 抓取阶段收敛时提前判定失败 (见 proposal_episode)
+        self.fidelity = fidelity                    # 精度档位 (见 fidelity.py)
+        self.branch_motions = bool(branch_motions)  # 动作检测都从抓稳快照出发 (见 _motion_checks)
+        self.collision_lod = collision_lod          # 物体碰撞体的 LOD 档位 (见 collision_lod.py)
+        self.collision_decomp = collision_decomp    # 物体碰撞体的多凸包分解方法 (见 convex_decomp.py)
+        # 分解不出可用凸包、改用三角网格碰撞体的 GLB (由 prepare_collision_meshes 记下，见 for_model)
+        self.triangle_fallback = tuple(sorted(set(triangle_fallback)))
+
+    def replace(self, **changes) -> "SimParams":
+        """改了部分选项的副本"""
+        return SimParams(**dict(vars(self), **changes))
+
+    def for_model(self, glb_path) -> "SimParams":
+        """
+        对这个物体实际生效的选项：凸分解失败的 GLB 按不分解 (none) 加载，结果缓存键 / 结果日志头也按 none 记，
+        与实际仿真一致
+        """
+        if glb_path not in self.triangle_fallback:
+            return self
+        return self.replace(collision_decomp=DEFAULT_DECOMP, triangle_fallback=())
+
+    def __eq__(self, other):
+        return isinstance(other, SimParams) and vars(self) == vars(other)
+
+    def __repr__(self):
+        return "SimParams(" + ", ".join(f"{k}={v!r}" for k, v in vars(self).items()) + ")"
+
+
+def sim_params(sim: SimParams | None = None):
+    """影响判定结果的仿真参数 (结果缓存键的一部分)，由 SimParams 得到"""
+    sim = sim or SimParams()
+    params = {
+        "offset": OFFSET,
+        "scale": SCALE_OBJ,
+        "threshold": threshold,
+        "max_grasp_steps": MAX_GRASP_STEPS,
+        "timestep": TIMESTEP,
+        "friction": OBJ_FRICTION,
+        "restitution": OBJ_RESTITUTION,
+        "early_exit": sim.early_exit,
+    }
+    if sim.fidelity != DEFAULT_FIDELITY:   # default 档不写入，已有的缓存结果仍然有效
+        params["fidelity"] = dict(fidelity_params(sim.fidelity))
+    if sim.branch_motions:   # 同上，默认的依次检测不写入
+        params["motions"] = "branch"
+    if sim.collision_lod != DEFAULT_LOD:   # 同上，full 不写入
+        params["collision_lod"] = dict(lod_params(sim.collision_lod))
+    if sim.collision_decomp != DEFAULT_DECOMP:   # 同上，auto 按实际使用的方法记
+        params["collision_decomp"] = method_params(sim.collision_decomp)
+    return params
 
 
 # ------------------- 计算抓取位姿 -------------------
@@ -35,86 +121,205 @@ def compute_pose_in_obj(gripper, robot, actor):
 
     tcp_in_obj = world_to_object(obj_pose, tcp_world, align_axis=True)
 
-    # 世界系下 gripper 的四元数 (xyzw → wxyz)
-    quat_xyzw = robot.get_root_pose().q
-    quat_wxyz = np.array([quat_xyzw[3], *quat_xyzw[:3]])
-
-    # 去掉 90° 补偿
-    rot_local_z90 = axangle2quat([0, 0, 1], np.deg2rad(90))
-    quat_wxyz_no90 = qmult(quat_wxyz, qinverse(rot_local_z90))
+    # 世界系下 gripper 的四元数 (xyzw → wxyz)，去掉 90° 补偿
+    quat_wxyz = pm.xyzw_to_wxyz(robot.get_root_pose().q)
+    quat_wxyz_no90 = pm.quat_mul(quat_wxyz, pm.quat_inverse(pm.ROT_Z90))
 
     # 世界 → 物体系
-    obj_q_wxyz = [obj_pose.q[3], obj_pose.q[0], obj_pose.q[1], obj_pose.q[2]]
-    quat_in_obj = qmult(qinverse(obj_q_wxyz), quat_wxyz_no90)
+    obj_q_wxyz = pm.xyzw_to_wxyz(np.asarray(obj_pose.q, dtype=np.float64))
+    quat_in_obj = pm.quat_world_to_object(obj_q_wxyz, quat_wxyz_no90)
 
     return tcp_in_obj, quat_in_obj
 
 
 # ------------------- Panda 手爪加载 -------------------
-def setup_robot(scene, tcp_world, quat_new):
-    urdf_loader = scene.create_urdf_loader()
-    urdf_loader.fix_root_link = False
-    robot = urdf_loader.load("grasp/panda/panda_hand.urdf")
-
-    make_float(robot, height=OFFSET)
-    for link in robot.get_links():
-        link.set_disable_gravity(True)
-
-    # 初始位置
-    robot.set_root_pose(sapien.Pose([0, 0, OFFSET], quat_new))
+def place_robot(robot, tcp_world, quat_new, origin=None, tcp_link=None):
+    """
+    把手爪摆到 proposal 位姿：先按四元数旋转，再平移使 tcp_link 落在 proposal 点
+    origin: 这一组 物体/手爪 在场景中的平移 (多组平铺时)，None → 原点
+    tcp_link: 已查好的 tcp link (见 RobotAsset.tcp_link)，None → 按名字查找
+    """
+    base = np.array([0, 0, OFFSET]) if origin is None else np.array([0, 0, OFFSET]) + origin
+    robot.set_root_pose(sapien.Pose(base, quat_new))
 
     # 平移 tcp_link 到 proposal
-    tcp_link = [l for l in robot.get_links() if l.get_name() == "tcp"][0]
-    delta = tcp_world + np.array([0, 0, OFFSET]) - tcp_link.get_entity_pose().p
+    if tcp_link is None:
+        tcp_link = [l for l in robot.get_links() if l.get_name() == "tcp"][0]
+    delta = tcp_world + base - tcp_link.get_entity_pose().p
     root_pose = robot.get_root_pose()
     root_pose.set_p(root_pose.p + delta)
     robot.set_root_pose(root_pose)
 
-    return robot
 
+def setup_robot(scene, tcp_world, quat_new, headless=False, origin=None, fidelity=DEFAULT_FIDELITY):
+    # URDF 每个进程只解析一次 (headless 时去掉所有 link 的可视网格，只保留碰撞体)
+    asset = get_robot_asset(URDF_PATH, scene, headless)
+    robot = asset.build(scene)
 
-# ------------------- 单个 proposal 测试 -------------------
-def run_single_proposal(glb_path, proposal, grasp, with_viewer=True):
-    tcp, quat, key = proposal
+    make_float(robot, height=OFFSET)
+    configure_articulation(robot, fidelity_params(fidelity))
+    for link in robot.get_links():
+        link.set_disable_gravity(True)
 
-    # 创建新场景
-    scene, viewer = create_world(with_viewer=with_viewer)
-    setup_physx_defaults(gravity_z=-9.8, static_mu=0.3, dynamic_mu=0.8, restitution=0.3)
+    # 初始位置
+    place_robot(robot, tcp_world, quat_new, origin, asset.tcp_link(robot))
 
-    trimesh.load(glb_path, force="mesh")
-    base_pose = sapien.Pose([0, 0, OFFSET], [1, 0, 0, 0])
+    return robot
+
+
+# ------------------- 物体加载 -------------------
+def setup_object(scene, glb_path, collision_cache=None, headless=False, origin=None, sim: SimParams | None = None):
+    sim = (sim or SimParams()).for_model(glb_path)
+    base_p = np.array([0, 0, OFFSET]) if origin is None else np.array([0, 0, OFFSET]) + origin
+    base_pose = sapien.Pose(base_p, [1, 0, 0, 0])
     actor = load_my_object(
         scene, glb_path,
         scale=(SCALE_OBJ,) * 3,
         pose=base_pose,
         build_dynamic=True,
-        friction=10,
-        restitution=0.3,
+        friction=OBJ_FRICTION,
+        restitution=OBJ_RESTITUTION,
+        collision_cache=collision_cache,
+        add_visual=not headless,
+        collision_lod=sim.collision_lod,
+        decomposition=sim.collision_decomp,
     )
     if actor:
         make_float(actor, height=OFFSET)
         set_damping_if_dynamic(actor, linear_damping=0.1, angular_damping=0.1)
+    return actor
+
+
+def prepare_collision_meshes(glb_paths, collision_cache=None, sim: SimParams | None = None):
+    """
+    在分发仿真之前生成 (或命中) 各物体简化后的碰撞网格 / 多凸包分解，多进程时不会每个 worker 各自算一遍。
+    分解不出可用凸包的物体改用三角网格碰撞体 (失败结果也有缓存，见 CollisionCache.get_parts)，记在返回的
+    SimParams.triangle_fallback 里：之后的加载和结果缓存键都经 for_model 按 none 处理，必须在查结果缓存之前调用。
+    返回 (使用的 CollisionCache，都是默认值不需要时为传入的 collision_cache；SimParams)
+    """
+    sim = sim or SimParams()
+    if sim.collision_lod == DEFAULT_LOD and sim.collision_decomp == DEFAULT_DECOMP:
+        return collision_cache, sim
+    cache = collision_cache if collision_cache is not None else get_default_cache()
+    fallback = []
+    for glb_path in dict.fromkeys(glb_paths):
+        if sim.for_model(glb_path).collision_decomp != DEFAULT_DECOMP:   # 分解优先，此时 LOD 不起作用
+            try:
+                cache.get_parts(glb_path, scale=(SCALE_OBJ,) * 3, method=sim.collision_decomp)
+                continue
+            except ValueError as e:
+                print(f"[WARN] {os.path.basename(glb_path)} 凸分解失败，改用三角网格碰撞体: {e}")
+                fallback.append(glb_path)
+        if sim.collision_lod != DEFAULT_LOD:
+            cache.get(glb_path, scale=(SCALE_OBJ,) * 3, lod=sim.collision_lod)
+    if fallback:
+        sim = sim.replace(triangle_fallback=sim.triangle_fallback + tuple(fallback))
+    return cache, sim
+
+
+# ------------------- 复用场景 -------------------
+class WarmScene:
+    """
+    每个任务只建一次 世界 / 物体 / Panda 手爪，
+    每个 proposal 开始前只重置位姿、速度、驱动目标和 Gripper 力缓存。
+    传入 scene 时不新建世界，而是把这一组 物体/手爪 平移 origin 后加到已有场景 (多组平铺)。
+    """
+
+    def __init__(self, glb_path, with_viewer=True, collision_cache=None, headless=False, scene=None, origin=None,
+                 sim: SimParams | None = None):
+        self.glb_path = glb_path
+        self.origin = origin
+        self.sim = sim = sim or SimParams()
+        params = apply_fidelity(sim.fidelity)
+        if scene is None:
+            # 先设全局默认参数再建场景，与逐个重建时第 2 个及之后的场景一致
+            setup_physx_defaults(gravity_z=-9.8, static_mu=0.3, dynamic_mu=0.8, restitution=0.3)
+            self.scene, self.viewer = create_world(params["timestep"], with_viewer=with_viewer, headless=headless)
+        else:
+            self.scene, self.viewer = scene, None
+
+        self.actor = setup_object(self.scene, glb_path, collision_cache, headless, origin, sim)
+        self.actor_pose = self.actor.get_pose()
+
+        self.robot = setup_robot(self.scene, np.zeros(3), [1, 0, 0, 0], headless, origin, sim.fidelity)
+        asset = get_robot_asset(URDF_PATH, self.scene, headless)
+        self.tcp_link = asset.tcp_link(self.robot)
+        self.gripper = Gripper(self.robot, self.scene, asset.finger_links(self.robot))
 
-    robot = setup_robot(scene, tcp, quat)
-    gripper = Gripper(robot, scene)
+    def reset(self, tcp_world, quat_new):
+        """把场景恢复到与新建场景等价的初始状态，并把手爪摆到新的 proposal"""
+        self.actor.set_pose(self.actor_pose)
+        rigid = self.actor.find_component_by_type(sapien.physx.PhysxRigidDynamicComponent)
+        if rigid is not None:
+            rigid.set_linear_velocity([0, 0, 0])
+            rigid.set_angular_velocity([0, 0, 0])
+            rigid.wake_up()
 
+        self.robot.set_root_linear_velocity([0, 0, 0])
+        self.robot.set_root_angular_velocity([0, 0, 0])
+        place_robot(self.robot, tcp_world, quat_new, self.origin, self.tcp_link)
+        self.gripper.reset()
+
+
+# ------------------- 单个 proposal 测试 -------------------
+def proposal_episode(key, grasp, actor, robot, gripper, max_steps=None, early_exit=False, audit_early_exit=False,
+                     stats=None, profile=None, branch_motions=False, keep_state=False, origin=None):
+    """
+    单个 proposal 的抓取 + 动作稳定性检测，写成生成器：
+    每次 yield 表示需要 scene.step() 一次，恢复时可 send 本组的接触列表 (None → 从 scene 读取)。
+    结束时 return grasp_result (失败为 None)。
+    max_steps: 抓取阶段的最大步数，None → 不限 (开 viewer 时)
+    early_exit: 抓取阶段收敛 (手指和物体停住仍未抓稳) 时提前判定失败
+    audit_early_exit: 只记录收敛时刻、按旧判据跑完，用于核对两者是否一致
+    stats: 传入 dict 时写入 key / ok / grasp_steps / converged_step / steps_saved，
+           以及失败原因 reason、动作检测步数 motion_steps 和三次动作的位移变化 motion_deltas
+    profile: PhaseProfile，记录 closing / motion_1..3 的耗时、步数和接触查询耗时
+    branch_motions: 每次动作都从抓稳时的快照出发 (见 _motion_checks)，默认依次接着上一次动作的状态
+    keep_state: 抓稳时的物理快照写入 stats["grasp_state"]，之后可用 run_motion_checks 只重跑动作检测
+    origin: 这一组在场景中的平移 (平铺时)，快照按相对位置记录
+    """
+    stats = {} if stats is None else stats
+    stats.update(key=key, grasp_steps=0, converged_step=None, steps_saved=0, reason=None, motion_steps=0,
+                 motion_deltas=[])
+    result = yield from _episode_steps(key, grasp, actor, robot, gripper, max_steps,
+                                       early_exit, audit_early_exit, stats, profile, branch_motions, keep_state,
+                                       origin)
+    stats["ok"] = result is not None
+    if audit_early_exit and stats["converged_step"] is not None:
+        stats["steps_saved"] = stats["grasp_steps"] - stats["converged_step"]
+    return result
+
+
+def _episode_steps(key, grasp, actor, robot, gripper, max_steps, early_exit, audit_early_exit, stats, profile,
+                   branch_motions=False, keep_state=False, origin=None):
     print(f"[INFO] ▶️ 开始测试 proposal {key}")
 
     grabbed, true_count, fail_count = False, 0, 0
-    required_frames, max_fail_frames = 10, 30
+    # 帧数/步数按 1/100 s 步长标定，其他精度档位换算成相同的仿真时长
+    dt = gripper.scene.get_timestep()
+    required_frames, max_fail_frames = scaled_steps(10, dt), scaled_steps(30, dt)
+    if max_steps is not None:
+        max_steps = scaled_steps(max_steps, dt)
     first_tcp_in_obj, first_quat_in_obj = None, None
 
     # === 抓取阶段 ===
     sim_steps = 0
-    max_steps = 2000   # 没有 viewer 时的最大步数 (大约 3 秒仿真时间)
+    # 收敛检测只是附加判据，旧的计数判据和 max_steps 仍然有效
+    monitor = ConvergenceMonitor(scaled_steps(CONVERGE_WINDOW, dt)) if (early_exit or audit_early_exit) else None
+    if profile is not None:
+        profile.enter("closing")
 
     while True:
-        gripper.control("close", actor)
-        scene.step()
-        scene.update_render()
-
-        if with_viewer:
-            viewer.render()
+        # 第一步之前 scene.get_contacts() 还是上一个 proposal 留下的接触 (复用场景时)，不参与判定
+        gripper.control("close", actor if sim_steps > 0 else None)
+        contacts = yield
+        if profile is not None:
+            profile.step()
+            t0 = time.perf_counter()
+        gripper.update_contacts(actor, contacts)   # 本步接触只遍历一次，下面的判定和下一轮 control 复用
+        if profile is not None:
+            profile.add("contacts", time.perf_counter() - t0)
+        stats["grasp_steps"] += 1
 
         status = gripper.is_grasping(actor)
         if status is True:
@@ -130,34 +335,71 @@ def run_single_proposal(glb_path, proposal, grasp, with_viewer=True):
             true_count = 0
             if fail_count >= max_fail_frames:
                 print(f"[INFO] Proposal {key} ❌ 失败（未夹住）")
-                return key, None
+                stats["reason"] = "no_grip"
+                return None
         else:
             true_count = fail_count = 0
 
+        if (monitor is not None and stats["converged_step"] is None
+                and monitor.update(robot.get_qpos(), actor.get_pose().p, status is True)):
+            stats["converged_step"] = stats["grasp_steps"]
+            if not audit_early_exit:
+                stats["steps_saved"] = max_steps - stats["grasp_steps"] if max_steps is not None else 0
+                print(f"[INFO] Proposal {key} ❌ 失败（第 {stats['grasp_steps']} 步手指与物体已停住，提前结束）")
+                stats["reason"] = "converged"
+                return None
+
         sim_steps += 1
-        if not with_viewer and sim_steps >= max_steps:
+        if max_steps is not None and sim_steps >= max_steps:
             # 没开 viewer 就按步数退出，避免死循环
             break
 
 
     if not grabbed or first_tcp_in_obj is None:
-        return key, None
+        stats["reason"] = "max_steps"
+        return None
 
     # === 动作稳定性检测 ===
-    tcp_world = gripper.get_tcp_between_fingers()
-    obj_center = actor.get_pose().p
-    last_dist = np.linalg.norm(tcp_world - obj_center)
-    motions = [(0, 0, 0.1), (0.1, 0, 0), (0, 0.1, 0)]
+    state = capture_state(actor, robot, gripper, origin) if (branch_motions or keep_state) else None
+    if keep_state:
+        stats["grasp_state"] = dict(state, tcp_in_obj=[float(x) for x in first_tcp_in_obj],
+                                    quat_in_obj=[float(x) for x in first_quat_in_obj])
+    ok = yield from _motion_checks(key, actor, robot, gripper, MOTIONS, stats, profile,
+                                   state if branch_motions else None, origin)
+    if not ok:
+        return None
+
+    print(f"[INFO] Proposal {key} ✅ 最终成功")
+    return _grasp_result(grasp, first_tcp_in_obj, first_quat_in_obj)
+
+
+def _motion_checks(key, actor, robot, gripper, motions, stats, profile, branch_state=None, origin=None):
+    """
+    依次做各个动作，每次 motion_steps 步后比较 TCP 与物体中心的距离变化，超过 threshold 判为滑动。
+    branch_state=None：每次动作接着上一次的状态，与上一次结束时的距离比较 (默认)；
+    传入抓稳时的快照 (capture_state) 时：每次动作前 (包括第一次) 恢复快照，都与抓稳时的距离比较，互不影响。
+    恢复快照会清掉 PhysX 的接触缓存 (与 physx_system.unpack() 相同)，从快照出发的结果彼此可复现，
+    但与不经恢复一直仿真下来的结果有微小差异，所以第一次动作也从恢复后的状态开始。
+    任一动作失败立即结束，返回是否全部通过 (生成器，yield 含义同 proposal_episode)
+    """
+    motion_steps = scaled_steps(200, gripper.scene.get_timestep())
+    if branch_state is not None:
+        restore_state(branch_state, actor, robot, gripper, origin)
+    last_dist = np.linalg.norm(gripper.get_tcp_between_fingers() - actor.get_pose().p)
 
     for i, move in enumerate(motions):
+        if branch_state is not None and i > 0:
+            restore_state(branch_state, actor, robot, gripper, origin)
         vx, vy, vz = move
+        if profile is not None:
+            profile.enter(f"motion_{i+1}")
         robot.set_root_linear_velocity([vx, vy, vz])
-        for _ in range(200):
+        for _ in range(motion_steps):
             gripper.control("stop")
-            scene.step()
-            scene.update_render()
-            if with_viewer:
-                viewer.render()
+            yield
+            if profile is not None:
+                profile.step()
+            stats["motion_steps"] += 1
         robot.set_root_linear_velocity([0, 0, 0])
 
         tcp_world = gripper.get_tcp_between_fingers()
@@ -165,57 +407,391 @@ def run_single_proposal(glb_path, proposal, grasp, with_viewer=True):
         curr_dist = np.linalg.norm(tcp_world - obj_center)
         delta = abs(curr_dist - last_dist)
         print(f"[INFO] Motion {i+1}: Δ={delta:.6f}")
+        stats["motion_deltas"].append(float(delta))
         if delta > threshold:
             print(f"[INFO] Proposal {key} ❌ 滑动失败")
-            return key, None
-        last_dist = curr_dist
+            stats["reason"] = f"slip_motion_{i+1}"
+            return False
+        if branch_state is None:
+            last_dist = curr_dist
+    return True
+
 
-    # === 最终判定成功 ===
-    grasp_result = {
+def _grasp_result(grasp, tcp_in_obj, quat_in_obj):
+    """通过判定的 proposal 写入结果文件的条目 (修正后的 TCP 位置和朝向，物体系)"""
+    return {
         "confidence": float(grasp.get("confidence", 1.0)),
         "position": [float(x) for x in grasp["position"]],
         "orientation": {
-            "w": float(first_quat_in_obj[0]),
+            "w": float(quat_in_obj[0]),
             "xyz": [
-                float(first_quat_in_obj[1]),
-                float(first_quat_in_obj[2]),
-                float(first_quat_in_obj[3]),
+                float(quat_in_obj[1]),
+                float(quat_in_obj[2]),
+                float(quat_in_obj[3]),
             ],
         },
-        "tcp_position": [float(x) for x in first_tcp_in_obj],
+        "tcp_position": [float(x) for x in tcp_in_obj],
         "score": float(grasp.get("score", 0.0)),
     }
 
-    print(f"[INFO] Proposal {key} ✅ 最终成功")
-    return key, grasp_result
+
+def motion_episode(key, grasp, actor, robot, gripper, grasp_state, motions=MOTIONS, branch_motions=False,
+                   stats=None, profile=None, origin=None):
+    """
+    只做动作稳定性检测：先恢复 grasp_state (proposal_episode(keep_state=True) 记下的抓稳快照)，
+    跳过抓取阶段，用 motions 重新检测。yield / return 与 proposal_episode 相同。
+    branch_motions=True 时与完整运行的 --branch-motions 结果一致；依次检测时第一次动作前多了一次恢复，
+    结果与完整运行有微小差异 (见 _motion_checks)
+    """
+    stats = {} if stats is None else stats
+    stats.update(key=key, grasp_steps=0, converged_step=None, steps_saved=0, reason=None, motion_steps=0,
+                 motion_deltas=[])
+    if not branch_motions:   # 分支模式在每次动作前恢复
+        restore_state(grasp_state, actor, robot, gripper, origin)
+    ok = yield from _motion_checks(key, actor, robot, gripper, motions, stats, profile,
+                                   grasp_state if branch_motions else None, origin)
+    stats["ok"] = ok
+    if not ok:
+        return None
+    print(f"[INFO] Proposal {key} ✅ 动作检测通过")
+    return _grasp_result(grasp, grasp_state["tcp_in_obj"], grasp_state["quat_in_obj"])
+
+
+def drive_episode(episode, scene, viewer=None, headless=False, should_stop=None, profile=None):
+    """
+    在单个场景里推进 episode：每次 yield 就 step 一次 (非 headless 时同步渲染)，返回其结果。
+    should_stop: 每隔 CANCEL_CHECK_EVERY 步调用一次，返回 True 时放弃并抛出 Cancelled
+    profile: PhaseProfile，累计 scene.step() 本身的耗时 (physx_step)
+    """
+    steps = 0
+    try:
+        next(episode)
+        while True:
+            if profile is not None:
+                t0 = time.perf_counter()
+                scene.step()
+                profile.add("physx_step", time.perf_counter() - t0)
+            else:
+                scene.step()
+            if not headless:
+                scene.update_render()
+                if viewer is not None:
+                    viewer.render()
+            episode.send(None)
+            steps += 1
+            if should_stop is not None and steps % CANCEL_CHECK_EVERY == 0 and should_stop():
+                episode.close()
+                raise Cancelled()
+    except StopIteration as stop:
+        return stop.value
+
+
+def run_single_proposal(glb_path, proposal, grasp, with_viewer=True, warm=None, collision_cache=None,
+                        headless=False, audit_early_exit=False, stats=None, should_stop=None, profile=False,
+                        cprofile=False, keep_state=False, sim: SimParams | None = None):
+    """
+    测试单个 proposal；传入 warm (WarmScene) 时复用其场景，否则新建场景。
+    headless=True 时场景只有物理系统，仿真循环中不调用 update_render / viewer。
+    sim: 仿真选项 (SimParams)，精度档位 / 碰撞 LOD / 凸分解在复用场景时以 warm 建场景时的为准。
+    audit_early_exit / stats / keep_state 见 proposal_episode；should_stop 见 drive_episode。
+    profile=True 时把各阶段耗时写入 stats["profile"] (见 profiler.PhaseProfile)；
+    cprofile=True 时再用 cProfile 跑这个 proposal，数据 (marshal) 写入 stats["cprofile"]；
+    stats 总会写入 seconds (含建场景的墙钟耗时)
+    """
+    tcp, quat, key = proposal
+    sim = sim or SimParams()
+    t_start = time.perf_counter()
+    prof = PhaseProfile() if profile else None
+    cpr = cProfile.Profile() if cprofile else None
+    if cpr is not None:
+        cpr.enable()
+
+    try:
+        if warm is not None:
+            if prof is not None:
+                prof.enter("reset")
+            warm.reset(tcp, quat)
+            scene, viewer = warm.scene, warm.viewer
+            actor, robot, gripper = warm.actor, warm.robot, warm.gripper
+        else:
+            # 创建新场景
+            if prof is not None:
+                prof.enter("world")
+            params = apply_fidelity(sim.fidelity)
+            scene, viewer = create_world(params["timestep"], with_viewer=with_viewer, headless=headless)
+            setup_physx_defaults(gravity_z=-9.8, static_mu=0.3, dynamic_mu=0.8, restitution=0.3)
+
+            if prof is not None:
+                prof.enter("object")
+            actor = setup_object(scene, glb_path, collision_cache, headless, sim=sim)
+            if prof is not None:
+                prof.enter("robot")
+            robot = setup_robot(scene, tcp, quat, headless, fidelity=sim.fidelity)
+            gripper = Gripper(robot, scene, get_robot_asset(URDF_PATH, scene, headless).finger_links(robot))
+
+        # 没有 viewer 时按步数退出，避免死循环
+        max_steps = MAX_GRASP_STEPS if viewer is None else None
+        episode = proposal_episode(key, grasp, actor, robot, gripper, max_steps, sim.early_exit, audit_early_exit,
+                                   stats, prof, sim.branch_motions, keep_state)
+        result = drive_episode(episode, scene, viewer, headless, should_stop, prof)
+    finally:
+        if cpr is not None:
+            cpr.disable()
+
+    if stats is not None:
+        stats["seconds"] = time.perf_counter() - t_start
+        if prof is not None:
+            stats["profile"] = prof.finish()
+        if cpr is not None:
+            cpr.create_stats()
+            stats["cprofile"] = marshal.dumps(cpr.stats)
+    return key, result
+
+
+def run_motion_checks(glb_path, key, grasp, grasp_state, warm=None, motions=MOTIONS, collision_cache=None,
+                      headless=True, stats=None, sim: SimParams | None = None):
+    """
+    从抓稳快照 grasp_state (run_single_proposal(keep_state=True) 后的 stats["grasp_state"]) 出发，
+    只重跑动作稳定性检测：改动作参数时不必重新仿真抓取阶段。
+    warm: 复用的 WarmScene (多个快照可共用一个)，None → 按 sim 新建一个无 viewer 的场景。返回 (key, grasp_data)
+    """
+    sim = sim or SimParams()
+    t_start = time.perf_counter()
+    if warm is None:
+        warm = WarmScene(glb_path, with_viewer=False, collision_cache=collision_cache, headless=headless, sim=sim)
+    episode = motion_episode(key, grasp, warm.actor, warm.robot, warm.gripper, grasp_state, motions,
+                             sim.branch_motions, stats, origin=warm.origin)
+    result = drive_episode(episode, warm.scene, warm.viewer, headless)
+    if stats is not None:
+        stats["seconds"] = time.perf_counter() - t_start
+    return key, result
+
+
+# ------------------- 读取 proposals -------------------
+def load_proposals(cfg_path: str, proposal_keys=None):
+    """
+    读取 isaac_grasp 文件，返回 [(tcp, quat(已补偿 90°), key, grasp), ...] (按 ranking 顺序)
+    解析结果缓存在 YAML 旁边的 .proposals.npz，文件不变时不再解析 YAML
+    """
+    arrays = load_proposal_arrays(cfg_path)
+    idx = arrays.ranked(proposal_keys)
+    tcps = arrays.tcp_position[idx].astype(np.float32)
+    quats = pm.quat_mul(arrays.quat[idx], pm.ROT_Z90)   # 输入时加 90°
+    return [(tcp, quat, str(arrays.keys[i]), arrays.grasp(i)) for i, tcp, quat in zip(idx, tcps, quats)]
+
+
+# ------------------- 结果缓存 -------------------
+def lookup_cached(result_store, glb_path, proposals, force=False, sim: SimParams | None = None):
+    """
+    查询结果缓存，返回 (keys, cached, todo)：
+    keys 与 proposals 对齐；cached 为 {key: grasp_data/None}；todo 为需要重新仿真的 proposals。
+    force=True 时全部重新仿真 (结果仍会写回覆盖)。
+    """
+    keys = result_store.keys_for(glb_path, proposals, sim_params((sim or SimParams()).for_model(glb_path)), URDF_PATH)
+    cached = {} if force else result_store.lookup(keys)
+    todo = [p for p, k in zip(proposals, keys) if k not in cached]
+    result_store.hits += len(proposals) - len(todo)
+    result_store.misses += len(todo)
+    print(f"[INFO] 结果缓存命中 {len(proposals) - len(todo)}/{len(proposals)}，需要仿真 {len(todo)} 个")
+    return keys, cached, todo
+
+
+def store_results(result_store, task_name, store_keys, results):
+    """把新仿真的结果写入缓存；store_keys: {proposal 名: 缓存键}，results: [(key, grasp_data), ...]"""
+    result_store.put_many(task_name, [(store_keys[key], key, grasp_data) for key, grasp_data in results])
+
+
+# ------------------- 几何预筛 -------------------
+def prefilter_proposals(glb_path, proposals, enabled=True):
+    """
+    对 proposals 做几何预筛，返回 (要仿真的 proposals, {key: 拒绝原因})。
+    enabled=False 时仍然筛选 (用于审计)，但全部 proposal 都进入仿真。
+    """
+    if not proposals:
+        return proposals, {}
+    try:
+        tris = load_triangles(glb_path, SCALE_OBJ)
+        reasons = screen(tris, [p[0] for p in proposals], [p[1] for p in proposals], URDF_PATH)
+    except Exception as e:   # 预筛只是优化，出错时退回全部仿真
+        print(f"[WARN] 几何预筛失败，全部 proposal 进入仿真: {e}")
+        return proposals, {}
+
+    rejected = {key: reason for (_, _, key, _), reason in zip(proposals, reasons) if reason}
+    if not enabled:
+        return proposals, rejected
+    for key, reason in rejected.items():
+        print(f"[INFO] Proposal {key} ❌ 预筛拒绝（{reason}）")
+    return [p for p in proposals if p[2] not in rejected], rejected
+
+
+# ------------------- 仿真前准备 / 结果汇总 -------------------
+def prepare_task(glb_path, proposals, result_store=None, force=False, prefilter=True, top_k=None, priority="score",
+                 resumed=None, sim: SimParams | None = None):
+    """
+    一个任务仿真前的准备：(top-k 时) 按优先级排序 → 查结果缓存 → 续跑日志 → 几何预筛 → 建配额。
+    返回 plan 字典：
+      proposals  评估顺序的全部 proposal (无 top-k 时即 ranking 顺序)
+      rank       {key: 在 ranking 中的位置}
+      todo       需要仿真的 proposal (同样的顺序)
+      known      {key: grasp_data}，已由缓存命中、续跑日志或预筛拒绝 (None) 得到的结果
+      resumed    {key: grasp_data}，来自续跑日志 (见 ResultLog) 且缓存未命中的结果，结束时补写进结果缓存
+      store_keys {key: 缓存键}，rejected {key: 拒绝原因}，screened 预筛的 proposal 数
+      quota      TopKQuota 或 None
+    """
+    rank = {p[2]: i for i, p in enumerate(proposals)}
+    if top_k:
+        tris = load_triangles(glb_path, SCALE_OBJ) if priority == "geometric" else None
+        proposals = [proposals[i] for i in priority_order(proposals, priority, tris)]
+
+    known, store_keys, todo = {}, {}, proposals
+    if result_store is not None:
+        keys, cached, todo = lookup_cached(result_store, glb_path, proposals, force, sim)
+        store_keys = {p[2]: k for p, k in zip(proposals, keys)}
+        known = {p[2]: cached[k] for p, k in zip(proposals, keys) if k in cached}
+
+    resumed = {p[2]: resumed[p[2]] for p in todo if p[2] in resumed} if resumed else {}
+    if resumed:
+        known.update(resumed)
+        todo = [p for p in todo if p[2] not in resumed]
+
+    screened = len(todo)
+    todo, rejected = prefilter_proposals(glb_path, todo, enabled=prefilter)
+    if prefilter:
+        known.update(dict.fromkeys(rejected))
+
+    quota = None
+    if top_k:
+        quota = TopKQuota(top_k, [p[2] for p in proposals])
+        for key, grasp_data in known.items():
+            quota.record(key, grasp_data is not None)
+        todo = [p for p in todo if quota.needed(p[2])]
+    return dict(proposals=proposals, rank=rank, todo=todo, known=known, resumed=resumed, store_keys=store_keys,
+                rejected=rejected, screened=screened, quota=quota, prefilter=prefilter)
+
+
+def finish_task(plan, results, result_store=None, task_name=None):
+    """
+    results: 实际仿真完的 [(key, grasp_data), ...]。写入结果缓存，与已知结果合并，
+    返回按评估顺序排列的 [(key, grasp_data), ...] (top-k 时只到第 k 个通过者为止)
+    """
+    if result_store is not None:
+        store_results(result_store, task_name, plan["store_keys"], list(plan["resumed"].items()) + results)
+    if plan["screened"]:
+        report_prefilter(plan["rejected"], results, audit=not plan["prefilter"])
+
+    evaluated = dict(plan["known"])
+    evaluated.update(results)
+    quota = plan["quota"]
+    if quota is not None:
+        quota.report(task_name)
+    return [(key, evaluated[key]) for _, _, key, _ in plan["proposals"]
+            if key in evaluated and (quota is None or quota.needed(key))]
 
 
 # ------------------- 主函数 -------------------
-def main(cfg_path: str, glb_path: str, task_name: str | None, with_viewer=True):
-    with open(cfg_path, "r", encoding="utf-8") as f:
-        g = yaml.safe_load(f)
-
-    proposals = []
-    if g.get("format") == "isaac_grasp":
-        for k in g["ranking"]:
-            if args.proposal and k not in args.proposal:
-                continue
-            grasp = g["grasps"][k]
-            tcp = np.array(grasp["tcp_position"], dtype=np.float32)
-            quat = [grasp["orientation"]["w"], *grasp["orientation"]["xyz"]]
-            quat = qmult(quat, axangle2quat([0, 0, 1], np.deg2rad(90)))
-            proposals.append((tcp, quat, k, grasp))
+def main(cfg_path: str, glb_path: str, task_name: str | None, with_viewer=True, reuse_scene=False,
+         workers=1, proposal_keys=None, collision_cache=None, headless=False, tiles=1, audit_early_exit=False,
+         result_store=None, force=False, prefilter=True, top_k=None, priority="score", profiler=None, resume=False,
+         results_table=None, sim: SimParams | None = None):
+    collision_cache, sim = prepare_collision_meshes([glb_path], collision_cache, sim)
+    sim_kwargs = dict(collision_cache=collision_cache, headless=headless, sim=sim)
+    episode_kwargs = dict(audit_early_exit=audit_early_exit)
+    stats = []
+    task_prof = None
+    if profiler is not None:
+        episode_kwargs.update(profile=True, cprofile=profiler.cprofile_top > 0)
+        task_prof = PhaseProfile()
+        task_prof.enter("prepare")
+
+    if with_viewer:
+        result_store = None   # 开 viewer 是为了看仿真过程，不走缓存
+    log = open_result_log(task_name, cfg_path, glb_path, resume, sim)
+    plan = prepare_task(glb_path, load_proposals(cfg_path, proposal_keys), result_store, force, prefilter, top_k,
+                        priority, log.resumed if log is not None else None, sim)
+    proposals, quota = plan["todo"], plan["quota"]
+    on_result = log.append if log is not None else None
+    if task_prof is not None:
+        task_prof.enter("simulate")
+
+    if workers > 1 and len(proposals) > 1:
+        if with_viewer:
+            print("[WARN] 多进程模式不支持可视化，已关闭 viewer")
+        if tiles > 1:
+            print("[WARN] --tiles 不能与 --workers 同时使用，已忽略 --tiles")
+        results = run_proposals_parallel(glb_path, proposals, workers, reuse_scene=reuse_scene,
+                                         sim_kwargs=sim_kwargs, episode_kwargs=episode_kwargs, stats=stats,
+                                         quota=quota, on_result=on_result)
+    elif tiles > 1 and len(proposals) > 1:
+        if with_viewer:
+            print("[WARN] 平铺模式不支持可视化，已关闭 viewer")
+        results = run_proposals_tiled(glb_path, proposals, tiles, **sim_kwargs,
+                                      episode_kwargs=episode_kwargs, stats=stats, quota=quota,
+                                      on_result=on_result)
     else:
-        raise ValueError("目前只支持 isaac_grasp 格式")
-
+        warm = None
+        if reuse_scene and proposals:
+            if task_prof is not None:
+                task_prof.enter("scene")
+            warm = WarmScene(glb_path, with_viewer=with_viewer, **sim_kwargs)
+            if task_prof is not None:
+                task_prof.enter("simulate")
+        results = []
+        for idx, (tcp, quat, key, grasp) in enumerate(proposals):
+            if quota is not None and quota.finished():
+                break
+            stats.append({})
+            results.append(run_single_proposal(glb_path, (tcp, quat, key), grasp, with_viewer=with_viewer,
+                                               warm=warm, **sim_kwargs, **episode_kwargs, stats=stats[-1]))
+            print(f"[INFO] Proposal {key} 完成 ({idx+1}/{len(proposals)})")
+            if on_result is not None:
+                on_result(*results[-1])
+            if quota is not None:
+                quota.record(key, results[-1][1] is not None)
+
+    if task_prof is not None:
+        task_prof.enter("finish")
+    if results_table is not None and task_name:
+        results_table.add_task(task_name, plan, results, stats, sim.fidelity)
+    results = finish_task(plan, results, result_store, task_name or cfg_path)
+    save_batch_result(task_name, results)
+    if log is not None:
+        log.finish()
+    if sim.early_exit or audit_early_exit:
+        report_early_exit(stats, audit=audit_early_exit)
+    if profiler is not None:
+        profiler.add_task(task_name or cfg_path, stats, task_prof.finish())
+
+
+# ------------------- 保存结果 -------------------
+def batch_result_path(task_name: str) -> str:
+    """任务的结果文件路径：与其 proposal 文件同目录的 batch_res_{task_name}.yml"""
+    cfg_path, _ = load_registry(TASK_FILE).get(task_name)
+    return os.path.join(os.path.dirname(cfg_path), f"batch_res_{task_name}.yml")
+
+
+def open_result_log(task_name: str | None, cfg_path, glb_path, resume=False, sim: SimParams | None = None):
+    """
+    为有名字的任务打开流式结果日志 (batch_res 旁的 .log.jsonl)，自定义任务 (不保存结果) 返回 None。
+    日志头记录输入文件哈希和仿真参数，续跑时必须一致。
+    """
+    if not task_name:
+        return None
+    header = {"task": task_name, "cfg": file_sha1(cfg_path), "glb": file_sha1(glb_path),
+              "urdf": file_sha1(URDF_PATH), "params": sim_params((sim or SimParams()).for_model(glb_path))}
+    return ResultLog(log_path(batch_result_path(task_name)), header, resume)
+
+
+def save_batch_result(task_name: str | None, results):
+    """
+    results: 按原始 ranking 顺序的 [(key, grasp_data), ...]，成功的写入 batch_res_{task_name}.yml
+    (原子替换：先写临时文件再改名，中途被杀不会损坏已有的结果文件)
+    """
     grasps_result = {}
     ranking_result = []
-    for idx, (tcp, quat, key, grasp) in enumerate(proposals):
-        key, grasp_data = run_single_proposal(glb_path, (tcp, quat, key), grasp, with_viewer=with_viewer)
+    for key, grasp_data in results:
         if grasp_data is not None:
             grasps_result[key] = grasp_data
             ranking_result.append(key)
-        print(f"[INFO] Proposal {key} 完成 ({idx+1}/{len(proposals)})")
 
     # === 统一写入结果 ===
     final_result = {
@@ -226,20 +802,10 @@ def main(cfg_path: str, glb_path: str, task_name: str | None, with_viewer=True):
     }
 
     if task_name:
-        with open(TASK_FILE, "r", encoding="utf-8") as f:
-            tasks = yaml.safe_load(f).get("tasks", {})
-        parts = task_name.split(".")
-        if len(parts) == 1:
-            cfg_path = tasks[parts[0]]["config"]
-        elif len(parts) == 2:
-            cfg_path = tasks[parts[0]][parts[1]]["config"]
-        else:
-            raise ValueError(f"任务名称格式不正确: {task_name}")
-        task_dir = os.path.dirname(cfg_path)
-        out_path = os.path.join(task_dir, f"batch_res_{task_name}.yml")
-        with open(out_path, "w", encoding="utf-8") as f:
-            yaml.dump(final_result, f, sort_keys=False, allow_unicode=True)
-        print(f"[INFO] 🚩 已保存到 {out_path}")
+        out_path = batch_result_path(task_name)
+        existed = os.path.isfile(out_path)
+        atomic_write_yaml(out_path, final_result)
+        print(f"[INFO] 🚩 已保存到 {out_path}" + (" (覆盖原文件)" if existed else ""))
 
 
 # ------------------- 程序入口 -------------------
@@ -256,41 +822,183 @@ if __name__ == "__main__":
         help="指定要测试的 proposal 列表 (如 grasp_98 grasp_88)"
     )
     parser.add_argument("--all", action="store_true", help="运行所有任务")
+    parser.add_argument("--pattern", type=str,
+                        help="按任务名 / 类别名 / 通配符选任务 (如 bowl.002、bowl、bowl.00*、*.002)，"
+                             "task.yml 未登记但目录下有 proposal 和 *_scaled.glb 的任务也会被发现")
     parser.add_argument("--viewer", action="store_true", help="是否启用可视化")
+    parser.add_argument("--headless", action="store_true",
+                        help="纯物理模式：不建渲染系统、光照和可视网格 (无显示器的服务器)")
+    parser.add_argument("--reuse-scene", action="store_true", help="每个任务只建一次场景，proposal 之间仅重置状态")
+    parser.add_argument("--workers", type=int, default=1, help="并行测试 proposal 的进程数 (仅无 viewer)")
+    parser.add_argument("--tiles", type=int, default=1,
+                        help="同一场景里并排仿真的 物体/手爪 组数，一次 step 推进多个 proposal (仅无 viewer)")
+    parser.add_argument("--early-exit", action="store_true",
+                        help="抓取阶段手指和物体都停住仍未抓稳时提前判定失败 (不必跑满最大步数)")
+    parser.add_argument("--audit-early-exit", action="store_true",
+                        help="只记录收敛时刻、按旧判据跑完，核对提前结束与旧结果是否一致")
+    parser.add_argument("--branch-motions", action="store_true",
+                        help="三次动作检测都从抓稳时的物理快照出发、各自与抓稳时的距离比较 (默认依次接着上一次动作)")
+    parser.add_argument("--no-prefilter", action="store_true",
+                        help="关闭几何预筛：全部 proposal 都仿真，并核对预筛会拒绝的是否确实失败")
+    parser.add_argument("--fidelity", choices=tuple(FIDELITY_PROFILES), default=DEFAULT_FIDELITY,
+                        help="仿真精度档位 (时间步长 / 求解器迭代 / 接触参数，见 fidelity.py)，可用 compare_fidelity.py 对比")
+    parser.add_argument("--collision-lod", choices=tuple(LOD_LEVELS), default=DEFAULT_LOD,
+                        help="物体碰撞网格的简化档位 (面数预算 + 顶点偏差容差，见 collision_lod.py)，可视网格不受影响；"
+                             "简化结果缓存在碰撞缓存目录，可用 compare_lod.py 对比各档位")
+    parser.add_argument("--collision-decomp", choices=DECOMP_METHODS, default=DEFAULT_DECOMP,
+                        help="物体碰撞体改用多个凸包 (见 convex_decomp.py)：auto 装了 coacd 时用 coacd，否则按网格切块；"
+                             "质量属性与三角网格碰撞体一致，分解结果缓存在碰撞缓存目录，优先于 --collision-lod")
+    parser.add_argument("--top-k", type=int, default=0,
+                        help="每个任务按优先级评估，凑够 K 个通过的 proposal 就停 (0 为全部评估)")
+    parser.add_argument("--priority", choices=PRIORITIES, default="score",
+                        help="--top-k 的评估顺序：score / confidence (从高到低)、ranking (文件顺序)、"
+                             "geometric (TCP 离物体面积重心越近越先)")
+    parser.add_argument("--result-store", type=str, default=DEFAULT_DB_PATH,
+                        help=f"proposal 结果缓存 (SQLite) 路径，默认 {DEFAULT_DB_PATH}")
+    parser.add_argument("--no-result-store", action="store_true", help="不使用结果缓存，全部重新仿真且不写入")
+    parser.add_argument("--results-table", type=str, default=DEFAULT_TABLE_DIR,
+                        help=f"全数据集的列式结果表目录 (每个任务的每个 proposal 一行，用 result_table.py 汇总)，"
+                             f"默认 {DEFAULT_TABLE_DIR}")
+    parser.add_argument("--no-results-table", action="store_true", help="不写列式结果表")
+    parser.add_argument("--force", action="store_true", help="忽略已缓存的结果，全部重新仿真并覆盖缓存")
+    parser.add_argument("--resume", action="store_true",
+                        help="从上次被中断的运行继续：复用 batch_res 旁结果日志 (.log.jsonl) 里已完成的 proposal")
+    parser.add_argument("--invalidate", action="store_true",
+                        help="删除所选任务 (--all 或未指定任务时为全部) 的缓存结果后退出")
+    parser.add_argument("--profile", type=str, nargs="?", const=DEFAULT_PROFILE_PATH, default=None,
+                        help=f"统计每个 proposal / 任务各阶段的耗时和 steps/s，写 JSON 报告 (默认 {DEFAULT_PROFILE_PATH}) "
+                             "并在结束时打印汇总表")
+    parser.add_argument("--profile-cprofile", type=int, default=0, metavar="N",
+                        help="配合 --profile：用 cProfile 跑每个 proposal，保存最慢的 N 个 (.prof，可用 pstats/snakeviz 查看)")
+    parser.add_argument("--collision-cache", type=str, nargs="?", const=DEFAULT_CACHE_DIR, default=None,
+                        help=f"启用碰撞网格磁盘缓存 (可指定目录，默认 {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--collision-cache-mb", type=int, default=512, help="碰撞缓存容量上限 (MB)，超出按 LRU 淘汰")
     args = parser.parse_args()
-
-    with open(TASK_FILE, "r", encoding="utf-8") as f:
-        tasks = yaml.safe_load(f).get("tasks", {})
-
-    if args.all:
-        all_jobs = []
-        for tname, tval in tasks.items():
-            if "config" in tval and "model" in tval:
-                all_jobs.append((tname, tval["config"], tval["model"], tname))
-            else:
-                for sub, sub_cfg in tval.items():
-                    task_name = f"{tname}.{sub}"
-                    all_jobs.append((task_name, sub_cfg["config"], sub_cfg["model"], task_name))
-        for idx, (task_name, cfg, glb, save_name) in enumerate(all_jobs, 1):
-            print(f"\n[PROGRESS] [{idx}/{len(all_jobs)}] {task_name}")
-            main(cfg, glb, save_name, with_viewer=args.viewer)
-
-    elif args.task and args.id:
-        task_cfg = tasks[args.task][args.id]
-        task_name = f"{args.task}.{args.id}"
-        print(f"\n[PROGRESS] [1/1] {task_name}")
-        main(task_cfg["config"], task_cfg["model"], task_name, with_viewer=args.viewer)
-
+    if args.profile_cprofile and not args.profile:
+        args.profile = DEFAULT_PROFILE_PATH
+    if args.top_k < 0:
+        parser.error("--top-k 不能为负数")
+    if args.headless and args.viewer:
+        print("[WARN] --headless 与 --viewer 冲突，已关闭 viewer")
+        args.viewer = False
+
+    registry = load_registry(TASK_FILE)
+    if args.pattern:
+        selector = args.pattern
     elif args.task:
-        sub_jobs = list(tasks[args.task].items())
-        for idx, (sub, sub_cfg) in enumerate(sub_jobs, 1):
-            task_name = f"{args.task}.{sub}"
-            print(f"\n[PROGRESS] [{idx}/{len(sub_jobs)}] {task_name}")
-            main(sub_cfg["config"], sub_cfg["model"], task_name, with_viewer=args.viewer)
+        selector = f"{args.task}.{args.id}" if args.id else args.task
+    else:
+        selector = None
+
+    result_store = None if args.no_result_store else ResultStore(args.result_store)
+    if args.invalidate:
+        if result_store is None:
+            parser.error("--invalidate 不能与 --no-result-store 同时使用")
+        try:
+            targets = registry.select(selector) if selector and not args.all else None
+        except ValueError as e:
+            parser.error(str(e))
+        n = result_store.invalidate(targets)
+        print(f"[INFO] 已删除 {n} 条缓存结果 ({'全部任务' if targets is None else ', '.join(targets)})")
+        raise SystemExit(0)
+
+    collision_cache = None
+    if args.collision_cache:
+        collision_cache = CollisionCache(args.collision_cache, max_bytes=args.collision_cache_mb * 1024 * 1024)
+
+    profiler = ProfileReport(args.profile, args.profile_cprofile) if args.profile else None
+    results_table = None if args.no_results_table else ResultTable(args.results_table)
+
+    sim = SimParams(early_exit=args.early_exit, fidelity=args.fidelity, branch_motions=args.branch_motions,
+                    collision_lod=args.collision_lod, collision_decomp=args.collision_decomp)
+    run_kwargs = dict(
+        with_viewer=args.viewer,
+        reuse_scene=args.reuse_scene,
+        workers=args.workers,
+        proposal_keys=args.proposal,
+        collision_cache=collision_cache,
+        headless=args.headless,
+        tiles=args.tiles,
+        audit_early_exit=args.audit_early_exit,
+        result_store=result_store,
+        force=args.force,
+        prefilter=not args.no_prefilter,
+        top_k=args.top_k,
+        priority=args.priority,
+        profiler=profiler,
+        resume=args.resume,
+        results_table=results_table,
+        sim=sim,
+    )
+
+    if args.all or selector:
+        try:
+            names = registry.select(None if args.all else selector)
+        except ValueError as e:
+            parser.error(str(e))
+        all_jobs = [(name, *registry.get(name), name) for name in names]
+        if args.workers > 1 and len(all_jobs) > 1 and (args.all or args.pattern):
+            # 跨任务调度：所有 proposal 进同一个队列，按估计耗时从大到小分发
+            task_proposals, logs = {}, {}
+            all_jobs = [job for job in all_jobs if task_inputs_exist(*job[:3])]
+            # 先确定各物体实际的碰撞体 (凸分解失败的改用三角网格)，结果日志头和缓存键都按它记
+            collision_cache, sim = prepare_collision_meshes([glb for _, _, glb, _ in all_jobs], collision_cache, sim)
+            for task_name, cfg, glb, save_name in all_jobs:
+                task_proposals[save_name] = (glb, load_proposals(cfg, args.proposal))
+                logs[save_name] = open_result_log(save_name, cfg, glb, args.resume, sim)
+            mesh_index = load_mesh_index(TASK_FILE)
+            face_counts = {glb: mesh_index.face_count(glb) for glb, _ in task_proposals.values()}
+            total = sum(len(p) for _, p in task_proposals.values())
+            print(f"\n[INFO] 共 {len(task_proposals)} 个任务, {total} 个 proposal, {args.workers} 个进程")
+            stats = []
+            episode_kwargs = dict(audit_early_exit=args.audit_early_exit)
+            if profiler is not None:
+                episode_kwargs.update(profile=True, cprofile=profiler.cprofile_top > 0)
+            # 只把缓存未命中、通过预筛且 top-k 仍需要的 proposal 放进队列，任务完成时再与已知结果合并
+            plans = {}
+            for save_name, (glb, proposals) in task_proposals.items():
+                plans[save_name] = prepare_task(glb, proposals, result_store, args.force, not args.no_prefilter,
+                                                args.top_k, args.priority, logs[save_name].resumed, sim)
+                task_proposals[save_name] = (glb, plans[save_name]["todo"])
+            quotas = {name: plan["quota"] for name, plan in plans.items() if plan["quota"] is not None}
+
+            def on_task_done(name, results):
+                if results_table is not None:
+                    results_table.add_task(name, plans[name], results, [s for s in stats if s["task"] == name],
+                                           sim.fidelity)
+                save_batch_result(name, finish_task(plans[name], results, result_store, name))
+                logs[name].finish()
+
+            run_scheduled(task_proposals, args.workers, reuse_scene=args.reuse_scene,
+                          on_task_done=on_task_done,
+                          on_result=lambda name, key, grasp_data: logs[name].append(key, grasp_data),
+                          sim_kwargs=dict(collision_cache=collision_cache, headless=args.headless, sim=sim),
+                          face_counts=face_counts, episode_kwargs=episode_kwargs, stats=stats, quotas=quotas)
+            if sim.early_exit or args.audit_early_exit:
+                report_early_exit(stats, audit=args.audit_early_exit)
+            if profiler is not None:
+                # 跨任务调度时任务之间交错执行，没有单个任务的墙钟时间
+                for name in task_proposals:
+                    profiler.add_task(name, [s for s in stats if s["task"] == name])
+        else:
+            for idx, (task_name, cfg, glb, save_name) in enumerate(all_jobs, 1):
+                print(f"\n[PROGRESS] [{idx}/{len(all_jobs)}] {task_name}")
+                if task_inputs_exist(task_name, cfg, glb):
+                    main(cfg, glb, save_name, **run_kwargs)
 
     else:
         cfg = args.cfg
         glb = args.glb
         task_name = None
         print(f"\n[PROGRESS] [1/1] 自定义任务")
-        main(cfg, glb, task_name, with_viewer=args.viewer)
+        main(cfg, glb, task_name, **run_kwargs)
+
+    if profiler is not None:
+        profiler.report()
+    if results_table is not None:
+        results_table.report()
+    if collision_cache is not None:
+        collision_cache.report()
+    if result_store is not None:
+        result_store.report()
+        result_store.close()
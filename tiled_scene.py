@@ -0,0 +1,196 @@
+# tiled_scene.py — 多组平铺：同一个物理场景里放 K 组 物体 + Panda 手爪，一次 scene.step() 推进 K 个 proposal
+
+from __future__ import annotations
+import math
+import time
+
+import numpy as np
+import sapien.core as sapien
+
+from fidelity import apply_fidelity
+
+# 默认所有组重叠放在原点，只靠碰撞组隔离：
+# 平移到别处会改变 float32 世界坐标，仿真结果随之有微小差异，边界 proposal 的判定可能翻转
+TILE_SPACING = 0.0        # 相邻两组之间的距离 (m)
+MAX_TILES = 32            # 碰撞组 g0/g1 只有 32 位，每组占一位
+ALL_GROUPS = 0xFFFFFFFF   # 地面与所有组都碰撞
+
+
+def tile_origins(num_tiles: int, spacing: float = TILE_SPACING):
+    """在 xy 平面上按近似正方形网格排布，网格中心在原点；spacing=0 时全部在原点"""
+    cols = math.ceil(math.sqrt(num_tiles))
+    rows = math.ceil(num_tiles / cols)
+    origins = []
+    for i in range(num_tiles):
+        r, c = divmod(i, cols)
+        origins.append(np.array([(c - (cols - 1) / 2) * spacing, (r - (rows - 1) / 2) * spacing, 0.0]))
+    return origins
+
+
+def _set_contact_groups(body, bits):
+    """只改 g0/g1 (接触类型/亲和组)，保留 g2/g3 (手爪自碰撞设置)"""
+    for shape in body.get_collision_shapes():
+        g = shape.get_collision_groups()
+        shape.set_collision_groups([bits, bits, g[2], g[3]])
+
+
+class TiledScene:
+    """
+    一个场景里的 K 组 WarmScene (共用世界和地面)。
+    第 i 组所有碰撞体的 g0/g1 只有第 i 位，组与组之间不产生接触；
+    每步的接触按刚体组件身份一次性分到各组。
+    """
+
+    def __init__(self, glb_path, num_tiles: int, spacing: float = TILE_SPACING, collision_cache=None,
+                 headless=False, sim=None):
+        from test_main import SimParams, WarmScene   # 延迟导入，避免与 test_main 循环引用
+        from world import create_world
+        from physx_utils import setup_physx_defaults
+
+        if num_tiles > MAX_TILES:
+            raise ValueError(f"最多支持 {MAX_TILES} 组平铺，收到 {num_tiles}")
+        setup_physx_defaults(gravity_z=-9.8, static_mu=0.3, dynamic_mu=0.8, restitution=0.3)
+        sim = sim or SimParams()
+        self.scene, _ = create_world(apply_fidelity(sim.fidelity)["timestep"], with_viewer=False, headless=headless)
+        self.headless = headless
+
+        for entity in self.scene.get_entities():
+            if entity.get_name() == "ground":
+                _set_contact_groups(entity.find_component_by_type(sapien.physx.PhysxRigidBaseComponent), ALL_GROUPS)
+
+        self.tiles = []
+        self._bodies = []    # 每组的刚体组件
+        self._tile_of = {}   # 刚体组件 → 组号
+        for idx, origin in enumerate(tile_origins(num_tiles, spacing)):
+            tile = WarmScene(glb_path, collision_cache=collision_cache, headless=headless,
+                             scene=self.scene, origin=origin, sim=sim)
+            bits = 1 << idx
+            bodies = [tile.actor.find_component_by_type(sapien.physx.PhysxRigidBaseComponent)]
+            bodies += tile.robot.get_links()
+            for body in bodies:
+                _set_contact_groups(body, bits)
+                self._tile_of[body] = idx
+            self._bodies.append(bodies)
+            self.tiles.append(tile)
+
+    def park(self, idx):
+        """闲置的组：清空接触组 (不再产生任何接触)，物体和手爪停住"""
+        tile = self.tiles[idx]
+        for body in self._bodies[idx]:
+            _set_contact_groups(body, 0)
+        tile.robot.set_root_linear_velocity([0, 0, 0])
+        tile.robot.set_root_angular_velocity([0, 0, 0])
+        tile.gripper.control("stop")
+
+    def unpark(self, idx):
+        for body in self._bodies[idx]:
+            _set_contact_groups(body, 1 << idx)
+
+    def step(self):
+        """所有组一起 step 一次，返回按组拆分的接触列表"""
+        self.scene.step()
+        if not self.headless:
+            self.scene.update_render()
+
+        per_tile = [[] for _ in self.tiles]
+        tile_of = self._tile_of
+        for c in self.scene.get_contacts():
+            b0, b1 = c.bodies
+            idx = tile_of.get(b0)
+            if idx is None:
+                idx = tile_of.get(b1)
+            if idx is not None:
+                per_tile[idx].append(c)
+        return per_tile
+
+
+def run_proposals_tiled(glb_path, proposals, num_tiles: int, collision_cache=None, headless=False,
+                        spacing: float = TILE_SPACING, episode_kwargs=None, stats=None, quota=None,
+                        on_result=None, sim=None):
+    """
+    proposals: [(tcp, quat, key, grasp), ...]
+    同时最多 num_tiles 个 proposal 在同一场景里仿真，各自独立判定；
+    某组结束后立即重置并接上下一个 proposal。返回与 proposals 顺序一致的 [(key, grasp_data), ...]
+    sim: 仿真选项 (test_main.SimParams)；episode_kwargs 传给 proposal_episode；stats 传入 list 时按 proposals 顺序追加每个 proposal 的统计
+    quota: TopKQuota，配额满后不再开始、并放弃正在仿真的多余 proposal；此时只返回实际评估完的
+    on_result: 每评估完一个 proposal 立即回调 on_result(key, grasp_data)
+    episode_kwargs 中 profile=True 时记录每个 proposal 的阶段耗时 (几组共用一次 step，耗时为墙钟时间、
+    不含 physx_step 计时)；cProfile 无法按 proposal 区分，平铺模式下忽略
+    """
+    from test_main import MAX_GRASP_STEPS, SimParams, proposal_episode
+    from profiler import PhaseProfile
+
+    sim = sim or SimParams()
+    episode_kwargs = dict(episode_kwargs or {})
+    profile = episode_kwargs.pop("profile", False)
+    episode_kwargs.pop("cprofile", None)
+
+    if not proposals:
+        return []
+    if num_tiles > MAX_TILES:
+        print(f"[WARN] 平铺组数超过上限，使用 {MAX_TILES} 组")
+    num_tiles = max(1, min(num_tiles, len(proposals), MAX_TILES))
+    tiled = TiledScene(glb_path, num_tiles, spacing, collision_cache, headless, sim)
+
+    results = [None] * len(proposals)
+    job_stats = [{} for _ in proposals]
+    pending = iter(enumerate(proposals))
+    active = {}   # 组号 → (proposal 下标, key, episode)
+    profiles = {}  # proposal 下标 → PhaseProfile
+    started = {}   # proposal 下标 → 开始时刻 (stats 的 seconds 为重置到判定结束的墙钟时间)
+    done = 0
+
+    def start(t):
+        nxt = next(pending, None)
+        while nxt is not None and quota is not None and not quota.needed(nxt[1][2]):
+            nxt = next(pending, None)
+        if nxt is None:
+            tiled.park(t)   # 没有剩余 proposal，闲置的组不再参与碰撞计算
+            return
+        idx, (tcp, quat, key, grasp) = nxt
+        tile = tiled.tiles[t]
+        started[idx] = time.perf_counter()
+        prof = profiles[idx] = PhaseProfile() if profile else None
+        if prof is not None:
+            prof.enter("reset")
+        tile.reset(tcp, quat)
+        episode = proposal_episode(key, grasp, tile.actor, tile.robot, tile.gripper, MAX_GRASP_STEPS,
+                                   early_exit=sim.early_exit, branch_motions=sim.branch_motions, **episode_kwargs,
+                                   stats=job_stats[idx], profile=prof, origin=tile.origin)
+        next(episode)
+        active[t] = (idx, key, episode)
+
+    for t in range(num_tiles):
+        start(t)
+
+    while active:
+        per_tile = tiled.step()
+        for t, (idx, key, episode) in list(active.items()):
+            try:
+                if quota is not None and not quota.needed(key):
+                    episode.close()   # 配额已满，这个 proposal 不再需要
+                    del active[t]
+                    start(t)
+                    continue
+                episode.send(per_tile[t])
+            except StopIteration as stop:
+                results[idx] = (key, stop.value)
+                job_stats[idx]["seconds"] = time.perf_counter() - started[idx]
+                if profiles[idx] is not None:
+                    job_stats[idx]["profile"] = profiles[idx].finish()
+                done += 1
+                print(f"[INFO] Proposal {key} 完成 ({done}/{len(proposals)})")
+                if on_result is not None:
+                    on_result(key, stop.value)
+                del active[t]
+                if quota is not None:
+                    quota.record(key, stop.value is not None)
+                start(t)
+        if quota is not None and quota.finished():
+            for _, _, episode in active.values():
+                episode.close()
+            break
+
+    if stats is not None:
+        stats.extend(s for s, r in zip(job_stats, results) if r is not None)
+    return [r for r in results if r is not None]
@@ -0,0 +1,73 @@
+# topk.py — --top-k：按优先级评估 proposal，每个任务凑够 K 个通过的就停 (结果与并行/完成顺序无关)
+
+from __future__ import annotations
+import numpy as np
+
+PRIORITIES = ("score", "confidence", "ranking", "geometric")
+CANCEL_CHECK_EVERY = 50   # 仿真中每隔多少步检查一次是否已被取消
+
+
+class Cancelled(Exception):
+    """proposal 已不再需要 (所在任务的配额已满)，中途放弃仿真"""
+
+
+def priority_order(proposals, mode: str = "score", tris=None):
+    """
+    proposals: [(tcp, quat, key, grasp), ...] (按文件 ranking 顺序)，返回评估顺序的下标列表。
+    score: 按 score 从高到低 (没有 score 的按 confidence)；confidence: 按 confidence 从高到低；
+    ranking: 文件原顺序；geometric: TCP 离物体表面面积重心越近越优先 (tris 为物体三角形 (T,3,3))。
+    同分时保持 ranking 顺序。
+    """
+    if mode == "ranking" or not proposals:
+        return list(range(len(proposals)))
+    if mode == "geometric":
+        area = np.linalg.norm(np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0]), axis=1)
+        centroid = (tris.mean(axis=1) * area[:, None]).sum(axis=0) / area.sum()
+        tcps = np.array([p[0] for p in proposals], dtype=np.float64)
+        cost = np.linalg.norm(tcps - centroid, axis=1)
+    elif mode == "confidence":
+        cost = -np.array([float(p[3].get("confidence", 0.0)) for p in proposals])
+    elif mode == "score":
+        cost = -np.array([float(p[3].get("score", p[3].get("confidence", 0.0))) for p in proposals])
+    else:
+        raise ValueError(f"未知的优先级 {mode}，可选 {PRIORITIES}")
+    return np.argsort(cost, kind="stable").tolist()
+
+
+class TopKQuota:
+    """
+    一个任务的 top-k 配额。keys 为评估 (优先级) 顺序，结果可按任意顺序 record。
+    已知的通过结果凑够 k 个后，第 k 个通过者的位置就是 cutoff：之后的 proposal 不再需要 (可取消)；
+    cutoff 之前全部有结果时任务完成。最终输出总是 "按优先级顺序的前 k 个通过者"，与完成顺序无关。
+    """
+
+    def __init__(self, k: int, keys):
+        self.k = int(k)
+        self.pos = {key: i for i, key in enumerate(keys)}
+        self.n = len(self.pos)
+        self.outcome = {}       # 位置 → 是否通过
+        self.passed = []        # 已通过的位置 (有序)
+        self.cutoff = self.n - 1
+
+    def record(self, key, ok: bool):
+        i = self.pos[key]
+        self.outcome[i] = bool(ok)
+        if ok:
+            self.passed.append(i)
+            self.passed.sort()
+            if len(self.passed) >= self.k:
+                self.cutoff = min(self.cutoff, self.passed[self.k - 1])
+
+    def needed(self, key) -> bool:
+        return self.pos[key] <= self.cutoff
+
+    def finished(self) -> bool:
+        return all(i in self.outcome for i in range(self.cutoff + 1))
+
+    def report(self, name=None):
+        label = f"{name} " if name else ""
+        if len(self.passed) >= self.k:
+            print(f"[INFO] 🎯 {label}top-{self.k} 已满：第 {self.k} 个通过者排在第 {self.cutoff + 1}/{self.n} 位，"
+                  f"之后的 {self.n - self.cutoff - 1} 个 proposal 不再评估")
+        else:
+            print(f"[INFO] 🎯 {label}top-{self.k} 未满：{self.n} 个 proposal 中只有 {len(self.passed)} 个通过")
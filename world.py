@@ -8,9 +8,16 @@ def create_world(timestep: float = 1 / 100.0,
                  with_viewer: bool = True,
                  ambient=(0.5, 0.5, 0.5),
                  sun_dir=(0, 1, -1),
-                 sun_rgb=(0.5, 0.5, 0.5)):
-    """兜底世界创建器（带实体地板）"""
-    scene = sapien.Scene()
+                 sun_rgb=(0.5, 0.5, 0.5),
+                 headless: bool = False):
+    """
+    兜底世界创建器（带实体地板）
+    headless=True 时只创建 PhysX 系统 (不建渲染系统)，地板只有碰撞体，不加光照和 viewer
+    """
+    if headless:
+        scene = sapien.Scene([sapien.physx.PhysxCpuSystem()])
+    else:
+        scene = sapien.Scene()
     scene.set_timestep(timestep)
 
     # --- 实体地面 (10x10 m, 厚度0.1m) ---
@@ -18,10 +25,14 @@ def create_world(timestep: float = 1 / 100.0,
     half_size = [5.0, 5.0, 0.05]
     phys_mat = scene.create_physical_material(0.8, 0.8, 0.0)
     builder.add_box_collision(half_size=half_size, material=phys_mat)
-    builder.add_box_visual(half_size=half_size)
+    if not headless:
+        builder.add_box_visual(half_size=half_size)
     ground = builder.build_static(name="ground")
     ground.set_pose(sapien.Pose([0, 0, -0.05]))  # 顶面在 z=0
 
+    if headless:
+        return scene, None
+
     # --- 光照 ---
     scene.set_ambient_light(list(ambient))
     scene.add_directional_light(list(sun_dir), list(sun_rgb))